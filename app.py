@@ -27,17 +27,33 @@ from explore import (
     format_web_sources,
     format_sources,
     format_docs,
+    load_corpus_catalog,
+    episode_metadata,
+    build_corpus_retriever,
+    with_date_range,
+    corpus_configs,
+    current_index,
+    index_ready,
+    timestamp_url,
     parse_answer_sections,
     direct_is_missing,
     run_deanifried,
     should_web_fallback,
     docker_available,
     searxng_ping,
+    load_query_embeddings,
+    load_answer_cache,
+    answer_cache_key,
+    context_fingerprint,
+    cached_llm_answer,
+    describe_cache_hit,
+    load_semantic_cache,
+    semantic_cache_settings,
+    retrieval_scope,
+    retrieve_with_semantic_cache,
+    describe_semantic_match,
+    coerce_bool,
 )
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
 # ── Page config ──────────────────────────────────────────────────────────────
 
@@ -58,15 +74,34 @@ def get_model_catalog(config):
     return build_model_catalog(config)
 
 @st.cache_resource
-def get_vectorstore(vector_db_path):
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    return Chroma(persist_directory=vector_db_path, embedding_function=embeddings)
+def get_embeddings(config):
+    # Query-embedding cache in front of the model; torch loads on the first uncached question
+    return load_query_embeddings(config)
+
+@st.cache_resource
+def get_answer_cache(config):
+    return load_answer_cache(config)
+
+@st.cache_resource
+def get_semantic_cache(config):
+    return load_semantic_cache(config)
+
+# The current build (with its ID) is part of both cache keys, so when
+# index_corpus.py switches data/indexes/CURRENT the next run opens the new
+# build while requests already in flight finish on the old one
+@st.cache_resource
+def get_retriever(config, indexes):
+    return build_corpus_retriever(config, get_embeddings(config), indexes)
+
+@st.cache_resource
+def get_episode_catalog(indexes):
+    return load_corpus_catalog(indexes)
 
 config = get_config()
 model_catalog = get_model_catalog(config)
 providers = config.get("providers", {})
 retrieval = config.get("retrieval", {})
-vector_db_path = config.get("paths", {}).get("vector_db", "data/chroma_db")
+corpora = corpus_configs(config.get("paths", {}))
 
 # ── Friendly model labels ─────────────────────────────────────────────────────
 
@@ -98,12 +133,49 @@ with st.sidebar:
     )
     selected_model_key = model_keys[model_display.index(selected_display)]
 
+    selected_corpora = corpora[:1]
+    if len(corpora) > 1:
+        corpus_labels = [corpus["label"] for corpus in corpora]
+        all_label = "All of them"
+        corpus_choice = st.radio(
+            "Search",
+            options=corpus_labels + [all_label],
+            index=0,
+            help="Pick one corpus, or search all of them at once (results are shared out between corpora).",
+        )
+        selected_corpora = corpora if corpus_choice == all_label else [corpora[corpus_labels.index(corpus_choice)]]
+    current_builds = [current_index(config, corpus) for corpus in selected_corpora]
+    episode_catalog = get_episode_catalog(current_builds)
+
+    episode_years = sorted({
+        str(meta.get("publish_date"))[:4]
+        for meta in episode_catalog.values()
+        if str(meta.get("publish_date") or "")[:4].isdigit()
+    })
+    date_since = date_until = None
+    if len(episode_years) > 1:
+        year_from, year_to = st.select_slider(
+            "Episodes published",
+            options=episode_years,
+            value=(episode_years[0], episode_years[-1]),
+            help="Only search episodes from these years. Narrow it for recent advice; the search skips older episodes entirely.",
+        )
+        # The full range means no filter, so episodes without a date stay searchable
+        date_since = year_from if year_from != episode_years[0] else None
+        date_until = year_to if year_to != episode_years[-1] else None
+
     web_search_on = st.checkbox(
         "Also search the web",
         value=False,
         help="When checked, the app will supplement the podcast corpus with current web results if the corpus answer is thin.",
     )
 
+    use_cached_answers = st.checkbox(
+        "Reuse cached answers",
+        value=True,
+        help="Repeat questions reuse cached answers (and, with cache.semantic on, close paraphrases reuse earlier search results). Untick to search and ask the AI again (the new results replace the cached ones).",
+    )
+
     deanifried_on = st.checkbox(
         "Dean-i-fried voice",
         value=False,
@@ -160,6 +232,10 @@ with st.sidebar:
 ---
 
 **Also search the web** adds current web results when the corpus answer is thin. Useful for topics that have evolved since the episodes were recorded.
+
+---
+
+**Reuse cached answers** returns the saved answer when the same question was asked before with the same AI, response style and search results (for up to a week). With `cache.semantic` turned on, close paraphrases of an earlier question reuse its sources, and the caption under the answer names the question that was matched. Untick it to search and ask again.
 """
         )
 
@@ -183,7 +259,7 @@ ask_clicked = st.button("Ask Lenny", type="primary", use_container_width=True)
 
 def check_ready():
     """Return (ok, message) before running a query."""
-    if not os.path.exists(vector_db_path):
+    if not all(index_ready(index) for index in current_builds):
         return False, (
             "The podcast index hasn't been built yet. "
             "Open a terminal, navigate to this folder, and run: `./setup.sh`"
@@ -270,11 +346,13 @@ def build_export_markdown(question, answer, response_style, deanifried_text,
         for doc in source_docs:
             if count >= max_sources:
                 break
-            m = doc.metadata
+            m = episode_metadata(doc, episode_catalog)
             guest = m.get("guest", "Unknown")
+            if m.get("corpus_label"):
+                guest = f"{guest} ({m['corpus_label']})"
             title = m.get("title", "Untitled")
             date_str = m.get("publish_date", "")
-            url = m.get("youtube_url", "")
+            url = timestamp_url(m.get("youtube_url", ""), m.get("start_ts"))
             eid = f"{guest}_{title}"
             if eid in seen:
                 continue
@@ -312,7 +390,7 @@ def build_export_markdown(question, answer, response_style, deanifried_text,
 
 # ── Query logic ───────────────────────────────────────────────────────────────
 
-def run_query(question, model_key, response_style, web_search_on, deanifried_on, deanifried_platform):
+def run_query(question, model_key, response_style, web_search_on, deanifried_on, deanifried_platform, use_cached_answers=True):
     ok, msg = check_ready()
     if not ok:
         st.error(msg)
@@ -343,14 +421,13 @@ def run_query(question, model_key, response_style, web_search_on, deanifried_on,
             else:
                 web_notice = f"Web search is off — Docker not available ({reason})."
 
-    vectorstore = get_vectorstore(vector_db_path)
-    retriever = vectorstore.as_retriever(
-        search_type=retrieval.get("search_type", "mmr"),
-        search_kwargs={
-            "k": retrieval.get("k", 8),
-            "fetch_k": retrieval.get("fetch_k", 24),
-        },
-    )
+    retriever = get_retriever(config, current_builds)
+    if date_since or date_until:
+        try:
+            retriever = with_date_range(retriever, date_since, date_until)
+        except ValueError as e:
+            st.error(str(e))
+            return
 
     llm, model_meta = build_llm(model_key, model_catalog, providers)
     if llm is None:
@@ -393,14 +470,40 @@ Question: {question}
 
 Answer:"""
 
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
     prompt = ChatPromptTemplate.from_template(template)
 
-    source_docs = retriever.invoke(question)
+    embeddings = get_embeddings(config)
+    cache_before = dict(embeddings.stats)
+    source_docs, semantic_match = retrieve_with_semantic_cache(
+        get_semantic_cache(config), retrieval_scope(config, current_builds, date_since, date_until),
+        embeddings, retriever, question, reuse=use_cached_answers,
+    )
+    reuse_matched_answer = bool(semantic_match) and coerce_bool(semantic_cache_settings(config).get("reuse_answer"))
+    cache_note = embeddings.summary(cache_before) if embeddings.cache is not None else ""
     doc_context = format_docs(source_docs)
 
-    def run_answer(context):
+    answer_cache = get_answer_cache(config)
+    cache_hits = []
+
+    def run_answer(context, web_results=None):
+        # Same key as explore.py: question, model, template, retrieved chunks, index builds
+        fingerprint = context_fingerprint(source_docs, web_results)
+        key = answer_cache_key(question, model_meta, template, fingerprint, current_builds)
+        fallback_key = None
+        if reuse_matched_answer:
+            fallback_key = answer_cache_key(semantic_match["question"], model_meta, template, fingerprint, current_builds)
         chain = prompt | llm | StrOutputParser()
-        return chain.invoke({"context": context, "question": question})
+        answer, hit = cached_llm_answer(
+            answer_cache, key, question, model_meta["model"],
+            lambda: chain.invoke({"context": context, "question": question}),
+            reuse=use_cached_answers, fallback_key=fallback_key,
+        )
+        if hit:
+            cache_hits.append(hit)
+        return answer
 
     with st.spinner("Searching the corpus..."):
         answer = run_answer(doc_context)
@@ -414,7 +517,7 @@ Answer:"""
                     web_context = format_web_results(web_results)
                     combined = doc_context + "\n\nWeb results:\n" + web_context
                     with st.spinner("Incorporating web results..."):
-                        answer = run_answer(combined)
+                        answer = run_answer(combined, web_results)
 
     deanifried_text = ""
     if deanifried_on:
@@ -479,11 +582,13 @@ Answer:"""
         for doc in source_docs:
             if count >= max_sources:
                 break
-            m = doc.metadata
+            m = episode_metadata(doc, episode_catalog)
             guest = m.get("guest", "Unknown")
+            if m.get("corpus_label"):
+                guest = f"{guest} ({m['corpus_label']})"
             title = m.get("title", "Untitled")
             date = m.get("publish_date", "")
-            url = m.get("youtube_url", "")
+            url = timestamp_url(m.get("youtube_url", ""), m.get("start_ts"))
             eid = f"{guest}_{title}"
             if eid in seen:
                 continue
@@ -511,6 +616,13 @@ Answer:"""
         st.info(web_notice)
 
     st.caption(f"Answer generated by {model_meta['label']}")
+    if semantic_match:
+        st.caption(f"♻️ {describe_semantic_match(semantic_match, question)}")
+    if cache_hits:
+        matched = semantic_match["question"] if cache_hits[-1]["fallback"] else None
+        st.caption(f"💾 {describe_cache_hit(cache_hits[-1], matched)}. Untick “Reuse cached answers” to ask again.")
+    if cache_note:
+        st.caption(f"🗃️ {cache_note[0].upper()}{cache_note[1:]} · since the app started: {embeddings.summary()}")
 
     # ── Export ────────────────────────────────────────────────────────────────
 
@@ -542,4 +654,5 @@ if ask_clicked:
     if not question.strip():
         st.warning("Type a question first.")
     else:
-        run_query(question.strip(), selected_model_key, response_style, web_search_on, deanifried_on, deanifried_platform)
+        run_query(question.strip(), selected_model_key, response_style, web_search_on, deanifried_on, deanifried_platform,
+                  use_cached_answers)
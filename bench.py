@@ -0,0 +1,1097 @@
+#!/usr/bin/env python3
+"""
+LennySan RAG-o-Matic - Benchmarks
+
+Times the index build on synthetic corpora so changes to index_corpus.py can be
+compared between commits. Transcripts are generated in the real
+episodes/<slug>/transcript.md format (YAML frontmatter + `Speaker (hh:mm:ss):`
+turns), and embedding uses a deterministic hashing stand-in by default, so the
+suite runs offline and fast enough for CI.
+
+Usage:
+    python bench.py index                          # 100, 1k and 10k episodes
+    python bench.py index --sizes 100              # quick CI run
+    python bench.py index --embedder model         # real sentence-transformers model
+    python bench.py index --compare logs/bench_index_OLD.json
+    python bench.py vectors                        # float16/int8/PCA storage vs float32 on the corpus
+    python bench.py vectors --embedder hash --synthetic 1000
+    python bench.py hnsw --queries eval/queries.txt  # tune Chroma's HNSW settings, save to CONFIGS.yaml
+    python bench.py hnsw --embedder hash --synthetic 300 --dry-run
+    python bench.py startup                        # explore.py --help / --list-models start-up time
+    python bench.py startup --compare logs/bench_startup_OLD.json
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import random
+import shutil
+import argparse
+import platform
+import subprocess
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import yaml
+
+import index_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+GENERATOR_VERSION = 1  # bump when synthetic_transcript output changes
+DEFAULT_SIZES = "100,1000,10000"
+DEFAULT_VECTOR_SETTINGS = "float32,float16,int8,float16/pca128,int8/pca128,int8/pca64"
+HASH_DIM = 384  # same width as all-MiniLM-L6-v2, so store sizes are realistic
+
+HOST = "Lenny"
+FIRST_NAMES = ["Alex", "Priya", "Sam", "Maya", "Jordan", "Elena", "Chris", "Nadia", "Tom", "Aisha",
+               "Ben", "Grace", "Omar", "Julia", "Raj", "Hannah", "Leo", "Sofia", "Marcus", "Ivy"]
+LAST_NAMES = ["Chen", "Patel", "Garcia", "Kim", "Nguyen", "Okafor", "Schmidt", "Rossi", "Silva", "Cohen",
+              "Tanaka", "Moreau", "Novak", "Haddad", "Larsen", "Reyes", "Walsh", "Singh", "Berg", "Costa"]
+COMPANIES = ["Stripe", "Figma", "Airbnb", "Notion", "Duolingo", "Shopify", "Canva", "Linear", "Miro", "Ramp"]
+KEYWORDS = ["product-market fit", "growth", "retention", "activation", "onboarding", "pricing", "hiring",
+            "leadership", "strategy", "metrics", "roadmap", "experimentation", "user research", "b2b",
+            "marketplaces", "ai", "design", "culture", "fundraising", "career"]
+WORDS = (
+    "product team users growth metric retention customers roadmap experiment launch feedback pricing "
+    "market strategy leadership hiring design engineering data insight problem solution feature churn "
+    "activation onboarding funnel conversion revenue startup founder manager company quarter goal "
+    "priority decision tradeoff signal learning iteration velocity quality trust culture process "
+    "interview story example framework principle habit writing meeting narrative vision mission"
+).split()
+
+
+# ── Synthetic corpus ────────────────────────────────────────────────────────
+
+def hhmmss(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def synthetic_sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 24))
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+
+def synthetic_transcript(index: int, turns: int, seed: int = 0) -> tuple[str, str]:
+    """(slug, transcript.md text) for one synthetic episode; same index + seed, same text."""
+    rng = random.Random(seed * 1_000_003 + index)
+    guest = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    company = rng.choice(COMPANIES)
+    slug = f"synthetic-{index:05d}-{guest.lower().replace(' ', '-')}"
+    title = f"{synthetic_sentence(rng)[:-1]} | {guest} ({company})"
+    video_id = "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-", k=11))
+    published = date(2020, 1, 1) + timedelta(days=index % 2000)
+
+    lines = []
+    seconds = 0
+    for turn in range(turns):
+        speaker = HOST if turn % 2 == 0 else guest
+        lines.append(f"{speaker} ({hhmmss(seconds)}):")
+        # Real turns average ~550 characters with a long tail
+        sentences = max(1, int(rng.expovariate(1 / 4)))
+        lines.append(" ".join(synthetic_sentence(rng) for _ in range(sentences)))
+        lines.append("")
+        seconds += rng.randint(10, 40)
+
+    frontmatter = {
+        "guest": guest,
+        "title": title,
+        "youtube_url": f"https://www.youtube.com/watch?v={video_id}",
+        "video_id": video_id,
+        "publish_date": published,
+        "description": synthetic_sentence(rng),
+        "duration_seconds": float(seconds),
+        "duration": hhmmss(seconds),
+        "view_count": rng.randint(1_000, 500_000),
+        "channel": "Lenny's Podcast",
+        "keywords": rng.sample(KEYWORDS, 6),
+    }
+    text = (
+        "---\n"
+        + yaml.safe_dump(frontmatter, sort_keys=False, allow_unicode=True)
+        + "---\n\n"
+        + f"# {title}\n\n## Transcript\n\n"
+        + "\n".join(lines)
+    )
+    return slug, text
+
+
+def generate_corpus(root: str, episodes: int, turns: int, seed: int = 0) -> str:
+    """
+    Write `episodes` synthetic transcripts under root/episodes-<n>/.
+
+    A marker file records the parameters, so an existing corpus is reused
+    instead of regenerated on the next run.
+    """
+    corpus_dir = os.path.join(root, f"episodes-{episodes}")
+    marker = os.path.join(corpus_dir, ".synthetic.json")
+    params = {"episodes": episodes, "turns": turns, "seed": seed, "generator": GENERATOR_VERSION}
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if json.load(f) == params:
+                return corpus_dir
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    for index in range(episodes):
+        slug, text = synthetic_transcript(index, turns, seed)
+        os.makedirs(os.path.join(corpus_dir, slug), exist_ok=True)
+        with open(os.path.join(corpus_dir, slug, "transcript.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    return corpus_dir
+
+
+# ── Deterministic stand-in embedder ─────────────────────────────────────────
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings:
+    """
+    Offline, deterministic stand-in for the sentence-transformers model.
+
+    Feature hashing of lowercased words into `dim` buckets (signed, then
+    L2-normalized). Texts that share words get similar vectors, which is
+    enough to exercise MMR, dedup and the stores realistically.
+    """
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in TOKEN_RE.findall(text.lower())),
+            dtype=np.uint32,
+        )
+        if len(hashes):
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vector, (hashes % self.dim).astype(np.intp), signs)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def make_embedder(kind: str, dim: int = HASH_DIM, threads: int = 0):
+    if kind == "model":
+        return index_corpus.build_embeddings(index_corpus.EMBEDDING_MODEL, threads)
+    return HashingEmbeddings(dim)
+
+
+# ── Index build benchmark ───────────────────────────────────────────────────
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def disk_usage(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+    return total
+
+
+def bench_index_config(config: Dict[str, Any], backend: str) -> Dict[str, Any]:
+    """index_corpus.resolve_index_config() with the backend bench.py was asked for."""
+    config = dict(config)
+    config["retrieval"] = {**(config.get("retrieval", {}) or {}), "backend": backend}
+    return index_corpus.resolve_index_config(config)
+
+
+def run_index_build(corpus_dir: str, out_dir: str, config: Dict[str, Any], backend: str,
+                    embedder: str, batch_size: int, load_workers: int) -> Dict[str, Any]:
+    """
+    One timed build of corpus_dir into out_dir, stage by stage, with the
+    same boilerplate stripping, shard routing and vector settings as
+    index_corpus.py.
+
+    Runs in its own process (see benchmark_index) so peak RSS belongs to
+    this corpus size alone.
+    """
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    index_cfg = config.get("index", {}) or {}
+    resolved = bench_index_config(config, backend)
+    dedup = resolved["dedup"]
+    files = index_corpus.find_transcript_files(corpus_dir)
+    store_path = os.path.join(out_dir, index_corpus.STORE_DIRNAMES[backend])
+    dedup_path = os.path.join(out_dir, index_corpus.DEDUP_FILENAME)
+
+    started = time.perf_counter()
+    embeddings = make_embedder(embedder, threads=int(index_cfg.get("threads_per_worker", 0)))
+    stats = index_corpus.new_pipeline_stats()
+    # Learning the shingles (and the audit pass) happens before the pipeline, as in a full rebuild
+    learn = index_corpus.StageStats("learn", "episode")
+    stripper = None
+    words_removed = 0
+    if resolved["boilerplate"] is not None:
+        learn_started = time.perf_counter()
+        stripper = index_corpus.BoilerplateStripper.learn(files, resolved["boilerplate"])
+        boilerplate_report = index_corpus.empty_boilerplate_report(stripper)
+        index_corpus.audit_boilerplate(boilerplate_report, stripper, [str(path) for path in files], [])
+        learn.add(len(files), time.perf_counter() - learn_started)
+        words_removed = boilerplate_report["words_removed"]
+    catalog = index_corpus.empty_episode_catalog()
+    if resolved["shards"] == "none":
+        collection = index_corpus.open_vector_store(
+            backend, store_path, reset=True, storage=resolved["vectors"], hnsw=resolved["hnsw"],
+        )
+    else:
+        collection = index_corpus.ShardedVectorStore(
+            backend,
+            store_path,
+            resolved["shards"],
+            lambda slug: index_corpus.shard_for_date(
+                catalog["episodes"].get(slug, {}).get("publish_date"), resolved["shards"]
+            ),
+            reset=True,
+            storage=resolved["vectors"],
+            hnsw=resolved["hnsw"],
+        )
+    if resolved["bm25"]:
+        bm25_path = os.path.join(out_dir, index_corpus.BM25_FILENAME)
+        collection = index_corpus.LexicalMirror(collection, index_corpus.Bm25Index(bm25_path, reset=True))
+    episode_chunks = index_corpus.iter_split_episodes(
+        files, resolved["chunking"], workers=load_workers, stats=stats, verbose=False, stripper=stripper,
+    )
+    episode_chunks = index_corpus.iter_normalized(episode_chunks, catalog)
+    dedup_index = None
+    if dedup is not None:
+        dedup_index = index_corpus.NearDuplicateIndex(dedup_path, dedup, reset=True)
+        dedup_index.load()
+        episode_chunks = index_corpus.iter_deduplicated(episode_chunks, dedup_index, stats=stats["dedup"])
+    written = index_corpus.run_index_pipeline(
+        episode_chunks, collection, embeddings, batch_size=batch_size, stats=stats, verbose=False
+    )
+    if dedup_index is not None:
+        dedup_index.close()
+    index_corpus.close_vector_store(collection)
+    wall = time.perf_counter() - started
+
+    return {
+        "episodes": len(files),
+        "chunks": stats["split"].items,
+        "written": written,
+        "aliased": dedup_index.aliased if dedup_index is not None else 0,
+        "boilerplate_words_removed": words_removed,
+        "wall_seconds": round(wall, 3),
+        "chunks_per_second": round(written / wall, 1) if wall > 0 else 0.0,
+        "stages": {
+            name: {
+                "unit": stage.unit,
+                "items": stage.items,
+                "seconds": round(stage.seconds, 3),
+                "rate": round(stage.rate, 1),
+            }
+            for name, stage in {"learn": learn, **stats}.items()
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "corpus_bytes": disk_usage(corpus_dir),
+        "index_bytes": disk_usage(out_dir),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def benchmark_index(args, config: Dict[str, Any]) -> Dict[str, Any]:
+    backend = args.backend or index_corpus.vector_backend(config)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "version": REPORT_VERSION,
+        "benchmark": "index",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            # What index_corpus.py would record in the manifest for these settings
+            **bench_index_config(config, backend)["settings"],
+            "embedder": args.embedder,
+            "dim": HASH_DIM if args.embedder == "hash" else None,
+            "backend": backend,
+            "batch_size": args.batch_size,
+            "load_workers": args.load_workers,
+            "turns_per_episode": args.turns,
+            "seed": args.seed,
+            "generator": GENERATOR_VERSION,
+        },
+        "runs": [],
+    }
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        print(f"🧪 {size:,} episodes: generating corpus...", flush=True)
+        corpus_dir = generate_corpus(args.workdir, size, args.turns, args.seed)
+        print(f"⏱️  {size:,} episodes: building index ({backend}, {args.embedder} embedder)...", flush=True)
+        # A fresh process per size keeps peak RSS honest
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            run = executor.submit(
+                run_index_build,
+                corpus_dir,
+                os.path.join(args.workdir, f"index-{size}"),
+                config,
+                backend,
+                args.embedder,
+                args.batch_size,
+                args.load_workers,
+            ).result()
+        report["runs"].append(run)
+        print(f"   {run['written']:,} chunks in {run['wall_seconds']:.1f}s "
+              f"({run['chunks_per_second']:,.1f} chunks/sec), peak RSS {run['peak_rss_mb']} MB, "
+              f"index {run['index_bytes'] / 1e6:,.1f} MB")
+        for name, stage in run["stages"].items():
+            print(f"     {name:<7} {stage['items']:>9,} {stage['unit']}s in {stage['seconds']:8.2f}s "
+                  f"({stage['rate']:,.1f}/sec)")
+        if run["boilerplate_words_removed"]:
+            print(f"     ✂️  {run['boilerplate_words_removed']:,} words of recurring boilerplate stripped before splitting")
+    return report
+
+
+# ── Vector storage benchmark ────────────────────────────────────────────────
+
+def parse_vector_setting(text: str) -> Dict[str, Any]:
+    """'int8/pca128' -> {"dtype": "int8", "pca_dim": 128}"""
+    dtype, _, pca = text.strip().partition("/")
+    if pca and not re.fullmatch(r"pca\d+", pca):
+        raise ValueError(f"Expected a setting like float16 or int8/pca128, got '{text}'")
+    return index_corpus.vector_storage_settings({"vectors": {"dtype": dtype, "pca_dim": int(pca[3:] or 0)}})
+
+
+def open_bench_embedder(index_cfg: Dict[str, Any], embedder: str):
+    """(embeddings, cache or None); the real model goes through the embedding cache."""
+    embeddings = make_embedder(embedder, threads=int(index_cfg.get("threads_per_worker", 0)))
+    cache = None
+    cache_cfg = index_cfg.get("embedding_cache", {}) or {}
+    if embedder == "model" and cache_cfg.get("enabled", True):
+        # Re-runs against the same corpus then cost seconds, not an embedding pass
+        cache = index_corpus.EmbeddingCache(
+            cache_cfg.get("path", "data/embedding_cache.sqlite"),
+            model_name=index_corpus.EMBEDDING_MODEL,
+            dtype=cache_cfg.get("dtype", "float16"),
+            max_entries=cache_cfg.get("max_entries", 200000),
+        )
+        embeddings = index_corpus.CachedEmbeddings(embeddings, cache)
+    return embeddings, cache
+
+
+def embed_corpus_chunks(corpus_dir: str, index_cfg: Dict[str, Any], embeddings,
+                        batch_size: int, max_chunks: int) -> tuple[List[str], np.ndarray, List[str], List[Dict]]:
+    """(ids, float32 vectors, texts, metadatas) for the first max_chunks chunks of a corpus."""
+    files = index_corpus.find_transcript_files(corpus_dir)
+    chunking = index_corpus.chunking_settings(index_cfg)
+    catalog = index_corpus.empty_episode_catalog()
+    chunks = []
+    episode_chunks = index_corpus.iter_normalized(
+        index_corpus.iter_split_episodes(files, chunking, verbose=False), catalog,
+    )
+    for _, episode in episode_chunks:
+        chunks.extend(episode)
+        if len(chunks) >= max_chunks:
+            break
+    chunks = chunks[:max_chunks]
+    vectors = []
+    for start in range(0, len(chunks), batch_size):
+        vectors.extend(embeddings.embed_documents([chunk.page_content for _, chunk in chunks[start:start + batch_size]]))
+    return (
+        [chunk_id for chunk_id, _ in chunks],
+        np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1),
+        [chunk.page_content for _, chunk in chunks],
+        [index_corpus.chroma_metadata(chunk.metadata) for _, chunk in chunks],
+    )
+
+
+def store_vector_bytes(store_path: str) -> tuple[int, int]:
+    """(bytes of vector files on disk, bytes a full scan reads) for a numpy store."""
+    with open(os.path.join(store_path, "index.json"), "r", encoding="utf-8") as f:
+        descriptor = json.load(f)
+    storage = descriptor.get("storage") or {}
+    names = [descriptor["vectors"], storage.get("quant"), storage.get("search"), storage.get("master")]
+    total = sum(os.path.getsize(os.path.join(store_path, name)) for name in names if name)
+    scanned = os.path.getsize(os.path.join(store_path, storage.get("search") or descriptor["vectors"]))
+    return total, scanned
+
+
+def benchmark_vectors(args, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build one numpy store per storage setting from the same chunk vectors and
+    compare each with exact float32 search: vector bytes on disk and per
+    full scan, query latency, and overlap of the top-k rows.
+
+    Queries are stored chunks themselves (the chunk's own row is left out of
+    its results), so no query set or API key is needed.
+    """
+    # Imported here so `bench.py index` never pays for the query-side stack
+    import explore
+
+    index_cfg = config.get("index", {}) or {}
+    settings = [parse_vector_setting(text) for text in args.settings.split(",") if text.strip()]
+    baseline = index_corpus.vector_storage_settings({})
+    if baseline not in settings:
+        settings.insert(0, baseline)
+    if args.synthetic:
+        corpus_dir = generate_corpus(args.workdir, args.synthetic, args.turns, args.seed)
+    else:
+        corpus_dir = index_corpus.corpus_configs(config.get("paths", {}))[0]["path"]
+
+    print(f"🧠 Embedding up to {args.max_chunks:,} chunks of {corpus_dir} ({args.embedder} embedder)...", flush=True)
+    embeddings, cache = open_bench_embedder(index_cfg, args.embedder)
+    try:
+        ids, vectors, texts, metadatas = embed_corpus_chunks(
+            corpus_dir, index_cfg, embeddings, args.batch_size, args.max_chunks,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    if len(ids) < 2:
+        raise ValueError(f"Need at least 2 chunks to benchmark, found {len(ids)} in {corpus_dir}")
+    # Stores keep rows sorted by chunk ID; query rows are picked in that order
+    order = np.argsort(ids)
+    unit = vectors[order] / np.maximum(np.linalg.norm(vectors[order], axis=1, keepdims=True), 1e-12)
+    rng = np.random.RandomState(args.seed)
+    query_rows = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    k = min(args.k, len(ids) - 1)
+
+    report = {
+        "version": REPORT_VERSION,
+        "benchmark": "vectors",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "corpus": corpus_dir,
+            "embedder": args.embedder,
+            "chunks": len(ids),
+            "dim": int(vectors.shape[1]),
+            "queries": len(query_rows),
+            "k": k,
+            "rescore_factor": args.rescore_factor,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+    exact_results = None
+    for storage in settings:
+        name = storage["dtype"] + (f"/pca{storage['pca_dim']}" if storage["pca_dim"] else "")
+        store_path = os.path.join(args.workdir, "vectors", name.replace("/", "-"))
+        shutil.rmtree(store_path, ignore_errors=True)
+        store = index_corpus.NumpyVectorStore(store_path, reset=True, storage=storage)
+        store.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+        store.close()
+        total_bytes, scan_bytes = store_vector_bytes(store_path)
+
+        searcher = explore.NumpyVectorIndex(store_path, rescore_factor=args.rescore_factor)
+        results, latencies = [], []
+        for row in query_rows:
+            started = time.perf_counter()
+            found = searcher.top_k(unit[row], k + 1)
+            latencies.append(time.perf_counter() - started)
+            results.append([hit for hit in found if hit != row][:k])
+        if exact_results is None:
+            exact_results = results
+        overlaps = [len(set(got) & set(want)) / k for got, want in zip(results, exact_results)]
+        run = {
+            "storage": name,
+            "vector_bytes": total_bytes,
+            "scan_bytes": scan_bytes,
+            "mean_ms": round(float(np.mean(latencies)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+            "overlap_at_k": round(float(np.mean(overlaps)), 4),
+            "min_overlap_at_k": round(float(np.min(overlaps)), 4),
+        }
+        report["runs"].append(run)
+
+    base = report["runs"][0]
+    print()
+    print(f"📦 {len(ids):,} chunks × {vectors.shape[1]} dims, {len(query_rows)} queries, top-{k} "
+          f"(rescore {args.rescore_factor}× with PCA)")
+    print(f"   {'storage':<14} {'vectors MB':>10} {'scanned MB':>10} {'mean ms':>8} {'p95 ms':>8} "
+          f"{'overlap@k':>9} {'worst':>6}")
+    for run in report["runs"]:
+        print(f"   {run['storage']:<14} {run['vector_bytes'] / 1e6:>10.2f} {run['scan_bytes'] / 1e6:>10.2f} "
+              f"{run['mean_ms']:>8.2f} {run['p95_ms']:>8.2f} {run['overlap_at_k']:>9.3f} {run['min_overlap_at_k']:>6.2f}"
+              + ("" if run is base else f"   ({run['vector_bytes'] / base['vector_bytes']:.0%} of float32 on disk)"))
+    return report
+
+
+# ── HNSW tuning (chroma backend) ────────────────────────────────────────────
+
+DEFAULT_HNSW_M = "8,16,32"
+DEFAULT_HNSW_CONSTRUCTION_EF = "64,100,200"
+DEFAULT_HNSW_SEARCH_EF = "16,32,64,100,200"
+
+
+def parse_int_list(text: str, name: str) -> List[int]:
+    try:
+        values = sorted({int(part) for part in text.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError(f"{name} must be comma-separated integers, got '{text}'")
+    if not values or values[0] < 2:
+        raise ValueError(f"{name} values must be at least 2, got '{text}'")
+    return values
+
+
+def load_query_set(path: str) -> List[str]:
+    """
+    Questions from a saved query set: one per line (blank lines and # comments
+    skipped), or JSON Lines with a "query" or "question" field.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                line = str(record.get("query") or record.get("question") or "").strip()
+            if line:
+                queries.append(line)
+    if not queries:
+        raise ValueError(f"No queries found in {path}")
+    return queries
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force top-k rows by squared L2 distance (Chroma's default space), nearest first."""
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), 256):
+        block = queries[start:start + 256]
+        distances = norms[None, :] - 2.0 * (block @ vectors.T)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+        found[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+    return found
+
+
+def pick_hnsw_profile(runs: List[Dict[str, Any]], target_recall: float) -> tuple[Dict[str, Any], bool]:
+    """
+    (run, met_target): the lowest-p95 run whose recall@k reaches the target,
+    ties broken by build time and disk size; the best-recall run otherwise.
+    """
+    passing = [run for run in runs if run["recall_at_k"] >= target_recall]
+    if passing:
+        return min(passing, key=lambda run: (run["p95_ms"], run["build_seconds"], run["disk_bytes"])), True
+    return max(runs, key=lambda run: (run["recall_at_k"], -run["p95_ms"])), False
+
+
+def write_hnsw_profile(config_path: str, profile: Dict[str, int], note: str):
+    """
+    Set retrieval.hnsw in CONFIGS.yaml to `profile`, editing the lines in place
+    so the file's other settings and comments survive. `note` becomes the
+    comment line above the block.
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    try:
+        retrieval = lines.index("retrieval:")
+    except ValueError:
+        raise ValueError(f"No top-level 'retrieval:' section in {config_path}")
+    end = next(
+        (i for i in range(retrieval + 1, len(lines)) if lines[i] and not lines[i].startswith((" ", "#"))),
+        len(lines),
+    )
+    while end > retrieval + 1 and not lines[end - 1].strip():
+        end -= 1  # keep the blank line before the next section
+    block = [f"  # {note}", "  hnsw:"] + [f"    {key}: {value}" for key, value in profile.items()]
+
+    start = next((i for i in range(retrieval + 1, end) if lines[i].startswith("  hnsw:")), None)
+    if start is None:
+        lines[end:end] = block
+    else:
+        stop = start + 1
+        while stop < end and (lines[stop].startswith("    ") or not lines[stop].strip()):
+            stop += 1
+        kept = {}
+        for line in lines[start + 1:stop]:
+            # Keep the trailing comment of each key the profile rewrites
+            match = re.match(r"    (\w+):[^#]*(#.*)?$", line)
+            if match and match.group(2):
+                kept[match.group(1)] = match.group(2)
+        block[2:] = [
+            f"    {key}: {value}" + (f"{' ' * max(1, 19 - len(key) - len(str(value)))}{kept[key]}" if key in kept else "")
+            for key, value in profile.items()
+        ]
+        if start > retrieval + 1 and lines[start - 1].startswith("  # tuned by bench.py hnsw"):
+            start -= 1
+        lines[start:stop] = block
+    tmp_path = f"{config_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, config_path)
+
+
+def benchmark_hnsw(args, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Grid-search Chroma's HNSW parameters on a corpus and write the winner to
+    retrieval.hnsw in CONFIGS.yaml.
+
+    One collection is built per (M, construction_ef) pair; each is queried at
+    every search_ef (a collection setting that needs no rebuild). Every run
+    is scored by recall@k against exact brute-force search over the same
+    vectors, plus p50/p95 query latency, build time and size on disk.
+    """
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+
+    index_cfg = config.get("index", {}) or {}
+    m_values = parse_int_list(args.m, "--m")
+    construction_values = parse_int_list(args.construction_ef, "--construction-ef")
+    search_values = parse_int_list(args.search_ef, "--search-ef")
+    if args.synthetic:
+        corpus_dir = generate_corpus(args.workdir, args.synthetic, args.turns, args.seed)
+    else:
+        corpus_dir = index_corpus.corpus_configs(config.get("paths", {}))[0]["path"]
+
+    print(f"🧠 Embedding up to {args.max_chunks:,} chunks of {corpus_dir} ({args.embedder} embedder)...", flush=True)
+    embeddings, cache = open_bench_embedder(index_cfg, args.embedder)
+    try:
+        ids, vectors, _, _ = embed_corpus_chunks(corpus_dir, index_cfg, embeddings, args.batch_size, args.max_chunks)
+        if len(ids) < 2:
+            raise ValueError(f"Need at least 2 chunks to tune, found {len(ids)} in {corpus_dir}")
+        if args.queries:
+            questions = load_query_set(args.queries)
+            queries = np.asarray([embeddings.embed_query(text) for text in questions], dtype=np.float32)
+            self_rows = None
+        else:
+            # No saved query set: stored chunks stand in, and each one's own row is left out
+            self_rows = np.random.RandomState(args.seed).choice(
+                len(ids), size=min(args.sample_queries, len(ids)), replace=False,
+            )
+            queries = vectors[self_rows]
+    finally:
+        if cache is not None:
+            cache.close()
+
+    k = min(args.k, len(ids) - (1 if self_rows is not None else 0))
+    fetch = k + (1 if self_rows is not None else 0)
+    exact = exact_neighbors(vectors, queries, fetch)
+    if self_rows is not None:
+        exact = [[row for row in found if row != own][:k] for found, own in zip(exact, self_rows)]
+    exact_sets = [{ids[row] for row in found[:k]} for found in exact]
+    query_lists = queries.tolist()
+    own_ids = [ids[row] for row in self_rows] if self_rows is not None else [None] * len(queries)
+
+    report = {
+        "version": REPORT_VERSION,
+        "benchmark": "hnsw",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "corpus": corpus_dir,
+            "embedder": args.embedder,
+            "chunks": len(ids),
+            "dim": int(vectors.shape[1]),
+            "query_set": args.queries or f"{len(queries)} sampled chunks",
+            "queries": len(queries),
+            "k": k,
+            "target_recall": args.target_recall,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+    for m in m_values:
+        for construction_ef in construction_values:
+            store_path = os.path.join(args.workdir, "hnsw", f"M{m}-ef{construction_ef}")
+            shutil.rmtree(store_path, ignore_errors=True)
+            client = chromadb.PersistentClient(path=store_path)
+            started = time.perf_counter()
+            collection = client.create_collection(
+                index_corpus.COLLECTION_NAME,
+                configuration={"hnsw": {
+                    "max_neighbors": m, "ef_construction": construction_ef, "ef_search": search_values[0],
+                }},
+            )
+            step = max(1, min(args.batch_size * 16, client.get_max_batch_size()))
+            for start in range(0, len(ids), step):
+                collection.upsert(ids=ids[start:start + step], embeddings=vectors[start:start + step])
+            build_seconds = time.perf_counter() - started
+            disk_bytes = disk_usage(store_path)
+
+            for search_ef in search_values:
+                if search_ef != search_values[0]:
+                    # Chroma reads ef_search when it loads a collection, so reopen it
+                    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+                    del collection, client
+                    SharedSystemClient.clear_system_cache()
+                    client = chromadb.PersistentClient(path=store_path)
+                    collection = client.get_collection(index_corpus.COLLECTION_NAME)
+                collection.query(query_embeddings=query_lists[:1], n_results=fetch, include=[])  # warm up
+                latencies, recalls = [], []
+                for query, own, want in zip(query_lists, own_ids, exact_sets):
+                    started = time.perf_counter()
+                    found = collection.query(query_embeddings=[query], n_results=fetch, include=[])["ids"][0]
+                    latencies.append(time.perf_counter() - started)
+                    got = [chunk_id for chunk_id in found if chunk_id != own][:k]
+                    recalls.append(len(want.intersection(got)) / k)
+                run = {
+                    "M": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    "recall_at_k": round(float(np.mean(recalls)), 4),
+                    "min_recall_at_k": round(float(np.min(recalls)), 4),
+                    "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+                    "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+                    "build_seconds": round(build_seconds, 2),
+                    "disk_bytes": disk_bytes,
+                }
+                report["runs"].append(run)
+                print(f"   M={m:<3} construction_ef={construction_ef:<4} search_ef={search_ef:<4} "
+                      f"recall@{k} {run['recall_at_k']:.3f}  p50 {run['p50_ms']:.2f} ms  p95 {run['p95_ms']:.2f} ms  "
+                      f"build {build_seconds:.1f}s  {disk_bytes / 1e6:.1f} MB", flush=True)
+            del collection, client
+            SharedSystemClient.clear_system_cache()
+            if not args.keep_stores:
+                shutil.rmtree(store_path, ignore_errors=True)
+
+    chosen, met_target = pick_hnsw_profile(report["runs"], args.target_recall)
+    profile = {key: chosen[key] for key in index_corpus.HNSW_DEFAULTS}
+    report["chosen"] = {**chosen, "met_target": met_target}
+    print()
+    print(f"📦 {len(ids):,} chunks × {vectors.shape[1]} dims, {len(queries)} queries, recall@{k} vs exact search")
+    if met_target:
+        print(f"🏁 Fastest profile with recall@{k} ≥ {args.target_recall}: "
+              f"M={profile['M']}, construction_ef={profile['construction_ef']}, search_ef={profile['search_ef']} "
+              f"(recall {chosen['recall_at_k']:.3f}, p95 {chosen['p95_ms']:.2f} ms)")
+    else:
+        print(f"⚠️  No profile reached recall@{k} {args.target_recall}; using the most accurate one: "
+              f"M={profile['M']}, construction_ef={profile['construction_ef']}, search_ef={profile['search_ef']} "
+              f"(recall {chosen['recall_at_k']:.3f}). Try larger --search-ef / --m values.")
+
+    if args.dry_run:
+        print("   --dry-run: CONFIGS.yaml not changed")
+        return report
+    current = index_corpus.hnsw_settings(config)
+    note = (f"tuned by bench.py hnsw on {datetime.now().date().isoformat()}: recall@{k} {chosen['recall_at_k']:.3f}, "
+            f"p95 {chosen['p95_ms']:.2f} ms over {len(ids):,} chunks")
+    write_hnsw_profile(args.config, profile, note)
+    report["written_to"] = args.config
+    print(f"📝 Wrote retrieval.hnsw to {args.config}")
+    if index_corpus.hnsw_build_settings(current) != index_corpus.hnsw_build_settings(profile):
+        print("   M / construction_ef changed: the next python index_corpus.py run rebuilds the Chroma index")
+    elif current["search_ef"] != profile["search_ef"]:
+        print("   Only search_ef changed: it applies on the next query, no rebuild needed")
+    if index_corpus.vector_backend(config) != "chroma":
+        print("   Note: retrieval.backend is not chroma, so these settings take effect only after switching to it")
+    return report
+
+
+# ── Startup benchmark ───────────────────────────────────────────────────────
+
+# Metadata-only commands: none of them should need the model, a store or an LLM
+STARTUP_COMMANDS = {
+    "import explore": ["-c", "import explore"],
+    "explore --help": ["explore.py", "--help"],
+    "explore --list-models": ["explore.py", "--list-models"],
+    "explore bad --since": ["explore.py", "--since", "not-a-date", "question"],
+}
+# Packages a metadata-only command must not import (each costs 0.3s to several seconds)
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "langchain_community",
+                 "langchain_anthropic", "anthropic", "langchain_openai", "openai", "chromadb")
+# Imported by every explore.py command on purpose: the retriever classes subclass
+# langchain_core's BaseRetriever (a pydantic model), which is also what lets
+# app.py and LangChain chains use them (langsmith comes with langchain_core).
+# This is the startup floor; it is reported per command rather than flagged.
+STARTUP_FLOOR_MODULES = ("numpy", "pydantic", "pydantic_core", "langchain_core", "langsmith")
+
+
+def benchmark_startup(args, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wall time of metadata-only explore.py commands in fresh processes, plus
+    one run of each under python -X importtime to record what it imported.
+    Any HEAVY_MODULES import is reported as a regression; the time spent in
+    STARTUP_FLOOR_MODULES is reported as the floor every command pays.
+    """
+    # Imported here so `bench.py index` never pays for the query-side stack
+    import explore
+
+    repo = os.path.dirname(os.path.abspath(__file__))
+    report = {
+        "version": REPORT_VERSION,
+        "benchmark": "startup",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"repeats": args.repeats},
+        "runs": [],
+    }
+    print(f"⏱️  Timing {len(STARTUP_COMMANDS)} startup paths, best of {args.repeats} fresh processes each...")
+    for name, argv in STARTUP_COMMANDS.items():
+        seconds = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *argv], cwd=repo, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            seconds.append(time.perf_counter() - started)
+        profiled = subprocess.run(
+            [sys.executable, "-X", "importtime", *argv],
+            cwd=repo, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        modules, _ = explore.parse_import_times(profiled.stderr)
+        packages = explore.import_time_by_package(modules)
+        run = {
+            "command": name,
+            "argv": argv,
+            "min_ms": round(min(seconds) * 1000, 1),
+            "median_ms": round(float(np.median(seconds)) * 1000, 1),
+            "import_ms": round(sum(entry["self_ms"] for entry in modules), 1),
+            "floor_ms": round(sum(ms for package, ms in packages.items() if package in STARTUP_FLOOR_MODULES), 1),
+            "modules": len(modules),
+            "top_packages": {package: round(ms, 1) for package, ms in list(packages.items())[:5]},
+            "heavy_imports": sorted(set(packages) & set(HEAVY_MODULES)),
+        }
+        report["runs"].append(run)
+
+    print()
+    print(f"   {'command':<24} {'min ms':>8} {'median ms':>10} {'imports ms':>10} {'floor ms':>9} {'modules':>8}  "
+          f"slowest packages")
+    for run in report["runs"]:
+        slowest = ", ".join(f"{package} {ms:.0f}" for package, ms in list(run["top_packages"].items())[:3])
+        print(f"   {run['command']:<24} {run['min_ms']:>8.0f} {run['median_ms']:>10.0f} {run['import_ms']:>10.0f} "
+              f"{run['floor_ms']:>9.0f} {run['modules']:>8,}  {slowest}")
+        if run["heavy_imports"]:
+            print(f"   ⚠️  {run['command']} imports {', '.join(run['heavy_imports'])}; defer it to the code that needs it")
+    print("   floor ms: numpy, pydantic and langchain_core, which explore.py imports for its retriever classes")
+    return report
+
+
+def print_startup_comparison(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """Per-command change against an earlier startup report; True if any got more than max_regression % slower."""
+    before = {run["command"]: run for run in baseline.get("runs", [])}
+    regressed = False
+    print()
+    print(f"📊 Compared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('created_at', '?')}):")
+    for run in report["runs"]:
+        old = before.get(run["command"])
+        if old is None:
+            print(f"   {run['command']}: no baseline run")
+            continue
+        change = (run["min_ms"] / old["min_ms"] - 1) * 100 if old["min_ms"] else 0.0
+        flag = ""
+        if change > max_regression:
+            regressed = True
+            flag = f"  ⚠️  over the {max_regression:g}% limit"
+        print(f"   {run['command']:<24} {old['min_ms']:>8.0f} → {run['min_ms']:>8.0f} ms  {change:+.1f}%{flag}")
+    return regressed
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Per-size, per-stage rate change against an earlier report."""
+    before = {run["episodes"]: run for run in baseline.get("runs", [])}
+    print()
+    print(f"📊 Compared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('created_at', '?')}):")
+    for run in report["runs"]:
+        old = before.get(run["episodes"])
+        if old is None:
+            print(f"   {run['episodes']:,} episodes: no baseline run")
+            continue
+        print(f"   {run['episodes']:,} episodes:")
+        rows = [("overall", old["chunks_per_second"], run["chunks_per_second"])]
+        rows += [
+            (name, old["stages"].get(name, {}).get("rate", 0.0), stage["rate"])
+            for name, stage in run["stages"].items()
+        ]
+        for name, old_rate, new_rate in rows:
+            change = f"{(new_rate / old_rate - 1) * 100:+.1f}%" if old_rate else "n/a"
+            print(f"     {name:<7} {old_rate:>10,.1f} → {new_rate:>10,.1f}/sec  {change}")
+        for key, label in (("peak_rss_mb", "peak RSS MB"), ("index_bytes", "index bytes")):
+            if old.get(key) is not None and run.get(key) is not None:
+                print(f"     {label:<12} {old[key]:>10,} → {run[key]:>10,}")
+
+
+def write_report(report: Dict[str, Any], output: Optional[str], logs_dir: str) -> str:
+    if not output:
+        os.makedirs(logs_dir, exist_ok=True)
+        output = os.path.join(logs_dir, f"bench_{report['benchmark']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return output
+
+
+def main():
+    config = index_corpus.load_config()
+    index_cfg = config.get("index", {}) or {}
+
+    parser = argparse.ArgumentParser(description="Benchmark LennySan RAG-o-Matic")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Time the index build on synthetic corpora")
+    index_parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                              help=f"Comma-separated corpus sizes in episodes (default: {DEFAULT_SIZES})")
+    index_parser.add_argument("--turns", type=int, default=150,
+                              help="Speaker turns per synthetic episode (default: 150, like the real corpus)")
+    index_parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed (default: 0)")
+    index_parser.add_argument("--embedder", choices=["hash", "model"], default="hash",
+                              help="hash = deterministic offline stand-in (default); model = sentence-transformers")
+    index_parser.add_argument("--backend", choices=list(index_corpus.BACKENDS), default=None,
+                              help="Vector store to build (default: retrieval.backend from CONFIGS.yaml)")
+    index_parser.add_argument("--batch-size", type=int, default=int(index_cfg.get("batch_size", 256)),
+                              help="Chunks per embed + write batch (default from CONFIGS.yaml)")
+    index_parser.add_argument("--load-workers", type=int, default=int(index_cfg.get("load_workers", 1)),
+                              help="Processes for loading + splitting (default from CONFIGS.yaml)")
+    index_parser.add_argument("--workdir", default="data/bench",
+                              help="Where synthetic corpora and indexes go (default: data/bench)")
+    index_parser.add_argument("--output", default=None,
+                              help="Report path (default: logs/bench_index_<timestamp>.json)")
+    index_parser.add_argument("--compare", default=None, metavar="REPORT",
+                              help="Print rate changes against an earlier JSON report")
+
+    vectors_parser = subparsers.add_parser(
+        "vectors", help="Compare float16/int8/PCA vector storage with float32 (size, latency, top-k overlap)",
+    )
+    vectors_parser.add_argument("--settings", default=DEFAULT_VECTOR_SETTINGS,
+                                help=f"Comma-separated dtype[/pcaN] settings (default: {DEFAULT_VECTOR_SETTINGS})")
+    vectors_parser.add_argument("--embedder", choices=["hash", "model"], default="model",
+                                help="model = sentence-transformers (default, uses the embedding cache); hash = offline")
+    vectors_parser.add_argument("--synthetic", type=int, default=0, metavar="EPISODES",
+                                help="Use a synthetic corpus of this many episodes instead of the first configured corpus")
+    vectors_parser.add_argument("--turns", type=int, default=150,
+                                help="Speaker turns per synthetic episode (default: 150)")
+    vectors_parser.add_argument("--max-chunks", type=int, default=20000,
+                                help="Chunks to embed and index (default: 20000)")
+    vectors_parser.add_argument("--queries", type=int, default=200, help="Query sample size (default: 200)")
+    vectors_parser.add_argument("-k", type=int, default=10, help="Top-k compared with float32 (default: 10)")
+    vectors_parser.add_argument("--rescore-factor", type=int,
+                                default=int((config.get("retrieval", {}) or {}).get("rescore_factor", 4)),
+                                help="PCA candidates rescored per result (default from CONFIGS.yaml)")
+    vectors_parser.add_argument("--seed", type=int, default=0, help="Query sample / corpus seed (default: 0)")
+    vectors_parser.add_argument("--batch-size", type=int, default=int(index_cfg.get("batch_size", 256)),
+                                help="Chunks per embedding batch (default from CONFIGS.yaml)")
+    vectors_parser.add_argument("--workdir", default="data/bench",
+                                help="Where the benchmark stores go (default: data/bench)")
+    vectors_parser.add_argument("--output", default=None,
+                                help="Report path (default: logs/bench_vectors_<timestamp>.json)")
+
+    retrieval_cfg = config.get("retrieval", {}) or {}
+    hnsw_parser = subparsers.add_parser(
+        "hnsw", help="Tune Chroma's HNSW parameters (recall@k vs exact search, latency) and save the best to CONFIGS.yaml",
+    )
+    hnsw_parser.add_argument("--queries", default=None, metavar="FILE",
+                             help="Saved query set: one question per line, or JSON Lines with a \"query\" field "
+                                  "(default: sample stored chunks)")
+    hnsw_parser.add_argument("--sample-queries", type=int, default=200,
+                             help="Chunks sampled as queries when there is no --queries file (default: 200)")
+    hnsw_parser.add_argument("--m", default=DEFAULT_HNSW_M,
+                             help=f"Comma-separated M values (graph links per node; default: {DEFAULT_HNSW_M})")
+    hnsw_parser.add_argument("--construction-ef", default=DEFAULT_HNSW_CONSTRUCTION_EF,
+                             help=f"Comma-separated construction_ef values (default: {DEFAULT_HNSW_CONSTRUCTION_EF})")
+    hnsw_parser.add_argument("--search-ef", default=DEFAULT_HNSW_SEARCH_EF,
+                             help=f"Comma-separated search_ef values (default: {DEFAULT_HNSW_SEARCH_EF})")
+    hnsw_parser.add_argument("-k", type=int, default=int(retrieval_cfg.get("fetch_k", 24)),
+                             help="Recall is measured on the top k (default: retrieval.fetch_k, the pool MMR picks from)")
+    hnsw_parser.add_argument("--target-recall", type=float, default=0.95,
+                             help="Pick the fastest profile with at least this recall@k (default: 0.95)")
+    hnsw_parser.add_argument("--embedder", choices=["hash", "model"], default="model",
+                             help="model = sentence-transformers (default, uses the embedding cache); hash = offline")
+    hnsw_parser.add_argument("--synthetic", type=int, default=0, metavar="EPISODES",
+                             help="Use a synthetic corpus of this many episodes instead of the first configured corpus")
+    hnsw_parser.add_argument("--turns", type=int, default=150,
+                             help="Speaker turns per synthetic episode (default: 150)")
+    hnsw_parser.add_argument("--max-chunks", type=int, default=50000,
+                             help="Chunks to embed and index (default: 50000)")
+    hnsw_parser.add_argument("--seed", type=int, default=0, help="Query sample / corpus seed (default: 0)")
+    hnsw_parser.add_argument("--batch-size", type=int, default=int(index_cfg.get("batch_size", 256)),
+                             help="Chunks per embedding batch (default from CONFIGS.yaml)")
+    hnsw_parser.add_argument("--workdir", default="data/bench",
+                             help="Where the candidate indexes go (default: data/bench)")
+    hnsw_parser.add_argument("--keep-stores", action="store_true",
+                             help="Keep the candidate indexes instead of deleting each after it is measured")
+    hnsw_parser.add_argument("--config", default="CONFIGS.yaml",
+                             help="Config file the chosen profile is written to (default: CONFIGS.yaml)")
+    hnsw_parser.add_argument("--dry-run", action="store_true",
+                             help="Report the chosen profile without writing it")
+    hnsw_parser.add_argument("--output", default=None,
+                             help="Report path (default: logs/bench_hnsw_<timestamp>.json)")
+
+    startup_parser = subparsers.add_parser(
+        "startup", help="Time metadata-only explore.py commands and check they skip heavy imports",
+    )
+    startup_parser.add_argument("--repeats", type=int, default=5,
+                                help="Fresh processes per command; the fastest counts (default: 5)")
+    startup_parser.add_argument("--output", default=None,
+                                help="Report path (default: logs/bench_startup_<timestamp>.json)")
+    startup_parser.add_argument("--compare", default=None, metavar="REPORT",
+                                help="Print changes against an earlier startup report")
+    startup_parser.add_argument("--max-regression", type=float, default=20.0, metavar="PCT",
+                                help="With --compare, exit 1 if a command got more than PCT%% slower (default: 20)")
+
+    args = parser.parse_args()
+    logs_dir = config.get("paths", {}).get("logs", "logs")
+
+    try:
+        if args.command == "index":
+            report = benchmark_index(args, config)
+        elif args.command == "vectors":
+            report = benchmark_vectors(args, config)
+        elif args.command == "hnsw":
+            report = benchmark_hnsw(args, config)
+        else:
+            report = benchmark_startup(args, config)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    output = write_report(report, args.output, logs_dir)
+    print()
+    print(f"📝 Report: {output}")
+    if args.command == "startup":
+        regressed = False
+        if args.compare:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                regressed = print_startup_comparison(report, json.load(f), args.max_regression)
+        # A heavy import on a metadata-only path is a regression even without a baseline
+        if regressed or any(run["heavy_imports"] for run in report["runs"]):
+            return 1
+        return 0
+    if getattr(args, "compare", None):
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
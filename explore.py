@@ -4,6 +4,9 @@ LennySan RAG-o-Matic v0.85
 Simple CLI for querying Lenny's podcast corpus with metadata attribution
 """
 
+# Python 3.9: keeps `X | None` annotations unevaluated
+from __future__ import annotations
+
 import sys
 import os
 import warnings
@@ -16,7 +19,26 @@ import urllib.parse
 import shutil
 import subprocess
 import re
+import hashlib
+import sqlite3
+import threading
+import signal
+import socket
+import time
+from collections import OrderedDict
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
 import yaml
+import numpy as np
+from index_format import (
+    BM25_STOPWORDS,
+    BM25_TOKEN_RE,
+    STORE_DIRNAMES,
+    bm25_tokens,
+    corpus_configs,
+    read_build_pointer,
+)
 
 # Suppress LangChain deprecation warnings for v0.6
 warnings.filterwarnings('ignore', category=DeprecationWarning)
@@ -27,12 +49,10 @@ try:
 except Exception:
     pass
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+# The embedding model, provider SDKs and prompt stack are imported where they
+# are used, so --help, --list-models and runs answered by --serve don't load them
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 
 DEFAULT_CONFIG = {
     "version": "0.85",
@@ -80,11 +100,36 @@ DEFAULT_CONFIG = {
     },
     "paths": {
         "vector_db": "data/chroma_db",
+        "numpy_index": "data/numpy_index",
+        "indexes": "data/indexes",
+        "corpora": [
+            {"name": "lenny", "path": "episodes"},
+        ],
     },
     "retrieval": {
+        "backend": "chroma",
         "search_type": "mmr",
         "k": 8,
         "fetch_k": 24,
+        "episodes": {
+            "enabled": True,
+            "shortlist": 12,
+        },
+        "corpus_quotas": {},
+        "rescore_factor": 4,
+        "hnsw": {
+            "M": 16,
+            "construction_ef": 100,
+            "search_ef": 100,
+        },
+        "hybrid": {
+            "enabled": True,
+            "vector_weight": 1.0,
+            "bm25_weight": 1.0,
+            "rrf_k": 60,
+            "k1": 1.2,
+            "b": 0.75,
+        },
     },
     "output": {
         "max_sources": 3,
@@ -96,6 +141,31 @@ DEFAULT_CONFIG = {
             }
         },
     },
+    "serve": {
+        "socket": "data/explore.sock",
+    },
+    "cache": {
+        "query_embeddings": {
+            "enabled": True,
+            "path": "data/query_cache.sqlite",
+            "memory_entries": 1024,
+            "max_entries": 50000,
+        },
+        "answers": {
+            "enabled": True,
+            "path": "data/query_cache.sqlite",
+            "ttl_hours": 168,
+            "max_entries": 5000,
+        },
+        "semantic": {
+            "enabled": False,
+            "path": "data/query_cache.sqlite",
+            "threshold": 0.9,
+            "reuse_answer": False,
+            "ttl_hours": 168,
+            "max_entries": 2000,
+        },
+    },
     "features": {
         "web_search": True,
     },
@@ -487,6 +557,9 @@ Web findings (if any):
 {web}
 
 Dean-i-fried response:"""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
     prompt = ChatPromptTemplate.from_template(template)
     chain = prompt | llm | StrOutputParser()
     return chain.invoke(
@@ -554,26 +627,739 @@ def build_llm(model_key: str, model_catalog: dict, providers: dict):
         print("  source ~/.bashrc  (or source ~/.zshrc)")
         return None, None
 
+    # Only the selected provider's SDK gets imported
     if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
         return ChatAnthropic(model=model_name, temperature=0), meta
 
     if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(model=model_name, temperature=0), meta
 
     print(f"❌ Error: Unsupported provider: {provider}")
     return None, None
 
-def format_sources(docs, max_sources: int = 3):
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_embeddings():
+    """The query-side embedding model (the one index_corpus.py embedded with); loads torch."""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+# ── Query embedding cache ───────────────────────────────────────────────────
+
+QUERY_CACHE_DEFAULTS = {
+    "enabled": True,
+    "path": "data/query_cache.sqlite",
+    "memory_entries": 1024,
+    "max_entries": 50000,
+}
+# Disk evictions run every this many new entries (and on close)
+QUERY_CACHE_EVICT_EVERY = 64
+
+
+def normalize_query(text: str) -> str:
+    """Whitespace-insensitive form of a question, so re-typed repeats share a cache key."""
+    return " ".join(str(text).split())
+
+
+def query_hash(text: str) -> str:
+    return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """
+    Query embeddings in two tiers: an in-process LRU of memory_entries and a
+    SQLite table keyed by (model name, hash of the normalized query). Rows
+    from any other model are dropped when the cache is opened, so changing
+    EMBEDDING_MODEL starts it over. Each row remembers how long its
+    embedding took, which is what a later hit saves.
+    """
+
+    def __init__(self, path: str | None, model_name: str, memory_entries: int = 1024, max_entries: int = 50000):
+        self.path = path or None
+        self.model_name = model_name
+        self.memory_entries = max(0, int(memory_entries))
+        self.max_entries = max(0, int(max_entries))
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.added = 0
+        self.dropped = 0
+        self.conn = None
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Streamlit and the retrievers' thread pools share one cache
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " model TEXT NOT NULL,"
+                " query_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " embed_ms REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, query_hash))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)")
+            self.dropped = self.conn.execute("DELETE FROM query_embeddings WHERE model != ?", (self.model_name,)).rowcount
+            self.conn.commit()
+
+    def get(self, key: str) -> tuple[list[float], str, float] | None:
+        """(vector, tier, embed_ms) for a cached query hash, or None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                vector, embed_ms = self.memory[key]
+                tier = "memory"
+            elif self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT vector, embed_ms FROM query_embeddings WHERE model = ? AND query_hash = ?",
+                    (self.model_name, key),
+                ).fetchone()
+                if row is None:
+                    return None
+                vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+                embed_ms = row[1]
+                self.remember(key, vector, embed_ms)
+                tier = "disk"
+            else:
+                return None
+            if self.conn is not None:
+                self.conn.execute(
+                    "UPDATE query_embeddings SET hits = hits + 1, last_used = ? WHERE model = ? AND query_hash = ?",
+                    (time.time(), self.model_name, key),
+                )
+                self.conn.commit()
+            return vector, tier, embed_ms
+
+    def put(self, key: str, vector: list[float], embed_ms: float):
+        with self.lock:
+            self.remember(key, vector, embed_ms)
+            if self.conn is None:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query_hash, vector, embed_ms, hits, last_used) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                (self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes(), embed_ms, time.time()),
+            )
+            self.conn.commit()
+            self.added += 1
+            if self.added % QUERY_CACHE_EVICT_EVERY == 0:
+                self.evict()
+
+    def remember(self, key: str, vector: list[float], embed_ms: float):
+        if not self.memory_entries:
+            return
+        self.memory[key] = (vector, embed_ms)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def evict(self) -> int:
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM query_embeddings WHERE rowid IN "
+            "(SELECT rowid FROM query_embeddings ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self.conn.commit()
+        return excess
+
+    def lifetime(self) -> tuple[int, int, float]:
+        """(cached queries, hits, seconds saved) over the whole on-disk cache for this model."""
+        if self.conn is None:
+            return 0, 0, 0.0
+        with self.lock:
+            entries, hits, saved_ms = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(hits * embed_ms), 0) "
+                "FROM query_embeddings WHERE model = ?",
+                (self.model_name,),
+            ).fetchone()
+        return entries, hits, saved_ms / 1000
+
+    def close(self):
+        if self.conn is not None:
+            with self.lock:
+                self.evict()
+                self.conn.close()
+                self.conn = None
+
+
+class CachedQueryEmbeddings:
+    """
+    The embeddings object the retrievers use. embed_query answers repeats
+    from a QueryEmbeddingCache; the model itself is only loaded (and only
+    called) on a miss, so a cached question never imports torch.
+    """
+
+    def __init__(self, load, cache: QueryEmbeddingCache | None):
+        self.load = load
+        self.cache = cache
+        self._model = None
+        self.model_lock = threading.Lock()
+        self.miss_lock = threading.Lock()
+        self.stats = {"lookups": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+                      "saved_seconds": 0.0, "embed_seconds": 0.0, "load_seconds": 0.0}
+
+    def model(self):
+        with self.model_lock:
+            if self._model is None:
+                started = time.perf_counter()
+                self._model = self.load()
+                self.stats["load_seconds"] += time.perf_counter() - started
+            return self._model
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.cache is None:
+            return self.model().embed_query(text)
+        key = query_hash(text)
+        self.stats["lookups"] += 1
+        started = time.perf_counter()
+        found = self.cache.get(key)
+        if found is None:
+            # Corpus retrievers embed the same question in parallel: the first
+            # one computes it, the others wait here and then hit the cache
+            with self.miss_lock:
+                found = self.cache.get(key)
+                if found is None:
+                    model = self.model()
+                    embed_started = time.perf_counter()
+                    vector = model.embed_query(text)
+                    embed_seconds = time.perf_counter() - embed_started
+                    self.cache.put(key, vector, embed_seconds * 1000)
+                    self.stats["misses"] += 1
+                    self.stats["embed_seconds"] += embed_seconds
+                    return vector
+        vector, tier, embed_ms = found
+        self.stats[f"{tier}_hits"] += 1
+        self.stats["saved_seconds"] += max(0.0, embed_ms / 1000 - (time.perf_counter() - started))
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.model().embed_documents(texts)
+
+    def summary(self, since: dict | None = None) -> str:
+        """One line for verbose output: this question (stats changed since `since`) or the session so far."""
+        stats = {key: value - (since or {}).get(key, 0) for key, value in self.stats.items()}
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        if since is not None and stats["lookups"]:
+            if not stats["misses"]:
+                tier = "disk" if stats["disk_hits"] else "memory"
+                unloaded = "; embedding model not loaded" if self._model is None else ""
+                return f"query embedding from the {tier} cache, ~{stats['saved_seconds'] * 1000:.0f} ms saved{unloaded}"
+            loaded = f" + {stats['load_seconds']:.1f}s loading the model" if stats["load_seconds"] else ""
+            return f"query embedded in {stats['embed_seconds'] * 1000:.0f} ms{loaded}, cached for next time"
+        rate = hits / stats["lookups"] * 100 if stats["lookups"] else 0.0
+        return (f"{hits:,}/{stats['lookups']:,} query embeddings cached ({rate:.0f}% hit rate), "
+                f"~{stats['saved_seconds']:.2f}s saved")
+
+
+def query_cache_settings(config: dict) -> dict:
+    settings = dict(QUERY_CACHE_DEFAULTS)
+    settings.update((config.get("cache", {}) or {}).get("query_embeddings", {}) or {})
+    return settings
+
+
+def load_query_embeddings(config: dict) -> CachedQueryEmbeddings:
+    """
+    The query-side embeddings for explore.py and app.py: EMBEDDING_MODEL
+    behind the two-tier query cache (cache.query_embeddings).
+    """
+    settings = query_cache_settings(config)
+    cache = None
+    if coerce_bool(settings.get("enabled"), True):
+        cache = QueryEmbeddingCache(
+            settings.get("path"),
+            model_name=EMBEDDING_MODEL,
+            memory_entries=settings.get("memory_entries", 1024),
+            max_entries=settings.get("max_entries", 50000),
+        )
+    return CachedQueryEmbeddings(load_embeddings, cache)
+
+
+# ── Answer cache ────────────────────────────────────────────────────────────
+
+ANSWER_CACHE_DEFAULTS = {
+    "enabled": True,
+    "path": "data/query_cache.sqlite",
+    "ttl_hours": 168,
+    "max_entries": 5000,
+}
+
+
+def context_fingerprint(docs: list, web_results: list | None = None) -> str:
+    """Hash of the chunk IDs (in context order) and web result links an answer is generated from."""
+    chunk_ids = [doc.id or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest() for doc in docs]
+    links = [item.get("link", "") for item in web_results or []]
+    return hashlib.sha256(json.dumps([chunk_ids, links]).encode("utf-8")).hexdigest()
+
+
+def answer_cache_key(question: str, model_meta: dict, template: str, fingerprint: str, indexes: list[dict]) -> str:
+    """
+    Cache key for one LLM answer: the normalized question, the model, the
+    prompt template (which carries output.response_format), the retrieved
+    context and the build of every index searched, so a new build of any
+    of them misses.
+    """
+    builds = sorted(f"{index['corpus']}:{index['build_id']}" for index in indexes)
+    parts = [
+        normalize_query(question),
+        model_meta["provider"],
+        model_meta["model"],
+        hashlib.sha256(template.encode("utf-8")).hexdigest(),
+        fingerprint,
+        builds,
+    ]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    LLM answers in SQLite, keyed by answer_cache_key. Entries older than
+    ttl_hours are ignored and removed; beyond max_entries the least recently
+    used go first. Each row keeps how long the LLM took, which is what a
+    hit saves.
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 168, max_entries: int = 5000):
+        self.path = path
+        self.ttl_seconds = max(0.0, float(ttl_hours)) * 3600
+        self.max_entries = max(0, int(max_entries))
+        self.lock = threading.Lock()
+        self.added = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " cache_key TEXT PRIMARY KEY,"
+            " question TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " llm_seconds REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self.conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        """{answer, created_at, llm_seconds} for a fresh entry, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT answer, created_at, llm_seconds FROM answers WHERE cache_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE answers SET hits = hits + 1, last_used = ? WHERE cache_key = ?", (time.time(), key),
+            )
+            self.conn.commit()
+        return {"answer": row[0], "created_at": row[1], "llm_seconds": row[2]}
+
+    def put(self, key: str, question: str, model: str, answer: str, llm_seconds: float):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(cache_key, question, model, answer, llm_seconds, hits, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                (key, normalize_query(question), model, answer, llm_seconds, now, now),
+            )
+            self.conn.commit()
+            self.added += 1
+            if self.added % QUERY_CACHE_EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self) -> int:
+        removed = self.conn.execute(
+            "DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,),
+        ).rowcount
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM answers WHERE rowid IN (SELECT rowid FROM answers ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            removed += excess
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.conn.close()
+
+
+def load_answer_cache(config: dict) -> AnswerCache | None:
+    """The answer cache from cache.answers, or None when it's disabled."""
+    settings = dict(ANSWER_CACHE_DEFAULTS)
+    settings.update((config.get("cache", {}) or {}).get("answers", {}) or {})
+    if not coerce_bool(settings.get("enabled"), True):
+        return None
+    return AnswerCache(
+        settings.get("path") or ANSWER_CACHE_DEFAULTS["path"],
+        ttl_hours=settings.get("ttl_hours", 168),
+        max_entries=settings.get("max_entries", 5000),
+    )
+
+
+def cached_llm_answer(cache: AnswerCache | None, key: str, question: str, model: str, generate,
+                      reuse: bool = True, fallback_key: str | None = None) -> tuple[str, dict | None]:
+    """
+    (answer, cache hit or None). fallback_key (the key of a semantically
+    matched earlier question) is tried after key; such hits are marked
+    "fallback". On a miss, or with reuse off (--no-cache), generate() is
+    called and its answer is stored under key.
+    """
+    if cache is not None and reuse:
+        for lookup in dict.fromkeys(filter(None, (key, fallback_key))):
+            hit = cache.get(lookup)
+            if hit is not None:
+                return hit["answer"], {**hit, "fallback": lookup != key}
+    started = time.perf_counter()
+    answer = generate()
+    if cache is not None and answer:
+        cache.put(key, question, model, answer, time.perf_counter() - started)
+    return answer, None
+
+
+def describe_cache_hit(hit: dict, question: str | None = None) -> str:
+    age = max(0.0, time.time() - hit["created_at"])
+    if age < 60:
+        ago = f"{age:.0f}s"
+    elif age < 3600:
+        ago = f"{age / 60:.0f} min"
+    elif age < 86400:
+        ago = f"{age / 3600:.1f} h"
+    else:
+        ago = f"{age / 86400:.1f} days"
+    answer_to = f" to \"{question}\"" if question else ""
+    return f"Cached answer{answer_to} from {ago} ago (~{hit['llm_seconds']:.1f}s of LLM time saved)"
+
+
+# ── Semantic query cache ────────────────────────────────────────────────────
+
+SEMANTIC_CACHE_DEFAULTS = {
+    "enabled": False,
+    "path": "data/query_cache.sqlite",
+    "threshold": 0.9,
+    "reuse_answer": False,
+    "ttl_hours": 168,
+    "max_entries": 2000,
+}
+
+
+def retrieval_scope(config: dict, indexes: list[dict], since: str | None = None, until: str | None = None) -> str:
+    """
+    What a question's retrieved chunks depend on besides the question: the
+    builds searched, the date range and the retrieval settings. Semantic
+    matches only reuse results from the same scope.
+    """
+    builds = sorted(f"{index['corpus']}:{index['build_id']}" for index in indexes)
+    parts = [builds, since, until, config.get("retrieval", {})]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SemanticQueryCache:
+    """
+    Past questions with their (normalized) query embeddings and retrieved
+    chunks. match() finds the most similar earlier question in the same
+    retrieval scope; at or above threshold its chunks stand in for a fresh
+    search. Each scope's vectors are held in memory as one matrix and
+    reloaded when another process adds to it.
+    """
+
+    def __init__(self, path: str, model_name: str, threshold: float = 0.9, ttl_hours: float = 168,
+                 max_entries: int = 2000):
+        self.path = path
+        self.model_name = model_name
+        self.threshold = float(threshold)
+        self.ttl_seconds = max(0.0, float(ttl_hours)) * 3600
+        self.max_entries = max(0, int(max_entries))
+        self.lock = threading.Lock()
+        self.scopes: dict[str, tuple] = {}
+        self.added = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_queries ("
+            " model TEXT NOT NULL,"
+            " scope TEXT NOT NULL,"
+            " query_hash TEXT NOT NULL,"
+            " question TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " docs TEXT NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, scope, query_hash))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS semantic_queries_last_used ON semantic_queries (last_used)")
+        # Similarities between different embedding models are meaningless
+        self.conn.execute("DELETE FROM semantic_queries WHERE model != ?", (self.model_name,))
+        self.conn.commit()
+
+    def scope_matrix(self, scope: str) -> tuple[list[int], np.ndarray]:
+        """(rowids, unit vectors) of the live entries in a scope, reloaded only when it changed."""
+        cutoff = time.time() - self.ttl_seconds
+        stamp = self.conn.execute(
+            "SELECT COUNT(*), MAX(rowid), MIN(created_at) FROM semantic_queries "
+            "WHERE model = ? AND scope = ? AND created_at >= ?",
+            (self.model_name, scope, cutoff),
+        ).fetchone()
+        cached = self.scopes.get(scope)
+        if cached is None or cached[0] != stamp:
+            rows = self.conn.execute(
+                "SELECT rowid, vector FROM semantic_queries WHERE model = ? AND scope = ? AND created_at >= ?",
+                (self.model_name, scope, cutoff),
+            ).fetchall()
+            rowids = [row[0] for row in rows]
+            matrix = (np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                      if rows else np.zeros((0, 0), dtype=np.float32))
+            cached = (stamp, rowids, matrix)
+            self.scopes[scope] = cached
+        return cached[1], cached[2]
+
+    def match(self, scope: str, vector) -> dict | None:
+        """{question, docs, similarity} of the closest earlier question at or above threshold, or None."""
+        query = unit_vector(vector)
+        with self.lock:
+            rowids, matrix = self.scope_matrix(scope)
+            if not rowids or matrix.shape[1] != len(query):
+                return None
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                return None
+            question, docs = self.conn.execute(
+                "SELECT question, docs FROM semantic_queries WHERE rowid = ?", (rowids[best],),
+            ).fetchone()
+            self.conn.execute(
+                "UPDATE semantic_queries SET hits = hits + 1, last_used = ? WHERE rowid = ?",
+                (time.time(), rowids[best]),
+            )
+            self.conn.commit()
+        return {
+            "question": question,
+            "similarity": similarity,
+            "docs": [Document(page_content=doc["text"], metadata=doc["metadata"], id=doc["id"])
+                     for doc in json.loads(docs)],
+        }
+
+    def add(self, scope: str, question: str, vector, docs: list):
+        stored = [{"id": doc.id, "text": doc.page_content, "metadata": doc.metadata} for doc in docs]
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO semantic_queries "
+                "(model, scope, query_hash, question, vector, docs, hits, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (self.model_name, scope, query_hash(question), normalize_query(question),
+                 unit_vector(vector).tobytes(), json.dumps(stored, default=str), now, now),
+            )
+            self.conn.commit()
+            self.added += 1
+            if self.added % QUERY_CACHE_EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self) -> int:
+        removed = self.conn.execute(
+            "DELETE FROM semantic_queries WHERE created_at < ?", (time.time() - self.ttl_seconds,),
+        ).rowcount
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM semantic_queries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM semantic_queries WHERE rowid IN "
+                "(SELECT rowid FROM semantic_queries ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            removed += excess
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.conn.close()
+
+
+def unit_vector(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def semantic_cache_settings(config: dict) -> dict:
+    settings = dict(SEMANTIC_CACHE_DEFAULTS)
+    settings.update((config.get("cache", {}) or {}).get("semantic", {}) or {})
+    return settings
+
+
+def load_semantic_cache(config: dict) -> SemanticQueryCache | None:
+    """The semantic query cache from cache.semantic, or None when it's disabled."""
+    settings = semantic_cache_settings(config)
+    if not coerce_bool(settings.get("enabled"), False):
+        return None
+    return SemanticQueryCache(
+        settings.get("path") or SEMANTIC_CACHE_DEFAULTS["path"],
+        model_name=EMBEDDING_MODEL,
+        threshold=settings.get("threshold", 0.9),
+        ttl_hours=settings.get("ttl_hours", 168),
+        max_entries=settings.get("max_entries", 2000),
+    )
+
+
+def retrieve_with_semantic_cache(cache: SemanticQueryCache | None, scope: str, embeddings, retriever,
+                                 question: str, reuse: bool = True) -> tuple[list, dict | None]:
+    """
+    (source docs, semantic match or None). The question is embedded through
+    the query-embedding cache (the retriever's own embed_query then hits it);
+    a close enough earlier question in the same scope supplies the chunks
+    and the search is skipped, unless the new question names something
+    those chunks don't mention. Fresh results are recorded for next time.
+    """
+    if cache is None:
+        return retriever.invoke(question), None
+    vector = embeddings.embed_query(question)
+    match = cache.match(scope, vector) if reuse else None
+    if match is not None and semantic_match_covers(match, question):
+        return match["docs"], match
+    docs = retriever.invoke(question)
+    if docs:
+        cache.add(scope, question, vector, docs)
+    return docs, None
+
+
+def question_key_terms(question: str) -> set[str]:
+    """Names and numbers in a question: capitalized words after the first, and words with digits."""
+    words = BM25_TOKEN_RE.findall(str(question))
+    terms = {word.lower() for position, word in enumerate(words)
+             if any(char.isdigit() for char in word) or (position > 0 and word[0].isupper())}
+    return terms - BM25_STOPWORDS
+
+
+def semantic_match_covers(match: dict, question: str) -> bool:
+    """
+    Whether a matched question's chunks still fit the new question. Embeddings
+    of "pricing at Stripe" and "pricing at Figma" are close, but the chunks
+    retrieved for one say nothing about the other, so every name or number
+    the new question adds must appear in the reused chunks or their metadata.
+    """
+    added = question_key_terms(question) - set(bm25_tokens(match["question"]))
+    if not added:
+        return True
+    found = set()
+    for doc in match["docs"]:
+        found.update(bm25_tokens(doc.page_content))
+        found.update(bm25_tokens(" ".join(str(value) for value in doc.metadata.values())))
+    return added <= found
+
+
+def describe_semantic_match(match: dict, question: str) -> str:
+    if normalize_query(match["question"]) == normalize_query(question):
+        return "Sources reused from the same question asked earlier (search skipped)"
+    return (f"Sources reused from a similar earlier question (similarity {match['similarity']:.2f}, "
+            f"search skipped): \"{match['question']}\"")
+
+
+def timestamp_seconds(ts) -> int:
+    """00:12:34 -> 754; returns 0 for missing or malformed timestamps."""
+    try:
+        seconds = 0
+        for part in str(ts).split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except (TypeError, ValueError):
+        return 0
+
+
+def timestamp_url(url: str, ts=None) -> str:
+    """Deep-link a YouTube URL to the moment a chunk starts (from its start_ts metadata)."""
+    seconds = timestamp_seconds(ts) if ts else 0
+    if not url or seconds <= 0:
+        return url
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}t={seconds}s"
+
+
+EPISODE_CATALOG_FILENAME = "episode_catalog.json"
+
+
+def episode_catalog_path(vector_db_path: str) -> str:
+    """Legacy (unversioned) indexes keep the episode catalog next to the vector DB directory."""
+    parent = os.path.dirname(os.path.normpath(vector_db_path))
+    return os.path.join(parent, EPISODE_CATALOG_FILENAME)
+
+
+def load_corpus_catalog(indexes: list[dict]) -> dict:
+    """
+    The episode catalog for one index, or for several corpora at once keyed
+    "<corpus>/<episode>" (the keys episode_metadata uses for tagged results).
+    """
+    if len(indexes) == 1:
+        return load_episode_catalog(indexes[0]["catalog"]) if indexes[0].get("catalog") else {}
+    merged = {}
+    for index in indexes:
+        if not index.get("catalog"):
+            continue
+        for slug, entry in load_episode_catalog(index["catalog"]).items():
+            merged[f"{index['corpus']}/{slug}"] = {**entry, "corpus_label": index["label"]}
+    return merged
+
+
+def load_episode_catalog(path: str) -> dict:
+    """Episode slug -> frontmatter (guest, title, publish_date, youtube_url, ...)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("episodes", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def episode_metadata(doc, catalog: dict | None = None) -> dict:
+    """
+    Chunk metadata joined with its episode's catalog entry.
+
+    Chunks only carry an episode key plus chunk fields (speaker, start_ts);
+    indexes built before the catalog existed still have everything inline.
+    """
+    metadata = dict(doc.metadata or {})
+    key = metadata.get("episode")
+    if metadata.get("corpus"):
+        # Multi-corpus results are looked up in a catalog keyed "<corpus>/<episode>"
+        key = f"{metadata['corpus']}/{key}"
+    entry = (catalog or {}).get(key)
+    if entry:
+        return {**entry, **metadata}
+    return metadata
+
+
+def format_sources(docs, max_sources: int = 3, catalog: dict | None = None):
     """Format source documents with metadata into readable citations."""
     sources = []
     seen_episodes = set()
     
     for doc in docs:
-        metadata = doc.metadata
+        metadata = episode_metadata(doc, catalog)
         guest = metadata.get('guest', 'Unknown')
         title = metadata.get('title', 'Untitled')
         date = metadata.get('publish_date', 'Unknown date')
         youtube_url = metadata.get('youtube_url', '')
+        start_ts = metadata.get('start_ts')
         
         # Create unique identifier to avoid duplicate citations
         episode_id = f"{guest}_{title}"
@@ -581,8 +1367,12 @@ def format_sources(docs, max_sources: int = 3):
         if episode_id not in seen_episodes:
             seen_episodes.add(episode_id)
             citation = f"• {guest}: \"{title}\" ({date})"
+            if metadata.get("corpus_label"):
+                citation = f"• [{metadata['corpus_label']}] {citation[2:]}"
+            if start_ts:
+                citation += f" @ {start_ts}"
             if youtube_url:
-                citation += f"\n  {youtube_url}"
+                citation += f"\n  {timestamp_url(youtube_url, start_ts)}"
             sources.append(citation)
     
     return "\n".join(sources[:max_sources])
@@ -593,10 +1383,1059 @@ def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 
-def main():
-    config = load_config()
-    model_catalog = build_model_catalog(config)
-    providers = config.get("providers", {})
+# ── Vector store backends ────────────────────────────────────────────────────
+
+def select_corpora(config: dict, selector: str | None = None) -> list[dict]:
+    """None = the primary corpus, 'all', or comma-separated corpus names."""
+    corpora = corpus_configs(config.get("paths", {}))
+    if not selector:
+        return corpora[:1]
+    if selector == "all":
+        return corpora
+    names = [name.strip() for name in selector.split(",") if name.strip()]
+    unknown = [name for name in names if name not in {corpus["name"] for corpus in corpora}]
+    if unknown or not names:
+        known = ", ".join(corpus["name"] for corpus in corpora)
+        raise ValueError(f"Unknown corpus '{', '.join(unknown) or selector}' (configured: {known}, or 'all')")
+    return [corpus for corpus in corpora if corpus["name"] in names]
+
+
+def current_index(config: dict, corpus: dict | None = None) -> dict:
+    """
+    Resolve the index to read from right now.
+
+    index_corpus.py builds each corpus into data/indexes/<corpus>/<build_id>/
+    and atomically rewrites that directory's CURRENT when a build passes
+    validation, so this is re-read per query rather than cached. The primary
+    corpus falls back to a single-corpus build directly under data/indexes/,
+    then to the legacy paths.vector_db layout.
+    """
+    corpus = corpus or corpus_configs(config.get("paths", {}))[0]
+    paths = config.get("paths", {})
+    backend = config.get("retrieval", {}).get("backend", "chroma")
+    indexes_root = paths.get("indexes", "data/indexes")
+    candidates = [os.path.join(indexes_root, corpus["name"])]
+    if corpus["primary"]:
+        candidates.append(indexes_root)
+    for indexes_dir in candidates:
+        build_id = read_build_pointer(indexes_dir)
+        if not build_id:
+            continue
+        build_dir = os.path.join(indexes_dir, build_id)
+        try:
+            with open(os.path.join(build_dir, "index_info.json"), "r", encoding="utf-8") as f:
+                backend = json.load(f).get("backend", backend)
+        except (OSError, ValueError):
+            pass
+        return {
+            "corpus": corpus["name"],
+            "label": corpus["label"],
+            "build_id": build_id,
+            "backend": backend,
+            "store": os.path.join(build_dir, STORE_DIRNAMES.get(backend, backend)),
+            "catalog": os.path.join(build_dir, EPISODE_CATALOG_FILENAME),
+            "bm25": os.path.join(build_dir, "bm25.sqlite"),
+            "centroids": os.path.join(build_dir, "episode_centroids.npz"),
+        }
+    vector_db_path = paths.get("vector_db", "data/chroma_db")
+    store = paths.get("numpy_index", "data/numpy_index") if backend == "numpy" else vector_db_path
+    if not corpus["primary"]:
+        # Only the primary corpus ever had a legacy index; this one is just not built yet
+        return {"corpus": corpus["name"], "label": corpus["label"], "build_id": "none", "backend": backend,
+                "store": None, "catalog": None, "bm25": None, "centroids": None}
+    try:
+        # Legacy indexes are rewritten in place, so their mtime stands in for a build ID
+        stamp = f"legacy-{os.path.getmtime(store):.0f}"
+    except OSError:
+        stamp = "legacy"
+    return {
+        "corpus": corpus["name"],
+        "label": corpus["label"],
+        "build_id": stamp,
+        "backend": backend,
+        "store": store,
+        "catalog": episode_catalog_path(vector_db_path),
+        "bm25": None,
+        "centroids": None,
+    }
+
+
+def index_ready(index: dict) -> bool:
+    return bool(index.get("store")) and os.path.exists(index["store"])
+
+
+def mmr_select(query_vector, candidate_vectors, k: int, lambda_mult: float = 0.5) -> list[int]:
+    """
+    Maximal marginal relevance over unit vectors: pick k candidates that are
+    relevant to the query but not redundant with each other. Returns indices
+    into candidate_vectors in selection order.
+    """
+    if len(candidate_vectors) == 0 or k <= 0:
+        return []
+    relevance = candidate_vectors @ query_vector
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected
+    redundancy = candidate_vectors @ candidate_vectors[selected[0]]
+    while len(selected) < min(k, len(candidate_vectors)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, candidate_vectors @ candidate_vectors[best])
+    return selected
+
+
+# Small enough that each converted block stays in the CPU cache
+SCORE_BLOCK_ROWS = 2048
+
+
+def block_scores(matrix, query_vector, rows=None):
+    """matrix[rows] @ query_vector in float32, converting float16/int8 rows a block at a time."""
+    if matrix.dtype == np.float32:
+        return np.asarray(matrix @ query_vector if rows is None else np.asarray(matrix[rows]) @ query_vector)
+    count = len(matrix) if rows is None else len(rows)
+    scores = np.empty(count, dtype=np.float32)
+    buffer = np.empty((min(count, SCORE_BLOCK_ROWS), matrix.shape[1]), dtype=np.float32)
+    for start in range(0, count, SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS] if rows is None else matrix[rows[start:start + SCORE_BLOCK_ROWS]]
+        converted = buffer[:len(block)]
+        np.copyto(converted, block)
+        scores[start:start + len(block)] = converted @ query_vector
+    return scores
+
+
+class NumpyVectorIndex:
+    """
+    Read side of the `numpy` backend written by index_corpus.py.
+
+    The embedding matrix and the row offsets are memory-mapped, so opening the
+    index costs a few milliseconds and every process on the machine shares the
+    same pages. Only the chunks that are actually returned get parsed.
+
+    Builds stored as float16/int8 (index.vectors.dtype) are scored in float32
+    against the dequantized rows. With a PCA-reduced search matrix
+    (index.vectors.pca_dim), that matrix is scanned first and the best
+    rescore_factor × k rows are rescored against their full-dimension vectors.
+    """
+
+    def __init__(self, path: str, rescore_factor: int = 4):
+        self.path = path
+        self.rescore_factor = max(1, int(rescore_factor))
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as f:
+            self.descriptor = json.load(f)
+        self.rows = int(self.descriptor.get("rows", 0))
+        self.dim = int(self.descriptor.get("dim", 0))
+        storage = self.descriptor.get("storage") or {}
+        self.scale = None
+        self.search = None
+        self.search_scale = None
+        self.components = None
+        if self.rows:
+            self.vectors = np.load(os.path.join(path, self.descriptor["vectors"]), mmap_mode="r")
+            self.offsets = np.load(os.path.join(path, self.descriptor["offsets"]), mmap_mode="r")
+            self._chunks = open(os.path.join(path, self.descriptor["chunks"]), "rb")
+            if storage.get("quant"):
+                with np.load(os.path.join(path, storage["quant"])) as quant:
+                    self.scale = quant["scale"] if "scale" in quant.files else None
+                    self.components = quant["components"] if "components" in quant.files else None
+                    self.search_scale = quant["search_scale"] if "search_scale" in quant.files else None
+            if storage.get("search"):
+                self.search = np.load(os.path.join(path, storage["search"]), mmap_mode="r")
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        # Without a reduced search matrix, rows are scored at full dimension already
+        self.exact = self.search is None
+        # Older indexes have no per-episode row ranges; those always search every row
+        self.episode_rows = self.descriptor.get("episodes")
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def close(self):
+        if self.rows:
+            self._chunks.close()
+
+    def document(self, row: int):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        self._chunks.seek(start)
+        record = json.loads(self._chunks.read(end - start))
+        return Document(page_content=record["text"], metadata=record.get("metadata") or {}, id=record["id"])
+
+    def rows_for(self, episodes: list[str]):
+        """Row numbers holding the given episodes' chunks (None = no ranges, search everything)."""
+        if self.episode_rows is None:
+            return None
+        spans = [self.episode_rows[slug] for slug in episodes if slug in self.episode_rows]
+        if not spans:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in spans])
+
+    def full_vectors(self, rows) -> np.ndarray:
+        """Full-dimension float32 vectors of the given rows (int8 rows scaled back)."""
+        vectors = np.asarray(self.vectors[rows], dtype=np.float32).reshape(len(rows), self.dim)
+        return vectors * self.scale if self.scale is not None else vectors
+
+    def scores(self, query_vector, rows=None) -> np.ndarray:
+        """Similarity of every row (or of `rows`) to the query; approximate for compressed builds."""
+        if self.search is not None:
+            # The reduced matrix holds (vector - mean) @ components.T; the mean term is the same for every row
+            query_vector = self.components @ query_vector
+            if self.search_scale is not None:
+                query_vector = query_vector * self.search_scale
+            return block_scores(self.search, query_vector, rows)
+        if self.scale is not None:
+            query_vector = query_vector * self.scale
+        return block_scores(self.vectors, query_vector, rows)
+
+    def top_k(self, query_vector, k: int, rows=None) -> list[int]:
+        """Row numbers of the k most similar chunks, best first (one mat-vec + argpartition)."""
+        # Only the candidate rows are paged in when rows is given
+        scores = self.scores(query_vector, rows)
+        if rows is None:
+            rows = np.arange(self.rows)
+        if len(rows) == 0 or k <= 0:
+            return []
+        wanted = min(k, len(rows))
+        fetch = wanted if self.exact else min(len(rows), wanted * self.rescore_factor)
+        best = np.argpartition(-scores, fetch - 1)[:fetch]
+        best = best[np.argsort(-scores[best])]
+        if self.exact:
+            return [int(rows[i]) for i in best]
+        # Rescore the approximate candidates against their full-dimension vectors
+        candidates = np.asarray(rows)[best]
+        exact = self.full_vectors(candidates) @ query_vector
+        return [int(candidates[i]) for i in np.argsort(-exact)[:wanted]]
+
+    def candidates(self, query_vector, n: int, episodes: list[str] | None = None):
+        """The n best chunks (optionally only from `episodes`) and their unit vectors."""
+        if query_vector.shape[0] != self.dim:
+            raise ValueError(
+                f"Query embedding has {query_vector.shape[0]} dimensions, index has {self.dim}; "
+                "re-index with the current embedding model"
+            )
+        subset = self.rows_for(episodes) if episodes is not None else None
+        if episodes is not None and subset is None:
+            # No row ranges yet: over-fetch and keep only the requested episodes
+            allowed = set(episodes)
+            rows = [row for row in self.top_k(query_vector, 4 * n) if self.document(row).metadata.get("episode") in allowed][:n]
+        else:
+            rows = self.top_k(query_vector, n, subset)
+        vectors = self.full_vectors(rows)
+        if self.vectors.dtype != np.float32:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1.0)
+        return [self.document(row) for row in rows], vectors
+
+
+class ChromaShard:
+    """Read side of one Chroma store, queried with precomputed query vectors."""
+
+    def __init__(self, path: str):
+        # Imported here so numpy-backend runs never pay for opening Chroma
+        import chromadb
+
+        self.path = path
+        self.collection = chromadb.PersistentClient(path=path).get_or_create_collection("langchain")
+
+    def __len__(self) -> int:
+        return self.collection.count()
+
+    def candidates(self, query_vector, n: int, episodes: list[str] | None = None):
+        if episodes is not None and not episodes:
+            return [], np.zeros((0, len(query_vector)), dtype=np.float32)
+        n = min(n, self.collection.count())
+        if n <= 0:
+            return [], np.zeros((0, len(query_vector)), dtype=np.float32)
+        found = self.collection.query(
+            query_embeddings=[query_vector.tolist()],
+            n_results=n,
+            where={"episode": {"$in": episodes}} if episodes is not None else None,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        docs = [
+            Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+            for chunk_id, text, metadata in zip(found["ids"][0], found["documents"][0], found["metadatas"][0])
+        ]
+        vectors = np.asarray(found["embeddings"][0], dtype=np.float32).reshape(len(docs), len(query_vector))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return docs, vectors / np.where(norms > 0, norms, 1.0)
+
+
+def sync_chroma_search_ef(paths: list[str], search_ef: int):
+    """
+    Store retrieval.hnsw.search_ef on every Chroma shard whose collection has a
+    different one, so tuning it needs no rebuild. Chroma reads ef_search when
+    it loads a collection, so after a change its cached clients are dropped
+    and the shards opened next pick up the new value.
+    """
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+
+    changed = False
+    for path in paths:
+        collection = chromadb.PersistentClient(path=path).get_or_create_collection("langchain")
+        if ((collection.configuration or {}).get("hnsw") or {}).get("ef_search") != search_ef:
+            collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            changed = True
+    if changed:
+        SharedSystemClient.clear_system_cache()
+
+
+def open_shard(backend: str, path: str, rescore_factor: int = 4):
+    if backend == "numpy":
+        return NumpyVectorIndex(path, rescore_factor=rescore_factor)
+    if backend == "chroma":
+        return ChromaShard(path)
+    raise ValueError(f"Unknown retrieval.backend '{backend}' (expected chroma or numpy)")
+
+
+def load_shards(index: dict, rescore_factor: int = 4, search_ef: int | None = None) -> list[dict]:
+    """
+    [{name, start, end, searcher}] for the current build. A time-sharded build
+    (index.shards in CONFIGS.yaml) lists its shards in <store>/shards.json;
+    any other index is a single shard that covers every date.
+    """
+    try:
+        with open(os.path.join(index["store"], "shards.json"), "r", encoding="utf-8") as f:
+            described = json.load(f).get("shards", {})
+    except (OSError, ValueError):
+        shards = [{"name": "all", "start": None, "end": None, "path": index["store"]}]
+    else:
+        shards = [
+            {
+                "name": name,
+                "start": shard.get("start"),
+                "end": shard.get("end"),
+                "path": os.path.join(index["store"], name),
+            }
+            for name, shard in sorted(described.items())
+            if shard.get("chunks", 1)
+        ]
+    if index["backend"] == "chroma" and search_ef:
+        sync_chroma_search_ef([shard["path"] for shard in shards], search_ef)
+    for shard in shards:
+        shard["searcher"] = open_shard(index["backend"], shard.pop("path"), rescore_factor)
+    return shards
+
+
+def date_bound(value: str | None, end: bool = False) -> str | None:
+    """
+    Normalize a --since/--until value (YYYY, YYYY-MM or YYYY-MM-DD) to an
+    inclusive ISO date; the end of a year or month rounds up so it compares
+    correctly against publish dates as strings.
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    if not re.fullmatch(r"\d{4}(-\d{2}(-\d{2})?)?", value):
+        raise ValueError(f"Expected a date like 2024, 2024-06 or 2024-06-30, got '{value}'")
+    if len(value) == 4:
+        value += "-12" if end else "-01"
+    if len(value) == 7:
+        value += "-31" if end else "-01"
+    return value
+
+
+def shard_overlaps(shard: dict, since: str | None, until: str | None) -> bool:
+    if since is None and until is None:
+        return True
+    if shard["start"] is None:
+        # Undated episodes can't match a date range
+        return shard["name"] == "all"
+    return (since is None or shard["end"] >= since) and (until is None or shard["start"] <= until)
+
+
+def episodes_in_range(publish_dates: dict, since: str | None, until: str | None) -> list[str] | None:
+    """Episode slugs published inside [since, until]; None when there is no range."""
+    if since is None and until is None:
+        return None
+    return sorted(
+        slug for slug, published in publish_dates.items()
+        if published and (since is None or published[:10] >= since) and (until is None or published[:10] <= until)
+    )
+
+
+class EpisodeShortlist:
+    """
+    Episode centroids written by index_corpus.py (episode_centroids.npz).
+
+    Retrieval first ranks episodes by centroid similarity, then searches chunks
+    only inside the top few, so the candidate pool spans several episodes
+    instead of filling up with one long one.
+    """
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.episodes = [str(slug) for slug in data["episodes"]]
+            self.vectors = data["vectors"].astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.episodes)
+
+    def top(self, query_vector, n: int, within: list[str] | None = None) -> list[str]:
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        if not self.episodes or n <= 0 or query_vector.shape[0] != self.vectors.shape[1]:
+            return []
+        scores = self.vectors @ query_vector
+        if within is not None:
+            allowed = set(within)
+            scores = np.where([slug in allowed for slug in self.episodes], scores, -np.inf)
+            n = min(n, len(allowed))
+        n = min(n, len(self.episodes))
+        if n <= 0:
+            return []
+        best = np.argpartition(-scores, n - 1)[:n]
+        return [self.episodes[i] for i in best[np.argsort(-scores[best])] if np.isfinite(scores[i])]
+
+
+class VectorRetriever(BaseRetriever):
+    """
+    Vector search over one or more shards of the current build.
+
+    Per question: shards outside the date range are skipped, the episode
+    shortlist (if any) narrows the search to the closest episodes, every
+    remaining shard returns its best candidates in parallel, and MMR picks
+    the final k from the merged pool.
+    """
+
+    shards: list
+    embeddings: object
+    search_type: str = "mmr"
+    search_kwargs: dict = {}
+    # Pydantic evaluates field annotations at runtime, so these use Optional for 3.9
+    shortlist: Optional[EpisodeShortlist] = None
+    shortlist_size: int = 12
+    publish_dates: dict = {}
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    def allowed_episodes(self) -> list[str] | None:
+        return episodes_in_range(self.publish_dates, self.since, self.until)
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = float(np.linalg.norm(query_vector))
+        if norm > 0:
+            query_vector = query_vector / norm
+        k = self.search_kwargs.get("k", 4)
+        pool_size = max(self.search_kwargs.get("fetch_k", 20), k) if self.search_type == "mmr" else k
+
+        episodes = self.allowed_episodes()
+        if self.shortlist:
+            episodes = self.shortlist.top(query_vector, self.shortlist_size, within=episodes) or episodes
+        shards = [shard for shard in self.shards if shard_overlaps(shard, self.since, self.until)]
+        if not shards:
+            return []
+        if len(shards) == 1:
+            found = [shards[0]["searcher"].candidates(query_vector, pool_size, episodes)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(shards), 8)) as pool:
+                found = list(pool.map(lambda shard: shard["searcher"].candidates(query_vector, pool_size, episodes), shards))
+
+        docs = [doc for shard_docs, _ in found for doc in shard_docs]
+        if not docs:
+            return []
+        vectors = np.concatenate([shard_vectors for _, shard_vectors in found if len(shard_vectors)])
+        scores = vectors @ query_vector
+        pool = np.argsort(-scores)[:pool_size]
+        if self.search_type == "mmr":
+            picked = mmr_select(query_vector, vectors[pool], k, self.search_kwargs.get("lambda_mult", 0.5))
+            return [docs[pool[i]] for i in picked]
+        return [docs[i] for i in pool[:k]]
+
+
+# ── Hybrid retrieval (BM25 + vectors) ────────────────────────────────────────
+
+class Bm25Index:
+    """
+    Read side of the bm25.sqlite inverted index written by index_corpus.py.
+
+    Only the postings for the query's terms are read; scoring is one numpy
+    pass over them. The file is opened read-only per search, so a build
+    switch never leaves a stale handle behind.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True)
+
+    def search(self, query: str, k: int, episodes: list[str] | None = None) -> list:
+        terms = sorted(set(bm25_tokens(query)))
+        if not terms or k <= 0 or (episodes is not None and not episodes):
+            return []
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            total = int(meta.get("chunks", 0))
+            avg_length = float(meta.get("avg_length", 0)) or 1.0
+            placeholders = ",".join("?" for _ in terms)
+            sql = (
+                "SELECT p.term, p.chunk, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk "
+                f"WHERE p.term IN ({placeholders})"
+            )
+            params = list(terms)
+            if episodes is not None:
+                # Document frequencies stay corpus-wide; only the candidates are restricted
+                sql += f" AND json_extract(c.metadata, '$.episode') IN ({','.join('?' for _ in episodes)})"
+                params += list(episodes)
+            rows = conn.execute(sql, params).fetchall()
+            if not rows:
+                return []
+            term_ids = {term: i for i, term in enumerate(terms)}
+            term_index = np.fromiter((term_ids[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+            chunk = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            tf = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+            length = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+            df = np.bincount(term_index, minlength=len(terms)).astype(np.float64)
+            idf = np.log(1.0 + (max(total, 1) - df + 0.5) / (df + 0.5))
+            partial = idf[term_index] * tf * (self.k1 + 1) / (
+                tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            )
+            chunk_ids, position = np.unique(chunk, return_inverse=True)
+            scores = np.bincount(position, weights=partial)
+            top = np.argsort(-scores, kind="stable")[:k]
+            best = [int(chunk_ids[i]) for i in top]
+            marks = ",".join("?" for _ in best)
+            found = {
+                row[0]: Document(page_content=row[2], metadata=json.loads(row[3]), id=row[1])
+                for row in conn.execute(f"SELECT id, chunk_id, text, metadata FROM chunks WHERE id IN ({marks})", best)
+            }
+        finally:
+            conn.close()
+        return [found[rowid] for rowid in best if rowid in found]
+
+
+def fusion_key(doc) -> str:
+    # Docs from older code paths may lack chunk IDs, so fall back to episode + text
+    return doc.id or f"{doc.metadata.get('episode', '')}\n{doc.page_content}"
+
+
+def reciprocal_rank_fusion(rankings: list[tuple[list, float]], k: int, rrf_k: int = 60) -> list:
+    """Merge ranked lists with weighted RRF: score = sum(weight / (rrf_k + rank))."""
+    scores: dict = {}
+    docs: dict = {}
+    for ranked, weight in rankings:
+        for rank, doc in enumerate(ranked, start=1):
+            key = fusion_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """Runs the vector retriever and BM25 concurrently and fuses them with weighted RRF."""
+
+    vector: BaseRetriever
+    lexical: Bm25Index
+    k: int = 8
+    vector_weight: float = 1.0
+    bm25_weight: float = 1.0
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        episodes = self.vector.allowed_episodes() if isinstance(self.vector, VectorRetriever) else None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            lexical = pool.submit(self.lexical.search, query, self.k, episodes)
+            vector_docs = self.vector.invoke(query)
+            lexical_docs = lexical.result()
+        return reciprocal_rank_fusion(
+            [(vector_docs, self.vector_weight), (lexical_docs, self.bm25_weight)],
+            k=self.k,
+            rrf_k=self.rrf_k,
+        )
+
+
+class MultiCorpusRetriever(BaseRetriever):
+    """
+    Sends a question to every selected corpus at once and interleaves their
+    results by rank, so latency tracks the slowest corpus rather than the sum.
+    Each corpus retriever is built with k = its quota.
+    """
+
+    retrievers: dict
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        names = list(self.retrievers)
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            found = dict(zip(names, pool.map(lambda name: self.retrievers[name].invoke(query), names)))
+        merged = []
+        for rank in range(max((len(docs) for docs in found.values()), default=0)):
+            for name in names:
+                if rank < len(found[name]):
+                    doc = found[name][rank]
+                    merged.append(Document(page_content=doc.page_content, metadata={**doc.metadata, "corpus": name}, id=doc.id))
+        return merged
+
+
+def close_retriever(retriever):
+    """Close the shard files behind a retriever built by build_corpus_retriever (Chroma shards need nothing)."""
+    if isinstance(retriever, MultiCorpusRetriever):
+        for inner in retriever.retrievers.values():
+            close_retriever(inner)
+    elif isinstance(retriever, HybridRetriever):
+        close_retriever(retriever.vector)
+    elif isinstance(retriever, VectorRetriever):
+        for shard in retriever.shards:
+            if hasattr(shard["searcher"], "close"):
+                shard["searcher"].close()
+
+
+def corpus_quotas(config: dict, names: list[str]) -> dict:
+    """
+    Chunks each corpus contributes per question: retrieval.corpus_quotas when
+    set, otherwise an even split of retrieval.k (rounded up).
+    """
+    retrieval = config.get("retrieval", {})
+    configured = retrieval.get("corpus_quotas", {}) or {}
+    even = -(-int(retrieval.get("k", 8)) // max(len(names), 1))
+    return {name: max(1, int(configured.get(name, even))) for name in names}
+
+
+def build_corpus_retriever(config: dict, embeddings, indexes: list[dict]) -> BaseRetriever:
+    """One corpus: its own retriever. Several: a MultiCorpusRetriever over all of them."""
+    if len(indexes) == 1:
+        return build_retriever(config, embeddings, indexes[0])
+    quotas = corpus_quotas(config, [index["corpus"] for index in indexes])
+    retrievers = {}
+    for index in indexes:
+        corpus_config = copy.deepcopy(config)
+        corpus_config.setdefault("retrieval", {})["k"] = quotas[index["corpus"]]
+        retrievers[index["corpus"]] = build_retriever(corpus_config, embeddings, index)
+    return MultiCorpusRetriever(retrievers=retrievers)
+
+
+def build_retriever(config: dict, embeddings, index: dict | None = None):
+    """
+    Retriever over the current index build: vector search alone, or fused
+    with BM25 when retrieval.hybrid is enabled and the build has a BM25 index.
+    """
+    index = index or current_index(config)
+    vector = build_vector_retriever(config, embeddings, index)
+    retrieval = config.get("retrieval", {})
+    hybrid = retrieval.get("hybrid", {}) or {}
+    if not coerce_bool(hybrid.get("enabled"), True) or not index.get("bm25") or not os.path.exists(index["bm25"]):
+        return vector
+    return HybridRetriever(
+        vector=vector,
+        lexical=Bm25Index(index["bm25"], k1=float(hybrid.get("k1", 1.2)), b=float(hybrid.get("b", 0.75))),
+        k=int(retrieval.get("k", 8)),
+        vector_weight=float(hybrid.get("vector_weight", 1.0)),
+        bm25_weight=float(hybrid.get("bm25_weight", 1.0)),
+        rrf_k=int(hybrid.get("rrf_k", 60)),
+    )
+
+
+def build_vector_retriever(config: dict, embeddings, index: dict) -> BaseRetriever:
+    """Vector-only retriever for the chroma or numpy backend, sharded or not."""
+    retrieval = config.get("retrieval", {})
+    episodes_cfg = retrieval.get("episodes", {}) or {}
+    shortlist_size = int(episodes_cfg.get("shortlist", 12))
+    shortlist = None
+    if coerce_bool(episodes_cfg.get("enabled"), True) and shortlist_size > 0 \
+            and index.get("centroids") and os.path.exists(index["centroids"]):
+        shortlist = EpisodeShortlist(index["centroids"]) or None
+    catalog = load_episode_catalog(index["catalog"]) if index.get("catalog") else {}
+    return VectorRetriever(
+        shards=load_shards(
+            index,
+            rescore_factor=int(retrieval.get("rescore_factor", 4)),
+            search_ef=int((retrieval.get("hnsw", {}) or {}).get("search_ef", 100)),
+        ),
+        embeddings=embeddings,
+        search_type=retrieval.get("search_type", "mmr"),
+        search_kwargs={
+            "k": retrieval.get("k", 8),
+            "fetch_k": retrieval.get("fetch_k", 24),
+        },
+        shortlist=shortlist,
+        shortlist_size=shortlist_size,
+        publish_dates={slug: str(meta.get("publish_date") or "") for slug, meta in catalog.items()},
+    )
+
+
+def with_date_range(retriever: BaseRetriever, since: str | None = None, until: str | None = None) -> BaseRetriever:
+    """
+    A copy of a retriever that only returns chunks from episodes published in
+    [since, until] (YYYY, YYYY-MM or YYYY-MM-DD, either end optional).
+    """
+    since, until = date_bound(since), date_bound(until, end=True)
+    if isinstance(retriever, MultiCorpusRetriever):
+        return retriever.model_copy(update={"retrievers": {
+            name: with_date_range(inner, since, until) for name, inner in retriever.retrievers.items()
+        }})
+    if isinstance(retriever, HybridRetriever):
+        return retriever.model_copy(update={"vector": with_date_range(retriever.vector, since, until)})
+    if isinstance(retriever, VectorRetriever):
+        if (since or until) and not retriever.publish_dates:
+            # Without publish dates every episode would be filtered out
+            raise ValueError(
+                "This index has no episode catalog with publish dates; "
+                "rebuild the index to filter by date (python index_corpus.py --full)"
+            )
+        return retriever.model_copy(update={"since": since, "until": until})
+    return retriever
+
+
+# ── Import profiling (--import-profile) ─────────────────────────────────────
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)\s*$")
+
+
+def parse_import_times(stderr: str) -> tuple[list[dict], list[str]]:
+    """
+    ([{module, self_ms, cumulative_ms, depth}], other stderr lines) from the
+    output of python -X importtime.
+    """
+    modules, other = [], []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            modules.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            })
+        elif not line.startswith("import time: self"):
+            other.append(line)
+    return modules, other
+
+
+def import_time_by_package(modules: list[dict]) -> dict:
+    """Self import time summed per top-level package, slowest first."""
+    totals = {}
+    for entry in modules:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0.0) + entry["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def run_import_profile(argv: list[str], top: int = 15) -> int:
+    """
+    Re-run this command under python -X importtime and report what its
+    imports cost, per package and per module (only modules it actually
+    imported, including ones loaded lazily along the way).
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    modules, other = parse_import_times(result.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+    total = sum(entry["self_ms"] for entry in modules)
+    print()
+    print(f"⏱️  Import profile: {total:,.0f} ms importing {len(modules):,} modules (whole run {wall:.2f}s)")
+    print("   By package:")
+    for package, ms in list(import_time_by_package(modules).items())[:top]:
+        print(f"     {package:<28} {ms:>8.1f} ms  {'█' * max(1, round(30 * ms / total)) if total else ''}")
+    print("   Slowest modules (own time, excluding what they import):")
+    for entry in sorted(modules, key=lambda entry: -entry["self_ms"])[:top]:
+        print(f"     {entry['module']:<48} {entry['self_ms']:>8.1f} ms")
+    return result.returncode
+
+
+# ── Warm query daemon (explore.py --serve) ──────────────────────────────────
+
+DEFAULT_SOCKET = "data/explore.sock"
+# Retrievers kept warm at once (one per corpus selection + current builds)
+WARM_RETRIEVERS = 4
+
+
+class WarmResources:
+    """
+    The slow parts of answering a question: the embedding model, a retriever
+    over the current builds, and an LLM client per model. A normal run builds
+    what it needs once; explore.py --serve keeps one of these for its lifetime.
+    """
+
+    def __init__(self, served: bool = False):
+        self.served = served
+        self._embeddings = None
+        self._answer_cache = None
+        self._semantic_cache = None
+        self.retrievers: dict[str, BaseRetriever] = {}
+        self.llms: dict[str, tuple] = {}
+
+    def embeddings(self, config: dict) -> CachedQueryEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = load_query_embeddings(config)
+        return self._embeddings
+
+    def answer_cache(self, config: dict) -> AnswerCache | None:
+        if self._answer_cache is None:
+            self._answer_cache = load_answer_cache(config) or False
+        return self._answer_cache or None
+
+    def semantic_cache(self, config: dict) -> SemanticQueryCache | None:
+        if self._semantic_cache is None:
+            self._semantic_cache = load_semantic_cache(config) or False
+        return self._semantic_cache or None
+
+    def retriever(self, config: dict, indexes: list[dict]) -> BaseRetriever:
+        # Build IDs are part of the key (as in app.py), so once index_corpus.py
+        # switches CURRENT the next question opens the new build
+        key = json.dumps([config.get("retrieval", {}), indexes], sort_keys=True, default=str)
+        if key not in self.retrievers:
+            while len(self.retrievers) >= WARM_RETRIEVERS:
+                close_retriever(self.retrievers.pop(next(iter(self.retrievers))))
+            self.retrievers[key] = build_corpus_retriever(config, self.embeddings(config), indexes)
+        return self.retrievers[key]
+
+    def close(self):
+        """Close the cache databases and the open retrievers' shard files."""
+        for retriever in self.retrievers.values():
+            close_retriever(retriever)
+        self.retrievers.clear()
+        for cache in (self._answer_cache, self._semantic_cache):
+            if cache:
+                cache.close()
+        self._answer_cache = None
+        self._semantic_cache = None
+        if self._embeddings is not None and self._embeddings.cache is not None:
+            self._embeddings.cache.close()
+        self._embeddings = None
+
+    def reload(self, config: dict):
+        """
+        Start over from a changed config: caches and retrievers are reopened
+        from it on the next question. The loaded embedding model is kept, since
+        EMBEDDING_MODEL doesn't come from the config.
+        """
+        model = self._embeddings._model if self._embeddings is not None else None
+        self.close()
+        self._embeddings = load_query_embeddings(config)
+        self._embeddings._model = model
+
+    def llm(self, model_key: str, model_catalog: dict, providers: dict):
+        provider_meta = providers.get(model_catalog[model_key]["provider"]) or {}
+        # Clients read their API key when built, and a daemon answers with each caller's key
+        api_key = os.environ.get(provider_meta.get("api_key_env") or "", "")
+        key = json.dumps([model_catalog.get(model_key), provider_meta, hashlib.sha256(api_key.encode()).hexdigest()],
+                         sort_keys=True, default=str)
+        if key in self.llms:
+            return self.llms[key]
+        llm, meta = build_llm(model_key, model_catalog, providers)
+        if llm is not None:
+            self.llms[key] = (llm, meta)
+        return llm, meta
+
+
+class DaemonOutput:
+    """File-like stdout for one daemon request: each write goes to the client as a JSON line."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.connected = True
+
+    def send(self, message: dict):
+        if not self.connected:
+            return
+        try:
+            self.conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        except OSError:
+            # The client went away; finish the request quietly
+            self.connected = False
+
+    def write(self, text: str) -> int:
+        if text:
+            self.send({"out": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def daemon_listening(socket_path: str) -> bool:
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def forwarded_environment(config: dict) -> dict[str, str | None]:
+    """
+    This shell's values (None = unset) of the environment variables a question
+    reads: the LLM and web search API keys and the SearXNG overrides. They go
+    to explore.py --serve with the command line, so it answers as this shell would.
+    """
+    names = {meta.get("api_key_env") for meta in config.get("providers", {}).values() if isinstance(meta, dict)}
+    names.add(web_search_config(config).get("api_key_env", "SERPER_API_KEY"))
+    names.update(("SEARXNG_ENDPOINT", "SEARXNG_PORT"))
+    return {name: os.environ.get(name) for name in sorted(name for name in names if name)}
+
+
+@contextmanager
+def request_environment(env: dict):
+    """os.environ with a client's forwarded variables for one daemon request, restored afterwards."""
+    def apply(values: dict):
+        for name, value in values.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    saved = {name: os.environ.get(name) for name in env}
+    apply(env)
+    try:
+        yield
+    finally:
+        apply(saved)
+
+
+def ask_daemon(socket_path: str, argv: list[str], env: dict | None = None) -> int | None:
+    """
+    Have a running explore.py --serve answer this command line, streaming its
+    output here. env is this shell's forwarded_environment(). Returns the exit
+    code, or None when no daemon is listening (the caller then answers
+    in-process).
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None  # stale socket left by a daemon that was killed
+    with conn:
+        conn.sendall((json.dumps({"argv": argv, "env": env or {}}) + "\n").encode("utf-8"))
+        for line in conn.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "exit" in message:
+                return int(message["exit"])
+    # Not safe to retry in-process: the question may already have reached the LLM
+    print("❌ Error: explore.py --serve stopped before answering (see its console)")
+    return 1
+
+
+class ParserExit(Exception):
+    """argparse finished a daemon request early (--help or a bad argument)."""
+
+    def __init__(self, code: int):
+        super().__init__(code)
+        self.code = code
+
+
+class DaemonArgumentParser(argparse.ArgumentParser):
+    """
+    Raises ParserExit where argparse would exit, so only --help and argument
+    errors end a request this way; a real SystemExit still stops the daemon.
+    """
+
+    def exit(self, status=0, message=None):
+        if message:
+            self._print_message(message, sys.stderr)
+        raise ParserExit(status)
+
+
+def handle_daemon_request(conn, config: dict, resources: WarmResources) -> tuple[str, int]:
+    """Run one forwarded command line with stdout/stderr going back over conn; (question, exit code)."""
+    request = json.loads(conn.makefile("r", encoding="utf-8").readline() or "{}")
+    argv = [str(arg) for arg in request.get("argv", [])]
+    env = {str(name): None if value is None else str(value) for name, value in (request.get("env") or {}).items()}
+    question = ""
+    output = DaemonOutput(conn)
+    with request_environment(env), redirect_stdout(output), redirect_stderr(output):
+        try:
+            model_catalog = build_model_catalog(config)
+            parser = build_arg_parser(config, model_catalog, parser_class=DaemonArgumentParser)
+            args = parser.parse_args(argv)
+            question = " ".join(args.question)
+            code = run_question(parser, args, config, model_catalog, resources)
+        except ParserExit as e:
+            code = e.code
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            code = 1
+    output.send({"exit": code})
+    return question, code
+
+
+def serve(socket_path: str, config_path: str = "CONFIGS.yaml") -> int:
+    """
+    Answer explore.py questions from a local Unix socket, one at a time, with
+    the embedding model, the current index and LLM clients kept loaded.
+    CONFIGS.yaml is re-read when it changes, and the caches and index opened
+    under the old settings are closed.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ Error: --serve needs Unix domain sockets, which this platform doesn't have")
+        return 1
+    if daemon_listening(socket_path):
+        print(f"❌ Error: explore.py --serve is already running on {socket_path}")
+        return 1
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # left behind by a daemon that was killed
+
+    started = time.perf_counter()
+    config = load_config(config_path)
+    config_mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else None
+    resources = WarmResources(served=True)
+    print("🔥 Warming up: loading the embedding model and opening the index...")
+    resources.embeddings(config).model().embed_query("warm up")
+    index = current_index(config)
+    if index_ready(index):
+        resources.retriever(config, [index])
+    else:
+        print("⚠️  No index yet for the default corpus; it will be opened on the first question")
+
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)  # only this user can send questions
+    server.listen(16)
+    # kill stops the daemon like Ctrl+C, even mid-question: the client is told
+    # it stopped before answering, and the socket is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"✅ Ready in {time.perf_counter() - started:.1f}s, listening on {socket_path}")
+    print("   Ask with: python explore.py \"your question\"   (Ctrl+C to stop)")
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else None
+                if mtime != config_mtime:
+                    config, config_mtime = load_config(config_path), mtime
+                    resources.reload(config)
+                    print(f"🔄 {config_path} changed; reloaded")
+                request_started = time.perf_counter()
+                question, code = handle_daemon_request(conn, config, resources)
+                print(f"{'✅' if code == 0 else '❌'} {question[:80]!r} in {time.perf_counter() - request_started:.1f}s",
+                      flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.close()
+        resources.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("👋 explore.py --serve stopped")
+    return 0
+
+
+def build_arg_parser(config: dict, model_catalog: dict,
+                     parser_class: type = argparse.ArgumentParser) -> argparse.ArgumentParser:
     defaults = config.get("defaults", {})
     output_cfg = config.get("output", {}) or {}
     dean_cfg = (output_cfg.get("deanisms", {}) or {}).get("deanifried_response", {}) or {}
@@ -612,11 +2451,9 @@ def main():
     dean_default_mode = "on" if dean_default_mode == "on" else "off"
     dean_default_platform = dean_cfg.get("target_platform", "cli")
     features = config.get("features", {})
-    web_cfg = web_search_config(config)
-    web_search_default = resolve_web_search_default(features, web_cfg)
-    web_search_default_value = web_search_default
+    web_search_default_value = resolve_web_search_default(features, web_search_config(config))
 
-    parser = argparse.ArgumentParser(
+    parser = parser_class(
         description="Query Lenny's podcast corpus with model switching",
         formatter_class=argparse.RawTextHelpFormatter,
     )
@@ -666,8 +2503,77 @@ def main():
         default=dean_default_platform,
         help="Dean-i-fried platform style (default from CONFIGS.yaml)",
     )
+    parser.add_argument(
+        "--since",
+        metavar="DATE",
+        help="Only use episodes published on/after DATE (2024, 2024-06 or 2024-06-30)",
+    )
+    parser.add_argument(
+        "--until",
+        metavar="DATE",
+        help="Only use episodes published on/before DATE (same formats as --since)",
+    )
+    parser.add_argument(
+        "--corpus",
+        metavar="NAME",
+        help="Corpus to search: a name from paths.corpora, several joined by commas, or 'all' "
+             "(default: the first corpus)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a warm query daemon on a local socket: the embedding model, index and\n"
+             "LLM clients stay loaded, and explore.py \"question\" runs are answered by it",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Answer in this process even if explore.py --serve is running",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=(config.get("serve", {}) or {}).get("socket", DEFAULT_SOCKET),
+        help="Daemon socket path (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Search and ask the LLM again even if this question (or a similar one) is cached;\n"
+             "the fresh results replace the cached ones",
+    )
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Run the rest of the command line and report import time per module",
+    )
+    return parser
 
-    args = parser.parse_args()
+
+def main(argv: list[str] | None = None):
+    config = load_config()
+    model_catalog = build_model_catalog(config)
+    parser = build_arg_parser(config, model_catalog)
+    args = parser.parse_args(argv)
+
+    if args.import_profile:
+        argv = sys.argv[1:] if argv is None else argv
+        return run_import_profile([arg for arg in argv if arg != "--import-profile"])
+    if args.serve:
+        return serve(args.socket)
+    if args.question and not args.list_models and not args.no_daemon:
+        # A running explore.py --serve answers with everything already loaded
+        code = ask_daemon(args.socket, sys.argv[1:] if argv is None else argv, forwarded_environment(config))
+        if code is not None:
+            return code
+    return run_question(parser, args, config, model_catalog, WarmResources())
+
+
+def run_question(parser: argparse.ArgumentParser, args, config: dict, model_catalog: dict,
+                 resources: "WarmResources") -> int:
+    """Answer one parsed explore.py command line; resources holds whatever is already loaded."""
+    providers = config.get("providers", {})
+    web_cfg = web_search_config(config)
 
     if args.list_models:
         print_model_list(model_catalog)
@@ -677,6 +2583,12 @@ def main():
         parser.print_help()
         return 1
 
+    try:
+        date_bound(args.since)
+        date_bound(args.until, end=True)
+    except ValueError as e:
+        parser.error(str(e))
+
     verbose = args.verbose == "on"
     web_search_mode = args.web_search
     deanifried_enabled = args.deanifried == "on"
@@ -766,49 +2678,55 @@ def main():
         if verbose:
             print(*print_args, **print_kwargs)
     
+    try:
+        corpora = select_corpora(config, args.corpus)
+    except ValueError as e:
+        parser.error(str(e))
+
     # Check if vector DB exists
-    vector_db_path = config.get("paths", {}).get("vector_db", "data/chroma_db")
-    if not os.path.exists(vector_db_path):
-        print("❌ Error: Vector database not found")
+    indexes = [current_index(config, corpus) for corpus in corpora]
+    missing = [index["corpus"] for index in indexes if not index_ready(index)]
+    if missing:
+        print(f"❌ Error: Vector database not found ({', '.join(missing)})")
         print()
         print("Run setup first:")
         print("  ./setup.sh")
+        if len(corpora) > 1 or not corpora[0]["primary"]:
+            print(f"  python index_corpus.py --corpus {','.join(missing)}")
         return 1
     
     query = " ".join(args.question).strip()
     
     vprint()
-    vprint("🔍 Searching Lenny's podcast corpus...")
+    if len(indexes) > 1:
+        vprint(f"🔍 Searching {len(indexes)} corpora at once: {', '.join(index['label'] for index in indexes)}")
+    elif not corpora[0]["primary"]:
+        vprint(f"🔍 Searching the {corpora[0]['label']} corpus...")
+    else:
+        vprint("🔍 Searching Lenny's podcast corpus...")
     vprint(f"❓ Question: {query}")
+    if args.since or args.until:
+        vprint(f"📅 Published: {args.since or 'any'} → {args.until or 'now'}")
     if web_search_requested:
         mode_label = "FORCED" if web_search_force else "AUTO"
         vprint(f"🌐 Web search fallback: {'ON' if web_search_enabled else 'OFF'} ({mode_label}, {provider_label})")
+    if resources.served:
+        vprint(f"⚡ Answered by explore.py --serve (pid {os.getpid()}): model and index already loaded")
     vprint()
     if deanifried_enabled:
         print(f"🎭 Dean-i-fried: ON (platform: {deanifried_platform}, extra LLM call)")
     
     try:
-        # Load embeddings (same model used for indexing)
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        
-        # Load vector store
-        vectorstore = Chroma(
-            persist_directory=vector_db_path,
-            embedding_function=embeddings
-        )
-        
-        retrieval = config.get("retrieval", {})
-        retriever = vectorstore.as_retriever(
-            search_type=retrieval.get("search_type", "mmr"),
-            search_kwargs={
-                "k": retrieval.get("k", 8),
-                "fetch_k": retrieval.get("fetch_k", 24),
-            },
-        )
+        # Embedding model + vector store (Chroma or the memory-mapped numpy index)
+        retriever = resources.retriever(config, indexes)
+        if args.since or args.until:
+            try:
+                retriever = with_date_range(retriever, args.since, args.until)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return 1
         
-        llm, model_meta = build_llm(args.model, model_catalog, providers)
+        llm, model_meta = resources.llm(args.model, model_catalog, providers)
         if llm is None:
             return 1
         
@@ -855,15 +2773,46 @@ Question: {question}
 
 Answer:"""
         
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+
         prompt = ChatPromptTemplate.from_template(template)
         
         # Get source documents for attribution
-        source_docs = retriever.invoke(query)
+        embeddings = resources.embeddings(config)
+        cache_before = dict(embeddings.stats)
+        source_docs, semantic_match = retrieve_with_semantic_cache(
+            resources.semantic_cache(config), retrieval_scope(config, indexes, args.since, args.until),
+            embeddings, retriever, query, reuse=not args.no_cache,
+        )
+        reuse_matched_answer = bool(semantic_match) and coerce_bool(semantic_cache_settings(config).get("reuse_answer"))
+        if embeddings.cache is not None:
+            vprint(f"🗃️  Query cache: {embeddings.summary(cache_before)}")
+            if resources.served:
+                vprint(f"   This daemon: {embeddings.summary()}")
+            else:
+                entries, hits, saved = embeddings.cache.lifetime()
+                vprint(f"   All runs: {entries:,} cached questions reused {hits:,} times, ~{saved:.2f}s saved")
         doc_context = format_docs(source_docs)
-
-        def run_answer(context: str) -> str:
+        answer_cache = resources.answer_cache(config)
+        cache_hits = []
+
+        def run_answer(context: str, web_results: list | None = None) -> str:
+            # Keyed by everything that shapes the answer; a new build of any index misses
+            fingerprint = context_fingerprint(source_docs, web_results)
+            key = answer_cache_key(query, model_meta, template, fingerprint, indexes)
+            fallback_key = None
+            if reuse_matched_answer:
+                fallback_key = answer_cache_key(semantic_match["question"], model_meta, template, fingerprint, indexes)
             chain = prompt | llm | StrOutputParser()
-            return chain.invoke({"context": context, "question": query})
+            answer, hit = cached_llm_answer(
+                answer_cache, key, query, model_meta["model"],
+                lambda: chain.invoke({"context": context, "question": query}),
+                reuse=not args.no_cache, fallback_key=fallback_key,
+            )
+            if hit:
+                cache_hits.append(hit)
+            return answer
 
         vprint("🤔 Thinking...")
 
@@ -878,7 +2827,7 @@ Answer:"""
                 if web_results:
                     web_context = format_web_results(web_results)
                     combined_context = doc_context + "\n\nWeb results:\n" + web_context
-                    answer = run_answer(combined_context)
+                    answer = run_answer(combined_context, web_results)
                 else:
                     vprint("⚠️  Web search returned no results")
             else:
@@ -888,7 +2837,7 @@ Answer:"""
                     if web_results:
                         web_context = format_web_results(web_results)
                         combined_context = doc_context + "\n\nWeb results:\n" + web_context
-                        answer = run_answer(combined_context)
+                        answer = run_answer(combined_context, web_results)
                     else:
                         vprint("⚠️  Web search returned no results")
                 else:
@@ -918,13 +2867,20 @@ Answer:"""
         print("-" * 50)
         print(answer)
         print("-" * 50)
+        if semantic_match:
+            print(f"♻️  {describe_semantic_match(semantic_match, query)}")
+        if cache_hits:
+            hit = cache_hits[-1]
+            matched = semantic_match["question"] if hit["fallback"] else None
+            print(f"💾 {describe_cache_hit(hit, matched)}; --no-cache asks again")
         print()
         
         # Show sources with metadata
         max_sources = config.get("output", {}).get("max_sources", 3)
         if source_docs:
             print("📚 Sources:")
-            print(format_sources(source_docs, max_sources=max_sources))
+            episode_catalog = load_corpus_catalog(indexes)
+            print(format_sources(source_docs, max_sources=max_sources, catalog=episode_catalog))
             print()
         if web_results:
             print("🌐 Web Sources:")
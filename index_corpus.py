@@ -5,33 +5,138 @@ Index Lenny's podcast transcripts into ChromaDB with metadata preservation
 """
 
 import os
+import re
 import sys
+import json
 import yaml
+import hashlib
+import sqlite3
+import zlib
 import logging
 import copy
 import argparse
+import time
+import math
+import shutil
+import socket
+import multiprocessing
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
+import chromadb
+import numpy as np
 from tqdm import tqdm
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from index_format import (
+    CURRENT_POINTER,
+    STORE_DIRNAMES,
+    bm25_tokens,
+    corpus_configs,
+    read_build_pointer,
+)
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+CHUNKERS = ("speaker_turns", "recursive")
+MANIFEST_FILENAME = "index_manifest.json"
+MANIFEST_VERSION = 1
+CATALOG_FILENAME = "episode_catalog.json"
+CATALOG_VERSION = 1
+# Fields that differ per chunk; everything else in the frontmatter is per episode
+CHUNK_METADATA_FIELDS = ("speaker", "start_ts", "end_ts")
+# libyaml's C loader is several times faster than the pure-Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# LangChain's Chroma wrapper (used by explore.py) reads this collection by default
+COLLECTION_NAME = "langchain"
+BACKENDS = ("chroma", "numpy")
+INDEX_INFO_FILENAME = "index_info.json"
+BUILDING_POINTER = "BUILDING"
+CHECKPOINT_FILENAME = "checkpoint.sqlite"
+BM25_FILENAME = "bm25.sqlite"
+CENTROIDS_FILENAME = "episode_centroids.npz"
+SHARD_SCHEMES = ("none", "year", "quarter")
+SHARDS_FILENAME = "shards.json"
+UNDATED_SHARD = "undated"
+BM25_TOKENIZER_VERSION = 1
+SMOKE_QUERY = "How do you find product-market fit?"
+NUMPY_INDEX_FORMAT = 1
+# Chroma's own defaults; python bench.py hnsw tunes them for a corpus
+HNSW_DEFAULTS = {"M": 16, "construction_ef": 100, "search_ef": 100}
+
 DEFAULT_CONFIG = {
     "defaults": {
         "verbose": True,
     },
     "paths": {
         "vector_db": "data/chroma_db",
+        "numpy_index": "data/numpy_index",
+        "indexes": "data/indexes",
         "logs": "logs",
         "corpora": [
             {"name": "lenny", "path": "episodes"},
         ],
     },
+    "index": {
+        "batch_size": 256,
+        "chunker": "speaker_turns",
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "dedup": {
+            "enabled": True,
+            "threshold": 0.85,
+            "num_perm": 64,
+            "bands": 8,
+            "shingle_words": 5,
+            "min_words": 30,
+        },
+        "boilerplate": {
+            "enabled": True,
+            "ngram_words": 8,
+            "min_episodes": 5,
+            "min_episode_fraction": 0.05,
+            "min_words": 40,
+        },
+        "load_workers": 1,
+        "embedding_workers": 1,
+        "threads_per_worker": 0,
+        "keep_builds": 3,
+        "shards": "none",
+        "vectors": {
+            "dtype": "float32",
+            "pca_dim": 0,
+        },
+        "bm25": {
+            "enabled": True,
+        },
+        "queue": {
+            "dir": "data/index_queue",
+            "unit_episodes": 25,
+            "lease_seconds": 1800,
+        },
+        "embedding_cache": {
+            "enabled": True,
+            "path": "data/embedding_cache.sqlite",
+            "dtype": "float16",
+            "max_entries": 200000,
+        },
+    },
+    "retrieval": {
+        "backend": "chroma",
+        "hnsw": {
+            "M": 16,
+            "construction_ef": 100,
+            "search_ef": 100,
+        },
+    },
 }
 
 
@@ -60,6 +165,167 @@ def load_config(path: str = "CONFIGS.yaml") -> dict:
     return config
 
 
+# ── Index manifest (incremental re-indexing) ────────────────────────────────
+
+def index_artifact_path(vector_db_path: str, filename: str) -> str:
+    """Index side files live next to the vector DB directory (e.g. data/index_manifest.json)."""
+    parent = os.path.dirname(os.path.normpath(vector_db_path))
+    return os.path.join(parent, filename)
+
+
+def manifest_path_for(vector_db_path: str) -> str:
+    return index_artifact_path(vector_db_path, MANIFEST_FILENAME)
+
+
+def chunking_settings(index_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    chunker = index_cfg.get("chunker", "speaker_turns")
+    if chunker not in CHUNKERS:
+        raise ValueError(f"Unknown index.chunker '{chunker}' (expected one of: {', '.join(CHUNKERS)})")
+    return {
+        "chunker": chunker,
+        "chunk_size": int(index_cfg.get("chunk_size", CHUNK_SIZE)),
+        # Speaker turns are packed whole, so no overlap is needed there
+        "chunk_overlap": int(index_cfg.get("chunk_overlap", CHUNK_OVERLAP)) if chunker == "recursive" else 0,
+    }
+
+
+def index_settings(
+    chunking: Optional[Dict[str, Any]] = None,
+    dedup: Optional[Dict[str, Any]] = None,
+    backend: str = "chroma",
+    bm25: bool = True,
+    shards: str = "none",
+    boilerplate: Optional[Dict[str, Any]] = None,
+    vectors: Optional[Dict[str, Any]] = None,
+    hnsw: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """Settings that change chunk boundaries or vectors; a change forces a full rebuild."""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        **(chunking or chunking_settings({})),
+        "dedup": dedup,
+        "chunk_metadata": "episode_catalog",
+        "backend": backend,
+        "bm25": BM25_TOKENIZER_VERSION if bm25 else None,
+        "shards": shards,
+        "boilerplate": boilerplate,
+        # Chroma always stores float32, so only the numpy backend records this
+        "vectors": (vectors or vector_storage_settings({})) if backend == "numpy" else None,
+        # search_ef is applied to an existing collection, so only the graph parameters count
+        "hnsw": hnsw_build_settings(hnsw or hnsw_settings({})) if backend == "chroma" else None,
+    }
+
+
+def vector_backend(config: Dict[str, Any]) -> str:
+    backend = (config.get("retrieval", {}) or {}).get("backend", "chroma")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown retrieval.backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
+    return backend
+
+
+def resolve_index_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Every setting a build depends on, parsed and validated once per run
+    (ValueError names the first bad one). "settings" is the subset recorded
+    in the manifest; the rest is what build_corpus_index() builds with.
+    """
+    index_cfg = config.get("index", {}) or {}
+    resolved = {
+        "chunking": chunking_settings(index_cfg),
+        "dedup": dedup_settings(index_cfg),
+        "boilerplate": boilerplate_settings(index_cfg),
+        "backend": vector_backend(config),
+        "bm25": bool((index_cfg.get("bm25", {}) or {}).get("enabled", True)),
+        "shards": index_shard_scheme(index_cfg),
+        "vectors": vector_storage_settings(index_cfg),
+        "hnsw": hnsw_settings(config),
+    }
+    resolved["settings"] = index_settings(
+        resolved["chunking"], resolved["dedup"], resolved["backend"], resolved["bm25"],
+        resolved["shards"], resolved["boilerplate"], resolved["vectors"], resolved["hnsw"],
+    )
+    return resolved
+
+
+def empty_manifest(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "version": MANIFEST_VERSION,
+        "settings": settings or index_settings(),
+        "updated_at": None,
+        "episodes": {},
+    }
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return empty_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    manifest.setdefault("episodes", {})
+    return manifest
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]):
+    """Write the manifest atomically so a crash never leaves a half-written file."""
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def episode_slug(source: str) -> str:
+    """episodes/<slug>/transcript.md -> <slug>"""
+    return Path(source).parent.name
+
+
+def chunk_ids_for(source: str, count: int) -> List[str]:
+    """Deterministic chunk IDs so a changed episode can replace exactly its own chunks."""
+    slug = episode_slug(source)
+    return [f"{slug}::{i:04d}" for i in range(count)]
+
+
+def plan_incremental_update(
+    transcript_files: List[Path],
+    manifest: Dict[str, Any],
+    full_rebuild: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compare transcript hashes against the manifest.
+
+    Returns:
+        dict with new/changed/unchanged/deleted source lists and the current hashes
+    """
+    known = manifest.get("episodes", {})
+    hashes = {str(path): file_sha256(str(path)) for path in transcript_files}
+    plan = {"new": [], "changed": [], "unchanged": [], "deleted": [], "hashes": hashes}
+    for source, digest in hashes.items():
+        entry = known.get(source)
+        if entry is None:
+            plan["new"].append(source)
+        elif full_rebuild or entry.get("hash") != digest:
+            plan["changed"].append(source)
+        else:
+            plan["unchanged"].append(source)
+    plan["deleted"] = sorted(source for source in known if source not in hashes)
+    return plan
+
+
 def load_transcript_with_metadata(file_path: str) -> tuple[str, Dict[str, Any]]:
     """
     Load a transcript markdown file and separate frontmatter from content.
@@ -74,7 +340,7 @@ def load_transcript_with_metadata(file_path: str) -> tuple[str, Dict[str, Any]]:
     if content.startswith('---'):
         parts = content.split('---', 2)
         if len(parts) >= 3:
-            frontmatter = yaml.safe_load(parts[1])
+            frontmatter = yaml.load(parts[1], Loader=YAML_LOADER) or {}
             transcript_text = parts[2].strip()
             
             # Convert all metadata values to strings or basic types for ChromaDB
@@ -98,221 +364,3397 @@ def load_transcript_with_metadata(file_path: str) -> tuple[str, Dict[str, Any]]:
     return content, {}
 
 
-def load_all_transcripts(episodes_dir: str = "episodes", verbose: bool = True) -> List[Document]:
+def find_transcript_files(episodes_dir: str = "episodes") -> List[Path]:
+    episodes_path = Path(episodes_dir)
+    if not episodes_path.exists():
+        raise FileNotFoundError(f"Episodes directory not found: {episodes_dir}")
+    return sorted(episodes_path.glob("*/transcript.md"))
+
+
+def iter_transcripts(
+    transcript_files: Iterable[Path],
+    verbose: bool = True,
+    stats: Optional["StageStats"] = None,
+) -> Iterator[Document]:
+    """
+    Lazily load transcripts one at a time (load stage of the indexing pipeline).
+
+    Yields:
+        LangChain Document objects with metadata attached
+    """
+    for transcript_file in transcript_files:
+        started = time.perf_counter()
+        try:
+            content, metadata = load_transcript_with_metadata(str(transcript_file))
+        except Exception as e:
+            if verbose:
+                tqdm.write(f"  ⚠️  Warning: Failed to load {transcript_file}: {e}")
+            logger.warning(f"Failed to load {transcript_file}: {e}")
+            continue
+
+        # Add source path to metadata
+        metadata['source'] = str(transcript_file)
+        if stats is not None:
+            stats.add(1, time.perf_counter() - started)
+
+        yield Document(page_content=content, metadata=metadata)
+
+
+def load_all_transcripts(
+    episodes_dir: str = "episodes",
+    verbose: bool = True,
+    transcript_files: Optional[List[Path]] = None,
+) -> List[Document]:
     """
-    Load all transcripts from the episodes directory with metadata.
+    Load transcripts from the episodes directory with metadata.
+
+    Pass transcript_files to load only a subset (e.g. new or changed episodes).
+    The indexing pipeline streams through iter_transcripts instead; this helper
+    is for callers that really want everything in memory.
     
     Returns:
         List of LangChain Document objects with metadata attached
     """
-    documents = []
-    episodes_path = Path(episodes_dir)
-    
-    if not episodes_path.exists():
-        raise FileNotFoundError(f"Episodes directory not found: {episodes_dir}")
-    
-    transcript_files = list(episodes_path.glob("*/transcript.md"))
+    if transcript_files is None:
+        transcript_files = find_transcript_files(episodes_dir)
     
     if verbose:
         print(f"Found {len(transcript_files)} transcript files")
         print()
     
-    # Use tqdm for progress bar
-    for transcript_file in tqdm(
-        transcript_files,
-        desc="📚 Loading transcripts",
-        unit="episode",
-        disable=not verbose,
-    ):
+    return list(iter_transcripts(
+        tqdm(transcript_files, desc="📚 Loading transcripts", unit="episode", disable=not verbose),
+        verbose=verbose,
+    ))
+
+
+def iter_episode_chunks(
+    documents: Iterable[Document],
+    text_splitter,
+    stats: Optional["StageStats"] = None,
+) -> Iterator[tuple[str, List[tuple[str, Document]]]]:
+    """
+    Split each document as it arrives (split stage of the indexing pipeline).
+
+    Yields:
+        (source, [(chunk_id, chunk), ...]) per episode
+    """
+    for doc in documents:
+        started = time.perf_counter()
+        doc_chunks = text_splitter.split_documents([doc])
+        source = doc.metadata["source"]
+        ids = chunk_ids_for(source, len(doc_chunks))
+        if stats is not None:
+            stats.add(len(doc_chunks), time.perf_counter() - started)
+        yield source, list(zip(ids, doc_chunks))
+
+
+# ── Speaker-turn chunking ───────────────────────────────────────────────────
+
+# "Lenny (00:01:19):" on its own line, followed by the turn's text
+TURN_HEADER_RE = re.compile(r"^(?P<speaker>[^\n()\[\]]{1,80}?) \((?P<ts>\d{1,2}:\d{2}(?::\d{2})?)\):\s*$")
+# "Lenny:" on its own line, without a timestamp (a few older transcripts)
+UNTIMED_TURN_RE = re.compile(r"^(?P<speaker>[A-Z][\w.'\- ]{0,60}):\s*$")
+# "[00:00:28] Lenny: text" on a single line (older transcripts)
+INLINE_TURN_RE = re.compile(r"^\[(?P<ts>\d{1,2}:\d{2}(?::\d{2})?)\] (?P<speaker>[^:\n]{1,80}): (?P<text>.*)$")
+
+
+def normalize_timestamp(ts: str) -> str:
+    """1:19 or 00:01:19 -> 00:01:19"""
+    parts = [int(part) for part in ts.split(":")]
+    while len(parts) < 3:
+        parts.insert(0, 0)
+    hours, minutes, seconds = parts
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def parse_speaker_turns(text: str) -> List[tuple[str, str, str]]:
+    """
+    Split a transcript body into speaker turns.
+
+    Text before the first turn (the title and "## Transcript" headings) is
+    dropped; the title already lives in metadata.
+
+    Returns:
+        [(speaker, "hh:mm:ss" or None, text), ...]
+    """
+    turns = []
+    current = None
+    for line in text.splitlines():
+        match = TURN_HEADER_RE.match(line)
+        if match:
+            current = [match.group("speaker").strip(), normalize_timestamp(match.group("ts")), []]
+            turns.append(current)
+            continue
+        match = INLINE_TURN_RE.match(line)
+        if match:
+            current = [match.group("speaker").strip(), normalize_timestamp(match.group("ts")), [match.group("text")]]
+            turns.append(current)
+            continue
+        match = UNTIMED_TURN_RE.match(line)
+        if match:
+            current = [match.group("speaker").strip(), None, []]
+            turns.append(current)
+            continue
+        if current is not None:
+            current[2].append(line)
+    return [(speaker, ts, "\n".join(lines).strip()) for speaker, ts, lines in turns]
+
+
+class SpeakerTurnSplitter:
+    """
+    Packs whole `Speaker (hh:mm:ss):` turns into chunks of up to chunk_size characters.
+
+    Turns are never cut in half unless a single turn is longer than the budget,
+    in which case it is split on its own (each piece keeps the speaker header).
+    Each chunk records speaker, start_ts and end_ts metadata. Transcripts with
+    no recognizable turns fall back to a plain recursive split without overlap.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.fallback = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=0,
+            length_function=len,
+        )
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            chunks.extend(self.split_document(doc))
+        return chunks
+
+    def split_document(self, doc: Document) -> List[Document]:
+        turns = parse_speaker_turns(doc.page_content)
+        if not turns:
+            return self.fallback.split_documents([doc])
+
+        pieces = []  # (speaker, ts, text incl. header)
+        for speaker, ts, text in turns:
+            if not text:
+                continue
+            header = f"{speaker} ({ts}):\n" if ts else f"{speaker}:\n"
+            if len(header) + len(text) <= self.chunk_size:
+                pieces.append((speaker, ts, header + text))
+                continue
+            long_turn = RecursiveCharacterTextSplitter(
+                chunk_size=max(200, self.chunk_size - len(header)),
+                chunk_overlap=0,
+                length_function=len,
+            )
+            for part in long_turn.split_text(text):
+                pieces.append((speaker, ts, header + part))
+
+        chunks = []
+        group = []
+        size = 0
+        for piece in pieces:
+            added = len(piece[2]) + (2 if group else 0)
+            if group and size + added > self.chunk_size:
+                chunks.append(self._make_chunk(doc, group))
+                group, size, added = [], 0, len(piece[2])
+            group.append(piece)
+            size += added
+        if group:
+            chunks.append(self._make_chunk(doc, group))
+        return chunks
+
+    @staticmethod
+    def _make_chunk(doc: Document, group: List[tuple[str, str, str]]) -> Document:
+        metadata = dict(doc.metadata)
+        metadata["speaker"] = ", ".join(dict.fromkeys(speaker for speaker, _, _ in group))
+        metadata["start_ts"] = group[0][1]
+        metadata["end_ts"] = group[-1][1]
+        return Document(page_content="\n\n".join(text for _, _, text in group), metadata=metadata)
+
+
+# ── Boilerplate (ad reads, intros and outros repeated across episodes) ──────
+
+BOILERPLATE_FILENAME = "boilerplate.npz"
+BOILERPLATE_REPORT_FILENAME = "boilerplate_report.json"
+BOILERPLATE_REPORT_VERSION = 1
+BOILERPLATE_PRIME = np.uint64(1099511628211)
+
+
+def boilerplate_settings(index_cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    cfg = index_cfg.get("boilerplate", {}) or {}
+    if not cfg.get("enabled", True):
+        return None
+    ngram_words = int(cfg.get("ngram_words", 8))
+    if ngram_words < 2:
+        raise ValueError("index.boilerplate.ngram_words must be at least 2")
+    return {
+        "ngram_words": ngram_words,
+        "min_episodes": max(2, int(cfg.get("min_episodes", 5))),
+        "min_episode_fraction": float(cfg.get("min_episode_fraction", 0.05)),
+        "min_words": max(ngram_words, int(cfg.get("min_words", 40))),
+    }
+
+
+@lru_cache(maxsize=1 << 16)
+def word_hash(word: str) -> int:
+    """64-bit hash of a word, ignoring case and punctuation."""
+    normalized = re.sub(r"\W+", "", word.lower())
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def transcript_word_blocks(lines: List[str]) -> List[List[tuple[int, int, int]]]:
+    """
+    Word positions of a transcript body grouped by speaker turn; headers are left out.
+
+    Returns:
+        [[(line index, start, end), ...] per turn]
+    """
+    blocks = []
+    current = []
+    for line_no, line in enumerate(lines):
+        offset = 0
+        if TURN_HEADER_RE.match(line) or UNTIMED_TURN_RE.match(line):
+            if current:
+                blocks.append(current)
+            current = []
+            continue
+        match = INLINE_TURN_RE.match(line)
+        if match:
+            if current:
+                blocks.append(current)
+            current = []
+            offset = match.start("text")
+        current.extend((line_no, m.start(), m.end()) for m in re.finditer(r"\S+", line) if m.start() >= offset)
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def mask_runs(mask: np.ndarray) -> List[tuple[int, int]]:
+    """[start, end) of every run of True values."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+class BoilerplateStripper:
+    """
+    Removes spans that recur almost verbatim across the corpus (sponsor reads,
+    intros, outros) before transcripts are split.
+
+    Every ngram_words-word shingle that occurs in at least min_episodes
+    episodes (and min_episode_fraction of the corpus) is boilerplate; a run of
+    such shingles covering min_words or more words is cut. Short repeats, like
+    the lightning-round questions, stay. The shingles are learned from the
+    whole corpus on a full rebuild and stored with the build, so incremental
+    runs strip new episodes the same way as the ones already indexed.
+    """
+
+    def __init__(self, settings: Dict[str, Any], shingles: Optional[np.ndarray] = None, learned_from: int = 0):
+        self.settings = settings
+        self.shingles = np.unique(shingles.astype(np.uint64)) if shingles is not None else np.zeros(0, np.uint64)
+        self.learned_from = learned_from
+
+    def block_shingles(self, words: List[str]) -> np.ndarray:
+        n = self.settings["ngram_words"]
+        count = len(words) - n + 1
+        if count <= 0:
+            return np.zeros(0, dtype=np.uint64)
+        hashes = np.fromiter((word_hash(word) for word in words), dtype=np.uint64, count=len(words))
+        # Polynomial rolling hash over each window; uint64 overflow wraps
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(n):
+            shingles = shingles * BOILERPLATE_PRIME + hashes[offset:offset + count]
+        return shingles
+
+    @classmethod
+    def learn(cls, transcript_files: Iterable[Path], settings: Dict[str, Any]) -> "BoilerplateStripper":
+        """Count in how many episodes each shingle appears and keep the frequent ones."""
+        stripper = cls(settings)
+        per_episode = []
+        for transcript_file in transcript_files:
+            try:
+                text, _ = load_transcript_with_metadata(str(transcript_file))
+            except Exception as e:
+                logger.warning(f"Boilerplate scan skipped {transcript_file}: {e}")
+                continue
+            lines = text.splitlines()
+            per_episode.append(np.unique(np.concatenate([np.zeros(0, dtype=np.uint64)] + [
+                stripper.block_shingles([lines[line][start:end] for line, start, end in block])
+                for block in transcript_word_blocks(lines)
+            ])))
+        if not per_episode:
+            return stripper
+        shingles, counts = np.unique(np.concatenate(per_episode), return_counts=True)
+        threshold = max(settings["min_episodes"], math.ceil(settings["min_episode_fraction"] * len(per_episode)))
+        return cls(settings, shingles[counts >= threshold], learned_from=len(per_episode))
+
+    @classmethod
+    def load(cls, path: str, settings: Dict[str, Any]) -> "BoilerplateStripper":
+        with np.load(path) as data:
+            return cls(settings, data["shingles"], learned_from=int(data["learned_from"]))
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, shingles=self.shingles, learned_from=np.array(self.learned_from))
+        os.replace(tmp_path, path)
+
+    def strip(self, text: str) -> tuple[str, List[str]]:
+        """The text with boilerplate spans cut out, and the spans that were cut."""
+        if not len(self.shingles):
+            return text, []
+        n = self.settings["ngram_words"]
+        lines = text.splitlines()
+        cuts: Dict[int, List[tuple[int, int]]] = {}
+        removed = []
+        for block in transcript_word_blocks(lines):
+            words = [lines[line][start:end] for line, start, end in block]
+            hits = np.isin(self.block_shingles(words), self.shingles)
+            if not hits.any():
+                continue
+            # A word is covered when any shingle containing it is boilerplate
+            covered = np.convolve(hits.astype(np.int32), np.ones(n, dtype=np.int32))[:len(words)] > 0
+            for start, end in mask_runs(covered):
+                if end - start < self.settings["min_words"]:
+                    continue
+                removed.append(" ".join(words[start:end]))
+                for line, word_start, word_end in block[start:end]:
+                    cuts.setdefault(line, []).append((word_start, word_end))
+        for line, spans in cuts.items():
+            kept = []
+            position = 0
+            for start, end in spans:
+                kept.append(lines[line][position:start])
+                position = end
+            kept.append(lines[line][position:])
+            lines[line] = re.sub(r" {2,}", " ", "".join(kept))
+        return ("\n".join(lines) if cuts else text), removed
+
+
+class BoilerplateStrippingSplitter:
+    """Text splitter that strips boilerplate from each transcript before splitting it."""
+
+    def __init__(self, splitter, stripper: BoilerplateStripper):
+        self.splitter = splitter
+        self.stripper = stripper
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return self.splitter.split_documents([
+            Document(page_content=self.stripper.strip(doc.page_content)[0], metadata=doc.metadata)
+            for doc in documents
+        ])
+
+
+def empty_boilerplate_report(stripper: BoilerplateStripper) -> Dict[str, Any]:
+    return {
+        "version": BOILERPLATE_REPORT_VERSION,
+        "settings": stripper.settings,
+        "shingles": int(len(stripper.shingles)),
+        "learned_from": stripper.learned_from,
+        "episodes": {},
+    }
+
+
+def load_boilerplate_report(path: str, stripper: BoilerplateStripper) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return empty_boilerplate_report(stripper)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable boilerplate report {path}: {e}")
+        return empty_boilerplate_report(stripper)
+    if not isinstance(report, dict) or report.get("version") != BOILERPLATE_REPORT_VERSION:
+        return empty_boilerplate_report(stripper)
+    report.setdefault("episodes", {})
+    return report
+
+
+def audit_boilerplate(report: Dict[str, Any], stripper: BoilerplateStripper, sources: List[str], deleted: List[str]):
+    """Record what stripping removes from `sources` in the report and refresh its summary."""
+    episodes = report["episodes"]
+    for source in deleted:
+        episodes.pop(source, None)
+    for source in sources:
         try:
-            content, metadata = load_transcript_with_metadata(str(transcript_file))
-            
-            # Add source path to metadata
-            metadata['source'] = str(transcript_file)
-            
-            # Create Document with content and metadata
-            doc = Document(page_content=content, metadata=metadata)
-            documents.append(doc)
-                
-        except Exception as e:
-            print(f"  ⚠️  Warning: Failed to load {transcript_file}: {e}")
+            text, _ = load_transcript_with_metadata(source)
+        except Exception:
+            episodes.pop(source, None)
             continue
-    
-    return documents
+        _, removed = stripper.strip(text)
+        if removed:
+            episodes[source] = {"words_removed": sum(len(span.split()) for span in removed), "spans": removed}
+        else:
+            episodes.pop(source, None)
 
+    spans: Dict[str, Dict[str, Any]] = {}
+    for source, entry in episodes.items():
+        for span in entry["spans"]:
+            # Variants that only differ in case or punctuation count as one span
+            key = " ".join(re.sub(r"\W+", "", word.lower()) for word in span.split())
+            summary = spans.setdefault(key, {"text": span, "words": len(span.split()), "episodes": 0})
+            summary["episodes"] += 1
+    report["episodes_stripped"] = len(episodes)
+    report["words_removed"] = sum(entry["words_removed"] for entry in episodes.values())
+    report["top_spans"] = sorted(spans.values(), key=lambda item: (-item["episodes"], -item["words"]))[:50]
 
-def main():
-    config = load_config()
-    defaults = config.get("defaults", {})
-    default_verbose = defaults.get("verbose", True)
 
-    parser = argparse.ArgumentParser(
-        description="Index Lenny's podcast transcripts into ChromaDB",
-    )
-    parser.add_argument(
-        "--verbose",
-        choices=["on", "off"],
-        default="on" if default_verbose else "off",
-        help="Verbose output (default from CONFIGS.yaml)",
-    )
-    args = parser.parse_args()
-    verbose = args.verbose == "on"
+def save_boilerplate_report(path: str, report: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
 
-    def vprint(*print_args, **print_kwargs):
-        if verbose:
-            print(*print_args, **print_kwargs)
 
-    paths = config.get("paths", {})
-    logs_dir = paths.get("logs", "logs")
-    os.makedirs(logs_dir, exist_ok=True)
-    log_file = f"{logs_dir}/index_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+def make_text_splitter(chunking: Optional[Dict[str, Any]] = None, stripper: Optional[BoilerplateStripper] = None):
+    chunking = chunking or chunking_settings({})
+    if chunking["chunker"] == "speaker_turns":
+        splitter = SpeakerTurnSplitter(chunk_size=chunking["chunk_size"])
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunking["chunk_size"],
+            chunk_overlap=chunking["chunk_overlap"],
+            length_function=len,
+        )
+    return BoilerplateStrippingSplitter(splitter, stripper) if stripper is not None else splitter
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=(
-            [logging.FileHandler(log_file), logging.StreamHandler(sys.stdout)]
-            if verbose
-            else [logging.FileHandler(log_file)]
-        ),
-    )
 
-    corpora = paths.get("corpora") or []
-    episodes_dir = "episodes"
-    if isinstance(corpora, list) and corpora:
-        first = corpora[0] or {}
-        episodes_dir = first.get("path", episodes_dir)
+_worker_text_splitter = None
 
-    vector_db_path = paths.get("vector_db", "data/chroma_db")
 
-    vprint("=" * 60)
-    vprint("LennySan RAG-o-Matic v0.6 - Indexing")
-    vprint("=" * 60)
-    vprint()
-    vprint(f"📋 Logging to: {log_file}")
-    vprint("☕ Grab a coffee - this takes 5-10 minutes")
-    vprint("💡 Your screen might dim but we'll keep working...")
-    vprint()
-    
-    logger.info("Starting indexing process")
-    logger.info(f"Log file: {log_file}")
-    
-    # Check if episodes directory exists
-    if not os.path.exists(episodes_dir):
-        print(f"❌ Error: episodes directory not found: {episodes_dir}")
-        print("Make sure you're running this from the repo root")
-        logger.error("Episodes directory not found")
-        return 1
-    
-    vprint("📚 Loading transcript documents with metadata...")
-    vprint()
-    
+def _init_split_worker(chunking: Dict[str, Any], stripper: Optional[BoilerplateStripper] = None):
+    global _worker_text_splitter
+    _worker_text_splitter = make_text_splitter(chunking, stripper)
+
+
+def _load_and_split_in_worker(file_path: str):
+    """Load + split one transcript; returns (source, chunks, load_s, split_s, error)."""
+    started = time.perf_counter()
     try:
-        documents = load_all_transcripts(episodes_dir, verbose=verbose)
+        content, metadata = load_transcript_with_metadata(file_path)
     except Exception as e:
-        print(f"❌ Error loading documents: {e}")
-        logger.error(f"Failed to load documents: {e}", exc_info=True)
-        return 1
-    
-    vprint()
-    vprint(f"✅ Loaded {len(documents)} episode transcripts")
-    logger.info(f"Successfully loaded {len(documents)} transcripts")
-    
-    # Show sample metadata from first document
-    if documents:
-        sample_meta = documents[0].metadata
-        vprint()
-        vprint("📋 Sample metadata from first episode:")
-        vprint(f"   Guest: {sample_meta.get('guest', 'N/A')}")
-        vprint(f"   Title: {sample_meta.get('title', 'N/A')}")
-        vprint(f"   Date: {sample_meta.get('publish_date', 'N/A')}")
-        vprint(f"   Keywords: {', '.join(sample_meta.get('keywords', [])[:5])}...")
-    
-    vprint()
-    vprint("✂️  Splitting into chunks...")
-    vprint("   (Preserving metadata in each chunk)")
-    
-    # Split documents into chunks (metadata is preserved in each chunk)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
+        return file_path, None, 0.0, 0.0, str(e)
+    metadata['source'] = file_path
+    loaded = time.perf_counter()
+    doc_chunks = _worker_text_splitter.split_documents([Document(page_content=content, metadata=metadata)])
+    split_seconds = time.perf_counter() - loaded
+    ids = chunk_ids_for(file_path, len(doc_chunks))
+    return file_path, list(zip(ids, doc_chunks)), loaded - started, split_seconds, None
+
+
+def iter_episode_chunks_parallel(
+    transcript_files: List[Path],
+    workers: int,
+    chunking: Dict[str, Any],
+    stats: Optional[Dict[str, "StageStats"]] = None,
+    verbose: bool = True,
+    stripper: Optional[BoilerplateStripper] = None,
+) -> Iterator[tuple[str, List[tuple[str, Document]]]]:
+    """
+    Load + split transcripts on a process pool, yielding episodes in input order.
+
+    Only workers * 4 episodes are in flight at once, so a slow consumer (the
+    embedding stage) never makes finished-but-unconsumed chunks pile up.
+    Stage times in stats are summed worker CPU time, not wall time.
+
+    Yields:
+        (source, [(chunk_id, chunk), ...]) per episode
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_split_worker,
+        initargs=(chunking, stripper),
     )
-    
-    # Show progress during splitting
-    chunks = []
-    for doc in tqdm(documents, desc="✂️  Chunking", unit="episode", disable=not verbose):
-        doc_chunks = text_splitter.split_documents([doc])
-        chunks.extend(doc_chunks)
-    
-    vprint()
-    vprint(f"✅ Created {len(chunks)} chunks (metadata preserved in each)")
-    vprint()
-    
-    vprint("🧠 Creating embeddings and indexing...")
-    vprint("=" * 60)
-    vprint("⏱️  This is the slow part (~5-10 minutes)")
-    vprint("💤 Your Mac might sleep, but the process continues")
-    vprint("📊 Processing ~{} chunks...".format(len(chunks)))
-    vprint()
-    
-    # Create embeddings using a free, local model
-    vprint("🔧 Loading embedding model (sentence-transformers)...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'batch_size': 32}  # Removed show_progress_bar - causes conflict
+    remaining = iter(transcript_files)
+    in_flight = deque(
+        executor.submit(_load_and_split_in_worker, str(path))
+        for path in islice(remaining, workers * 4)
     )
-    vprint("✅ Embedding model loaded")
-    vprint()
-    
-    # Create vector store with progress
     try:
-        vprint("💾 Building vector database...")
-        vprint("   (You'll see a progress bar for embedding generation)")
-        vprint()
-        logger.info(f"Creating vector store with {len(chunks)} chunks")
-        
-        vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=vector_db_path
+        while in_flight:
+            source, chunks, load_seconds, split_seconds, error = in_flight.popleft().result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                in_flight.append(executor.submit(_load_and_split_in_worker, str(next_path)))
+            if error is not None:
+                if verbose:
+                    tqdm.write(f"  ⚠️  Warning: Failed to load {source}: {error}")
+                logger.warning(f"Failed to load {source}: {error}")
+                continue
+            if stats is not None:
+                stats["load"].add(1, load_seconds)
+                stats["split"].add(len(chunks), split_seconds)
+            yield source, chunks
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_split_episodes(
+    transcript_files: List[Path],
+    chunking: Dict[str, Any],
+    workers: int = 1,
+    stats: Optional[Dict[str, "StageStats"]] = None,
+    verbose: bool = True,
+    stripper: Optional[BoilerplateStripper] = None,
+) -> Iterator[tuple[str, List[tuple[str, Document]]]]:
+    """Front half of the pipeline (load + split, stripping boilerplate first with a stripper), serial or on a process pool."""
+    if workers > 1 and len(transcript_files) > 1:
+        return iter_episode_chunks_parallel(
+            transcript_files, workers, chunking, stats=stats, verbose=verbose, stripper=stripper,
         )
-        
-        logger.info("Vector store created successfully")
-        
-        vprint()
-        vprint("=" * 60)
-        vprint("✅ Indexing complete!")
-        vprint("=" * 60)
-        vprint(f"   📊 Indexed {len(chunks)} chunks from {len(documents)} episodes")
-        vprint(f"   📋 Metadata preserved: guest, title, date, keywords, etc.")
-        vprint(f"   💾 Database stored in: {vector_db_path}")
-        vprint()
-        vprint("🎉 You're ready to explore!")
-        vprint()
-        vprint("Try these queries:")
-        vprint("   python explore.py 'What does Lenny say about pricing?'")
-        vprint("   python explore.py 'How do you find product-market fit?'")
-        vprint("   python explore.py 'What interview questions does Lenny ask?'")
-        vprint()
-        vprint("💡 Tip: Metadata enables rich queries like:")
-        vprint("   - Filter by guest, topic, or date range (future versions)")
-        vprint("   - See which episode an answer came from")
-        vprint("   - Track when advice was given (context matters!)")
-        vprint()
-        
-        logger.info("Indexing completed successfully")
-        return 0
-        
-    except Exception as e:
-        print()
-        print(f"❌ Error creating vector store: {e}")
+    documents = iter_transcripts(
+        transcript_files,
+        verbose=verbose,
+        stats=stats["load"] if stats is not None else None,
+    )
+    return iter_episode_chunks(
+        documents,
+        make_text_splitter(chunking, stripper),
+        stats=stats["split"] if stats is not None else None,
+    )
+
+
+# ── Embedding cache ─────────────────────────────────────────────────────────
+
+def normalize_chunk_text(text: str) -> str:
+    """Whitespace-insensitive form used for cache keys."""
+    return " ".join(text.split())
+
+
+def chunk_text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model name, hash of the normalized chunk text).
+
+    Vectors are stored as compact float16 (or float32) blobs in SQLite. Every
+    hit refreshes last_used; close() evicts the least recently used entries
+    beyond max_entries.
+    """
+
+    def __init__(self, path: str, model_name: str, dtype: str = "float16", max_entries: int = 200000):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.path = path
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max(0, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " dtype TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.conn.commit()
+
+    def get_many(self, text_hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(text_hashes))
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            placeholders = ",".join("?" for _ in part)
+            rows = self.conn.execute(
+                f"SELECT text_hash, dtype, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name, *part],
+            ).fetchall()
+            for text_hash, dtype, blob in rows:
+                found[text_hash] = np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, self.model_name, text_hash) for text_hash in found],
+            )
+            self.conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, dtype, vector, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.model_name, text_hash, self.dtype.name,
+                 np.asarray(vector, dtype=self.dtype).tobytes(), now)
+                for text_hash, vector in items.items()
+            ],
+        )
+        self.conn.commit()
+
+    def evict(self) -> int:
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self.conn.commit()
+        self.evicted += excess
+        return excess
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (
+            f"embedding cache: {self.hits:,} hits, {self.misses:,} misses "
+            f"({hit_rate:.1f}% hit rate), {self.evicted:,} evicted"
+        )
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+
+class CachedEmbeddings:
+    """Embeddings wrapper that only sends cache misses to the underlying model."""
+
+    def __init__(self, base, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def submit_documents(self, texts: List[str]):
+        """Look up hits now; start embedding the misses (possibly on worker processes)."""
+        text_hashes = [chunk_text_hash(text) for text in texts]
+        cached = self.cache.get_many(text_hashes)
+        missing = {}
+        for text_hash, text in zip(text_hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        hit_count = sum(1 for text_hash in text_hashes if text_hash in cached)
+        self.cache.hits += hit_count
+        self.cache.misses += len(texts) - hit_count
+        pending = submit_documents(self.base, list(missing.values())) if missing else None
+        return CachedEmbeddingResult(self.cache, text_hashes, cached, list(missing.keys()), pending)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.submit_documents(texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+
+class CachedEmbeddingResult:
+    """Pending cache-miss embeddings; result() stores them and returns vectors in input order."""
+
+    def __init__(self, cache: EmbeddingCache, text_hashes, cached, missing_hashes, pending):
+        self.cache = cache
+        self.text_hashes = text_hashes
+        self.cached = cached
+        self.missing_hashes = missing_hashes
+        self.pending = pending
+
+    def result(self) -> List[List[float]]:
+        if self.pending is not None:
+            fresh = dict(zip(self.missing_hashes, self.pending.result()))
+            self.cache.put_many(fresh)
+            self.cached.update(fresh)
+            self.pending = None
+        return [self.cached[text_hash] for text_hash in self.text_hashes]
+
+
+# ── Embedding model (in-process or a pool of worker processes) ──────────────
+
+def build_embeddings(model_name: str = EMBEDDING_MODEL, threads: int = 0):
+    """Load the sentence-transformers model; threads > 0 caps torch's intra-op threads."""
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'batch_size': 32}  # Removed show_progress_bar - causes conflict
+    )
+
+
+class ReadyResult:
+    """Already-computed embeddings with the same result() interface as a Future."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def submit_documents(embeddings, texts: List[str]):
+    """Start embedding texts; returns an object whose result() yields the vectors."""
+    submit = getattr(embeddings, "submit_documents", None)
+    if submit is not None:
+        return submit(texts)
+    return ReadyResult(embeddings.embed_documents(texts))
+
+
+_worker_embeddings = None
+
+
+def _init_embedding_worker(model_name: str, threads: int):
+    # Pin BLAS/OpenMP pools before torch is imported in this process
+    if threads > 0:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+    global _worker_embeddings
+    _worker_embeddings = build_embeddings(model_name, threads)
+
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+def _worker_ready(barrier) -> int:
+    # Each task holds its worker at the barrier until all of them have
+    # arrived, so every process (and its initializer) is running, not just one
+    barrier.wait()
+    return os.getpid()
+
+
+class ParallelEmbeddings:
+    """
+    Embed batches on a pool of worker processes, each loading the model once.
+
+    Each submitted batch goes to one worker; callers keep several batches in
+    flight and collect results in submission order.
+    """
+
+    def __init__(self, model_name: str, workers: int, threads_per_worker: int = 0):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        # spawn, not fork: forking a process that has touched torch can deadlock
+        self.context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=self.context,
+            initializer=_init_embedding_worker,
+            initargs=(model_name, threads_per_worker),
+        )
+
+    def warm_up(self):
+        """Block until every worker has started and loaded the model."""
+        with self.context.Manager() as manager:
+            barrier = manager.Barrier(self.workers)
+            list(self.executor.map(_worker_ready, [barrier] * self.workers))
+
+    def submit_documents(self, texts: List[str]):
+        return self.executor.submit(_embed_in_worker, texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.submit_documents(texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def worker_counts_to_try(max_workers: int) -> List[int]:
+    """1, 2, 4, ... up to max_workers (always including max_workers)."""
+    counts = []
+    count = 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def benchmark_embedding_workers(
+    texts: List[str],
+    max_workers: int,
+    threads_per_worker: int,
+    batch_size: int,
+) -> List[tuple[int, float]]:
+    """
+    Time embedding the same sample with 1…max_workers processes.
+
+    Model loading is excluded; only steady-state chunks/sec is measured.
+
+    Returns:
+        [(workers, chunks_per_sec), ...]
+    """
+    results = []
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    for workers in worker_counts_to_try(max_workers):
+        if workers == 1:
+            embeddings = build_embeddings(EMBEDDING_MODEL, threads_per_worker)
+            started = time.perf_counter()
+            for batch in batches:
+                embeddings.embed_documents(batch)
+            elapsed = time.perf_counter() - started
+        else:
+            embeddings = ParallelEmbeddings(EMBEDDING_MODEL, workers, threads_per_worker)
+            try:
+                embeddings.warm_up()
+                started = time.perf_counter()
+                futures = [embeddings.submit_documents(batch) for batch in batches]
+                for future in futures:
+                    future.result()
+                elapsed = time.perf_counter() - started
+            finally:
+                embeddings.close()
+        rate = len(texts) / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Embedding benchmark: {workers:>3} workers -> {rate:,.1f} chunks/sec")
+        results.append((workers, rate))
+    return results
+
+
+# ── Episode catalog (episode metadata stored once, not on every chunk) ──────
+
+def empty_episode_catalog() -> Dict[str, Any]:
+    return {"version": CATALOG_VERSION, "episodes": {}}
+
+
+def load_episode_catalog(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return empty_episode_catalog()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable episode catalog {path}: {e}")
+        return empty_episode_catalog()
+    if not isinstance(catalog, dict) or catalog.get("version") != CATALOG_VERSION:
+        return empty_episode_catalog()
+    catalog.setdefault("episodes", {})
+    return catalog
+
+
+def save_episode_catalog(path: str, catalog: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def iter_normalized(
+    episode_chunks: Iterable[tuple[str, List[tuple[str, Document]]]],
+    catalog: Dict[str, Any],
+) -> Iterator[tuple[str, List[tuple[str, Document]]]]:
+    """
+    Move episode-level frontmatter into the catalog and leave each chunk with
+    only its episode key plus chunk-specific fields.
+    """
+    for source, chunks in episode_chunks:
+        slug = episode_slug(source)
+        if chunks:
+            catalog["episodes"][slug] = {
+                key: value
+                for key, value in chunks[0][1].metadata.items()
+                if key not in CHUNK_METADATA_FIELDS and value is not None
+            }
+        for _, chunk in chunks:
+            metadata = {"episode": slug}
+            for key in CHUNK_METADATA_FIELDS:
+                if chunk.metadata.get(key) is not None:
+                    metadata[key] = chunk.metadata[key]
+            chunk.metadata = metadata
+        yield source, chunks
+
+
+# ── Near-duplicate chunks (MinHash + LSH) ───────────────────────────────────
+
+MINHASH_PRIME = np.uint64((1 << 61) - 1)
+MINHASH_MAX = np.uint64((1 << 32) - 1)
+DEDUP_FILENAME = "dedup.sqlite"
+
+
+def dedup_settings(index_cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    cfg = index_cfg.get("dedup", {}) or {}
+    if not cfg.get("enabled", True):
+        return None
+    num_perm = int(cfg.get("num_perm", 64))
+    bands = int(cfg.get("bands", 8))
+    if bands <= 0 or num_perm % bands:
+        raise ValueError("index.dedup.num_perm must be a multiple of index.dedup.bands")
+    return {
+        "threshold": float(cfg.get("threshold", 0.85)),
+        "num_perm": num_perm,
+        "bands": bands,
+        "shingle_words": int(cfg.get("shingle_words", 5)),
+        "min_words": int(cfg.get("min_words", 30)),
+    }
+
+
+class MinHasher:
+    """Deterministic MinHash signatures over word shingles (same seeds every run)."""
+
+    def __init__(self, num_perm: int = 64, shingle_words: int = 5, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.shingle_words = shingle_words
+
+    def words(self, text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
+
+    def signature(self, words: List[str]) -> np.ndarray:
+        k = self.shingle_words
+        shingles = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # Universal hashing; uint64 overflow wraps, which is fine for hashing
+        permuted = np.bitwise_and((hashes[:, None] * self.a + self.b) % MINHASH_PRIME, MINHASH_MAX)
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of representative chunk signatures, persisted in SQLite.
+
+    A chunk whose estimated Jaccard similarity to a representative from a
+    different episode reaches the threshold becomes an alias: it is not
+    embedded, and the representative lists the alias episodes in its
+    `aliases` metadata.
+    """
+
+    def __init__(self, path: str, settings: Dict[str, Any], reset: bool = False):
+        self.settings = settings
+        self.hasher = MinHasher(settings["num_perm"], settings["shingle_words"])
+        self.rows_per_band = settings["num_perm"] // settings["bands"]
+        self.signatures: Dict[str, tuple[str, np.ndarray]] = {}
+        self.buckets: Dict[bytes, List[str]] = {}
+        self.touched_reps = set()
+        self.aliased = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        if reset:
+            self.conn.execute("DROP TABLE IF EXISTS signatures")
+            self.conn.execute("DROP TABLE IF EXISTS aliases")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " chunk_id TEXT PRIMARY KEY, source TEXT NOT NULL, signature BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            " chunk_id TEXT PRIMARY KEY, source TEXT NOT NULL,"
+            " rep_id TEXT NOT NULL, rep_source TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS aliases_rep_source ON aliases (rep_source)")
+        self.conn.commit()
+
+    def dependents(self, sources: List[str]) -> set:
+        """Episodes with chunks aliased to chunks of `sources` (they must be re-indexed too)."""
+        found = set()
+        for start in range(0, len(sources), 500):
+            part = sources[start:start + 500]
+            placeholders = ",".join("?" for _ in part)
+            rows = self.conn.execute(
+                f"SELECT DISTINCT source FROM aliases WHERE rep_source IN ({placeholders})", part
+            ).fetchall()
+            found.update(row[0] for row in rows)
+        return found - set(sources)
+
+    def forget(self, sources: List[str]):
+        """Drop signatures and aliases owned by episodes that are being re-indexed or deleted."""
+        for start in range(0, len(sources), 500):
+            part = sources[start:start + 500]
+            placeholders = ",".join("?" for _ in part)
+            rows = self.conn.execute(
+                f"SELECT rep_id FROM aliases WHERE source IN ({placeholders})", part
+            ).fetchall()
+            self.touched_reps.update(row[0] for row in rows)
+            self.conn.execute(f"DELETE FROM aliases WHERE source IN ({placeholders})", part)
+            self.conn.execute(f"DELETE FROM signatures WHERE source IN ({placeholders})", part)
+        self.conn.commit()
+
+    def touch_all(self):
+        """Re-sync every representative's alias list (a resumed build lost track of what it touched)."""
+        self.touched_reps.update(row[0] for row in self.conn.execute("SELECT DISTINCT rep_id FROM aliases"))
+
+    def load(self):
+        for chunk_id, source, blob in self.conn.execute("SELECT chunk_id, source, signature FROM signatures"):
+            self._remember(chunk_id, source, np.frombuffer(blob, dtype=np.uint32))
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        r = self.rows_per_band
+        return [bytes([band]) + signature[band * r:(band + 1) * r].tobytes() for band in range(self.settings["bands"])]
+
+    def _remember(self, chunk_id: str, source: str, signature: np.ndarray):
+        self.signatures[chunk_id] = (source, signature)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(chunk_id)
+
+    def match(self, source: str, signature: np.ndarray) -> Optional[str]:
+        """Best representative from another episode at or above the threshold, if any."""
+        best_id, best_score = None, self.settings["threshold"]
+        seen = set()
+        for key in self._band_keys(signature):
+            for candidate in self.buckets.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                candidate_source, candidate_signature = self.signatures[candidate]
+                if candidate_source == source:
+                    continue
+                score = float(np.mean(candidate_signature == signature))
+                if score >= best_score:
+                    best_id, best_score = candidate, score
+        return best_id
+
+    def process_episode(self, source: str, chunks: List[tuple[str, Document]]) -> int:
+        """Mark near-duplicate chunks with alias_of metadata; returns how many were aliased."""
+        aliased = 0
+        for chunk_id, chunk in chunks:
+            words = self.hasher.words(chunk.page_content)
+            if len(words) < self.settings["min_words"]:
+                continue
+            signature = self.hasher.signature(words)
+            rep_id = self.match(source, signature)
+            if rep_id is None:
+                self._remember(chunk_id, source, signature)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO signatures (chunk_id, source, signature) VALUES (?, ?, ?)",
+                    (chunk_id, source, signature.tobytes()),
+                )
+                continue
+            chunk.metadata["alias_of"] = rep_id
+            self.conn.execute(
+                "INSERT OR REPLACE INTO aliases (chunk_id, source, rep_id, rep_source) VALUES (?, ?, ?, ?)",
+                (chunk_id, source, rep_id, self.signatures[rep_id][0]),
+            )
+            self.touched_reps.add(rep_id)
+            aliased += 1
+        self.conn.commit()
+        self.aliased += aliased
+        return aliased
+
+    def alias_episodes(self, rep_ids: List[str]) -> Dict[str, List[str]]:
+        """{rep_id: sorted alias episode slugs} for the given representatives."""
+        found = {rep_id: set() for rep_id in rep_ids}
+        for start in range(0, len(rep_ids), 500):
+            part = rep_ids[start:start + 500]
+            placeholders = ",".join("?" for _ in part)
+            rows = self.conn.execute(
+                f"SELECT rep_id, source FROM aliases WHERE rep_id IN ({placeholders})", part
+            ).fetchall()
+            for rep_id, alias_source in rows:
+                found[rep_id].add(episode_slug(alias_source))
+        return {rep_id: sorted(slugs) for rep_id, slugs in found.items()}
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_deduplicated(
+    episode_chunks: Iterable[tuple[str, List[tuple[str, Document]]]],
+    dedup_index: NearDuplicateIndex,
+    stats: Optional["StageStats"] = None,
+) -> Iterator[tuple[str, List[tuple[str, Document]]]]:
+    """Dedup stage: flags near-duplicate chunks so the pipeline skips embedding them."""
+    for source, chunks in episode_chunks:
+        started = time.perf_counter()
+        dedup_index.process_episode(source, chunks)
+        if stats is not None:
+            stats.add(len(chunks), time.perf_counter() - started)
+        yield source, chunks
+
+
+def sync_alias_metadata(collection, dedup_index: NearDuplicateIndex) -> int:
+    """Rewrite the `aliases` metadata of every representative whose alias set changed."""
+    rep_ids = sorted(dedup_index.touched_reps)
+    updated = 0
+    for start in range(0, len(rep_ids), 256):
+        part = rep_ids[start:start + 256]
+        alias_map = dedup_index.alias_episodes(part)
+        rows = collection.get(ids=part, include=["metadatas", "documents", "embeddings"])
+        if not rows["ids"]:
+            continue
+        metadatas = []
+        for chunk_id, metadata in zip(rows["ids"], rows["metadatas"]):
+            metadata = dict(metadata or {})
+            metadata.pop("aliases", None)
+            if alias_map.get(chunk_id):
+                metadata["aliases"] = ", ".join(alias_map[chunk_id])
+            metadatas.append(metadata)
+        # Upsert the whole row so a removed `aliases` key really disappears
+        collection.upsert(
+            ids=rows["ids"],
+            embeddings=rows["embeddings"],
+            documents=rows["documents"],
+            metadatas=metadatas,
+        )
+        updated += len(rows["ids"])
+    return updated
+
+
+# ── Streaming index pipeline ────────────────────────────────────────────────
+
+class StageStats:
+    """Item count and wall time spent inside one pipeline stage."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.seconds = 0.0
+
+    def add(self, items: int, seconds: float):
+        self.items += items
+        self.seconds += seconds
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.name:<7} {self.items:>8,} {self.unit}s in {self.seconds:8.2f}s "
+            f"({self.rate:,.1f} {self.unit}s/sec)"
+        )
+
+
+def new_pipeline_stats() -> Dict[str, StageStats]:
+    return {
+        "load": StageStats("load", "episode"),
+        "split": StageStats("split", "chunk"),
+        "dedup": StageStats("dedup", "chunk"),
+        "embed": StageStats("embed", "chunk"),
+        "upsert": StageStats("upsert", "chunk"),
+    }
+
+
+def chroma_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Chroma rejects None metadata values, so drop them."""
+    return {key: value for key, value in metadata.items() if value is not None}
+
+
+def hnsw_settings(config: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Chroma's HNSW parameters from retrieval.hnsw (defaults are Chroma's own).
+
+    M and construction_ef shape the graph and only take effect on a full
+    rebuild; search_ef can change on an existing collection.
+    """
+    cfg = (config.get("retrieval", {}) or {}).get("hnsw", {}) or {}
+    settings = {}
+    for key, default in HNSW_DEFAULTS.items():
+        try:
+            value = int(cfg.get(key, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"retrieval.hnsw.{key} must be an integer, got '{cfg.get(key)}'")
+        if value < 2:
+            raise ValueError(f"retrieval.hnsw.{key} must be at least 2, got {value}")
+        settings[key] = value
+    return settings
+
+
+def hnsw_build_settings(hnsw: Dict[str, int]) -> Dict[str, int]:
+    return {"M": hnsw["M"], "construction_ef": hnsw["construction_ef"]}
+
+
+def apply_search_ef(collection, search_ef: int) -> bool:
+    """Set ef_search on an existing collection; True if it changed."""
+    current = ((collection.configuration or {}).get("hnsw") or {}).get("ef_search")
+    if current == search_ef:
+        return False
+    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    return True
+
+
+def open_collection(vector_db_path: str, reset: bool = False, hnsw: Optional[Dict[str, int]] = None):
+    """
+    Open (or create) the collection explore.py reads.
+
+    LangChain's Chroma wrapper uses the "langchain" collection by default, so we
+    write there directly with precomputed embeddings. A new collection gets the
+    HNSW parameters in `hnsw`; an existing one keeps its graph and only picks
+    up search_ef.
+    """
+    hnsw = hnsw or hnsw_settings({})
+    client = chromadb.PersistentClient(path=vector_db_path)
+    if reset:
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass  # nothing to reset
+    collection = client.get_or_create_collection(
+        COLLECTION_NAME,
+        configuration={"hnsw": {
+            "max_neighbors": hnsw["M"],
+            "ef_construction": hnsw["construction_ef"],
+            "ef_search": hnsw["search_ef"],
+        }},
+    )
+    apply_search_ef(collection, hnsw["search_ef"])
+    return collection
+
+
+def episode_row_ranges(sorted_ids: List[str]) -> Dict[str, List[int]]:
+    """
+    {slug: [first_row, end_row]} for IDs sorted as the numpy backend stores them.
+
+    Every ID is "<slug>::<n>", so one episode's rows are always contiguous;
+    explore.py uses the ranges to search only shortlisted episodes.
+    """
+    ranges: Dict[str, List[int]] = {}
+    for row, chunk_id in enumerate(sorted_ids):
+        slug = chunk_id.split("::", 1)[0]
+        if slug in ranges:
+            ranges[slug][1] = row + 1
+        else:
+            ranges[slug] = [row, row + 1]
+    return ranges
+
+
+# ── Vector storage (float16 / int8 / PCA for the numpy backend) ────────────
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+PCA_SAMPLE_ROWS = 50000
+COMPACT_BLOCK_ROWS = 65536
+
+
+def vector_storage_settings(index_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    cfg = index_cfg.get("vectors", {}) or {}
+    dtype = cfg.get("dtype", "float32")
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unknown index.vectors.dtype '{dtype}' (expected one of: {', '.join(VECTOR_DTYPES)})")
+    pca_dim = int(cfg.get("pca_dim", 0) or 0)
+    if pca_dim < 0:
+        raise ValueError("index.vectors.pca_dim must be 0 (off) or a positive dimension")
+    return {"dtype": dtype, "pca_dim": pca_dim}
+
+
+def quantization_scale(matrix: np.ndarray) -> np.ndarray:
+    """Per-dimension int8 scale: the largest magnitude in each column maps to 127."""
+    peak = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), COMPACT_BLOCK_ROWS):
+        peak = np.maximum(peak, np.abs(np.asarray(matrix[start:start + COMPACT_BLOCK_ROWS])).max(axis=0))
+    return np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+
+
+def encode_vectors(block: np.ndarray, dtype: str, scale: Optional[np.ndarray]) -> np.ndarray:
+    if dtype == "int8":
+        return np.clip(np.rint(block / scale), -127, 127).astype(np.int8)
+    return block.astype(dtype)
+
+
+def fit_pca(matrix: np.ndarray, dim: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """(mean, components [dim, full dim]) of the rows, fitted on at most PCA_SAMPLE_ROWS of them."""
+    rows = len(matrix)
+    if rows > PCA_SAMPLE_ROWS:
+        sample = np.sort(np.random.RandomState(seed).choice(rows, PCA_SAMPLE_ROWS, replace=False))
+        matrix = matrix[sample]
+    matrix = np.asarray(matrix, dtype=np.float32)
+    mean = matrix.mean(axis=0)
+    _, _, components = np.linalg.svd(matrix - mean, full_matrices=False)
+    return mean.astype(np.float32), components[:dim].astype(np.float32)
+
+
+class NumpyVectorStore:
+    """
+    Single-file, memory-mappable vector index (the `numpy` retrieval backend).
+
+    Layout of the index directory:
+      index.json             descriptor: generation, rows, dim, file names
+      vectors-<gen>.npy      [rows, dim], L2-normalized, sorted by chunk ID; float32,
+                             float16 or int8 (index.vectors.dtype)
+      quant-<gen>.npz        int8 per-dimension scales and the PCA projection, if any
+      master-<gen>.npy       float16 copy of the rows of an int8 store; each compaction
+                             re-encodes from it, so quantization error doesn't compound
+      search-<gen>.npy       [rows, pca_dim] PCA-reduced copy that queries scan first
+                             (index.vectors.pca_dim), rescored against vectors-<gen>
+      chunks-<gen>.jsonl     one {"id", "text", "metadata"} line per row
+      offsets-<gen>.npy      int64 [rows + 1] byte offsets into the JSONL file
+      pending.f32/.jsonl     append-only log of upserts/deletes since the last compaction
+
+    Writes go to the pending log (so a batch is durable as soon as it is written,
+    like a Chroma upsert) and close() compacts everything into a new generation
+    that readers pick up by re-reading index.json. Implements the slice of the
+    Chroma collection API the indexer uses: upsert, delete, get, count.
+    """
+
+    def __init__(self, path: str, reset: bool = False, storage: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.storage = storage or vector_storage_settings({})
+        os.makedirs(path, exist_ok=True)
+        if reset:
+            for name in os.listdir(path):
+                if name == "index.json" or name.startswith(
+                    ("vectors-", "quant-", "search-", "master-", "chunks-", "offsets-", "pending.")
+                ):
+                    os.remove(os.path.join(path, name))
+        self.descriptor = self._read_descriptor()
+        self.generation = self.descriptor.get("generation", 0)
+        self.dim = self.descriptor.get("dim")
+        # chunk_id -> ("base", row) | ("pending", row, text, metadata)
+        self.rows: Dict[str, tuple] = {}
+        self.base_vectors = None
+        self.base_scale = None
+        self.base_master = None
+        self.base_offsets = None
+        self.base_chunks = None
+        if self.descriptor.get("rows"):
+            self._open_base(self.descriptor)
+            for row in range(self.descriptor["rows"]):
+                self.rows[self._base_record(row)["id"]] = ("base", row)
+        self.pending_vectors: List[np.ndarray] = []
+        self.dirty = False
+        self._vector_log = None
+        self._record_log = None
+        if self._replay_pending():
+            # Fold recovered writes into a clean generation so log rows line up again
+            self.compact()
+        self._open_logs()
+
+    def _open_logs(self):
+        self._vector_log = open(self._file("pending.f32"), "ab")
+        self._record_log = open(self._file("pending.jsonl"), "a", encoding="utf-8")
+
+    def _close_logs(self):
+        for log in (self._vector_log, self._record_log):
+            if log is not None:
+                log.close()
+        self._vector_log = self._record_log = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_descriptor(self) -> Dict[str, Any]:
+        try:
+            with open(self._file("index.json"), "r", encoding="utf-8") as f:
+                descriptor = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if descriptor.get("format") != NUMPY_INDEX_FORMAT:
+            raise ValueError(f"Unsupported numpy index format in {self.path}; rebuild with --full")
+        return descriptor
+
+    def _open_base(self, descriptor: Dict[str, Any]):
+        self.base_vectors = np.load(self._file(descriptor["vectors"]), mmap_mode="r")
+        self.base_offsets = np.load(self._file(descriptor["offsets"]), mmap_mode="r")
+        self.base_chunks = open(self._file(descriptor["chunks"]), "rb")
+        self.base_scale = None
+        master = (descriptor.get("storage") or {}).get("master")
+        self.base_master = np.load(self._file(master), mmap_mode="r") if master else None
+        quant = (descriptor.get("storage") or {}).get("quant")
+        if quant:
+            with np.load(self._file(quant)) as data:
+                self.base_scale = data["scale"] if "scale" in data.files else None
+
+    def _base_vector(self, row: int) -> np.ndarray:
+        """A compacted row as float32: from the master copy of an int8 store, else the stored row."""
+        if self.base_master is not None:
+            return np.asarray(self.base_master[row], dtype=np.float32)
+        vector = np.asarray(self.base_vectors[row], dtype=np.float32)
+        return vector * self.base_scale if self.base_scale is not None else vector
+
+    def _base_is_exact(self) -> bool:
+        """Whether _base_vector returns rows exactly as they were normalized (no int8 round trip)."""
+        return self.base_master is not None or self.base_scale is None
+
+    def _base_record(self, row: int) -> Dict[str, Any]:
+        start, end = int(self.base_offsets[row]), int(self.base_offsets[row + 1])
+        self.base_chunks.seek(start)
+        return json.loads(self.base_chunks.read(end - start))
+
+    def _replay_pending(self) -> bool:
+        """Re-apply writes from a run that died before compacting."""
+        records_path = self._file("pending.jsonl")
+        if not os.path.exists(records_path):
+            return False
+        records = []
+        with open(records_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # torn final line from a crash
+        if not records:
+            return False
+        dims = {record["dim"] for record in records if record.get("op") == "upsert"}
+        self.dim = self.dim or (dims.pop() if dims else None)
+        vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+        if self.dim and os.path.exists(self._file("pending.f32")):
+            vectors = np.fromfile(self._file("pending.f32"), dtype=np.float32)
+            vectors = vectors[: len(vectors) // self.dim * self.dim].reshape(-1, self.dim)
+        for record in records:
+            if record["op"] == "delete":
+                self.rows.pop(record["id"], None)
+            elif record["row"] < len(vectors):
+                self.pending_vectors.append(vectors[record["row"]])
+                self.rows[record["id"]] = ("pending", len(self.pending_vectors) - 1, record["text"], record["metadata"])
+        logger.info(f"Replayed {len(records)} pending writes into {self.path}")
+        return True
+
+    def count(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+        first_row = len(self.pending_vectors)
+        self._vector_log.write(vectors.tobytes())
+        self._vector_log.flush()
+        for offset, (chunk_id, vector, text, metadata) in enumerate(zip(ids, vectors, documents, metadatas)):
+            row = first_row + offset
+            self.pending_vectors.append(vector)
+            self.rows[chunk_id] = ("pending", row, text, metadata)
+            self._record_log.write(json.dumps({
+                "op": "upsert", "id": chunk_id, "row": row, "dim": self.dim,
+                "text": text, "metadata": metadata,
+            }, ensure_ascii=False) + "\n")
+        self._record_log.flush()
+        self.dirty = True
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            if self.rows.pop(chunk_id, None) is not None:
+                self._record_log.write(json.dumps({"op": "delete", "id": chunk_id}) + "\n")
+                self.dirty = True
+        self._record_log.flush()
+
+    def _row(self, chunk_id: str):
+        """(vector, text, metadata) for a live chunk."""
+        entry = self.rows[chunk_id]
+        if entry[0] == "base":
+            record = self._base_record(entry[1])
+            return self._base_vector(entry[1]), record["text"], record["metadata"]
+        return self.pending_vectors[entry[1]], entry[2], entry[3]
+
+    def get(self, ids, include=("metadatas", "documents")):
+        found = [chunk_id for chunk_id in ids if chunk_id in self.rows]
+        rows = [self._row(chunk_id) for chunk_id in found]
+        result: Dict[str, Any] = {"ids": found}
+        if "embeddings" in include:
+            result["embeddings"] = [np.array(vector) for vector, _, _ in rows]
+        if "documents" in include:
+            result["documents"] = [text for _, text, _ in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [metadata for _, _, metadata in rows]
+        return result
+
+    def query(self, query_embeddings, n_results: int = 10):
+        """Cosine top-n over the compacted matrix (Chroma-shaped result; used to validate builds)."""
+        if self.dirty:
+            self.compact()
+        ids = sorted(self.rows)
+        results: Dict[str, Any] = {"ids": [], "distances": []}
+        for query_vector in query_embeddings:
+            if not ids:
+                results["ids"].append([])
+                results["distances"].append([])
+                continue
+            query_vector = np.asarray(query_vector, dtype=np.float32)
+            query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+            if self.base_scale is not None:
+                # int8 rows times (scale * query) == dequantized rows times query
+                query_vector = query_vector * self.base_scale
+            scores = np.asarray(self.base_vectors @ query_vector, dtype=np.float32)
+            rows = np.argsort(-scores)[:n_results]
+            results["ids"].append([ids[row] for row in rows])
+            results["distances"].append([float(1.0 - scores[row]) for row in rows])
+        return results
+
+    def compact(self):
+        """Write live rows as a new generation and atomically switch index.json to it."""
+        generation = self.generation + 1
+        ids = sorted(self.rows)
+        names = {
+            "vectors": f"vectors-{generation}.npy",
+            "chunks": f"chunks-{generation}.jsonl",
+            "offsets": f"offsets-{generation}.npy",
+        }
+        dim = self.dim or 0
+        dtype = self.storage["dtype"]
+        compressed = dtype != "float32" or self.storage["pca_dim"] > 0
+        # Full-precision rows first; a compressed store is encoded from them below
+        full_path = self._file(f"vectors-{generation}.f32.npy" if compressed else names["vectors"])
+        matrix = np.lib.format.open_memmap(full_path, mode="w+", dtype=np.float32, shape=(len(ids), dim))
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        # Rows already compacted are copied as they are: renormalizing (or
+        # re-encoding) the previous generation's output every run compounds error
+        exact_base = self._base_is_exact()
+        with open(self._file(names["chunks"]), "wb") as f:
+            for row, chunk_id in enumerate(ids):
+                vector, text, metadata = self._row(chunk_id)
+                if self.rows[chunk_id][0] == "pending" or not exact_base:
+                    norm = float(np.linalg.norm(vector))
+                    vector = vector / norm if norm > 0 else vector
+                matrix[row] = vector
+                f.write(json.dumps(
+                    {"id": chunk_id, "text": text, "metadata": metadata}, ensure_ascii=False
+                ).encode("utf-8") + b"\n")
+                offsets[row + 1] = f.tell()
+        matrix.flush()
+        np.save(self._file(names["offsets"]), offsets)
+        storage = {"dtype": dtype, "pca_dim": 0, "quant": None, "search": None, "master": None}
+        if compressed:
+            storage.update(self._write_compressed(matrix, generation, names))
+        del matrix
+        if compressed:
+            os.remove(full_path)
+
+        descriptor = {
+            "format": NUMPY_INDEX_FORMAT,
+            "generation": generation,
+            "rows": len(ids),
+            "dim": dim,
+            "embedding_model": EMBEDDING_MODEL,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "episodes": episode_row_ranges(ids),
+            "storage": storage,
+            **names,
+        }
+        tmp_path = self._file("index.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(descriptor, f, indent=2)
+        os.replace(tmp_path, self._file("index.json"))
+
+        # Readers that already mapped the old generation keep their open handles
+        old_storage = self.descriptor.get("storage") or {}
+        old_names = [self.descriptor.get(key) for key in ("vectors", "chunks", "offsets")]
+        old_names += [old_storage.get("quant"), old_storage.get("search"), old_storage.get("master")]
+        self.descriptor, self.generation = descriptor, generation
+        if self.base_chunks is not None:
+            self.base_chunks.close()
+        for name in filter(None, old_names):
+            try:
+                os.remove(self._file(name))
+            except OSError:
+                pass
+        self._close_logs()
+        for name in ("pending.f32", "pending.jsonl"):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        # Later writes read from the new generation
+        self.rows = {chunk_id: ("base", row) for row, chunk_id in enumerate(ids)}
+        self.pending_vectors = []
+        if ids:
+            self._open_base(descriptor)
+        else:
+            self.base_vectors = self.base_scale = self.base_master = self.base_offsets = self.base_chunks = None
+        self.dirty = False
+
+    def _write_compressed(self, matrix: np.ndarray, generation: int, names: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Encode the float32 rows as the configured dtype (plus a PCA-reduced
+        search matrix) block by block; returns the descriptor's storage entry.
+        """
+        dtype = self.storage["dtype"]
+        rows, dim = matrix.shape
+        quant: Dict[str, np.ndarray] = {}
+        scale = quantization_scale(matrix) if dtype == "int8" and rows else None
+        master_name = None
+        if scale is not None:
+            quant["scale"] = scale
+            # int8 codes can't be decoded back to these rows, so keep them for the next compaction
+            master_name = f"master-{generation}.npy"
+            master = np.lib.format.open_memmap(
+                self._file(master_name), mode="w+", dtype=np.float16, shape=(rows, dim)
+            )
+            for start in range(0, rows, COMPACT_BLOCK_ROWS):
+                master[start:start + COMPACT_BLOCK_ROWS] = np.asarray(matrix[start:start + COMPACT_BLOCK_ROWS])
+            master.flush()
+            del master
+        stored = np.lib.format.open_memmap(self._file(names["vectors"]), mode="w+", dtype=dtype, shape=(rows, dim))
+        for start in range(0, rows, COMPACT_BLOCK_ROWS):
+            stored[start:start + COMPACT_BLOCK_ROWS] = encode_vectors(
+                np.asarray(matrix[start:start + COMPACT_BLOCK_ROWS]), dtype, scale,
+            )
+        stored.flush()
+        del stored
+
+        pca_dim = min(self.storage["pca_dim"], dim, rows)
+        search_name = None
+        if pca_dim > 0:
+            mean, components = fit_pca(matrix, pca_dim)
+            # Scores only need to rank rows, so the constant mean·query term is dropped
+            projected = np.lib.format.open_memmap(
+                self._file(f"search-{generation}.f32.npy"), mode="w+", dtype=np.float32, shape=(rows, pca_dim)
+            )
+            for start in range(0, rows, COMPACT_BLOCK_ROWS):
+                projected[start:start + COMPACT_BLOCK_ROWS] = (
+                    (np.asarray(matrix[start:start + COMPACT_BLOCK_ROWS]) - mean) @ components.T
+                )
+            search_scale = quantization_scale(projected) if dtype == "int8" else None
+            search_name = f"search-{generation}.npy"
+            search = np.lib.format.open_memmap(self._file(search_name), mode="w+", dtype=dtype, shape=(rows, pca_dim))
+            for start in range(0, rows, COMPACT_BLOCK_ROWS):
+                search[start:start + COMPACT_BLOCK_ROWS] = encode_vectors(
+                    np.asarray(projected[start:start + COMPACT_BLOCK_ROWS]), dtype, search_scale,
+                )
+            search.flush()
+            del search, projected
+            os.remove(self._file(f"search-{generation}.f32.npy"))
+            quant.update(mean=mean, components=components)
+            if search_scale is not None:
+                quant["search_scale"] = search_scale
+
+        quant_name = None
+        if quant:
+            quant_name = f"quant-{generation}.npz"
+            with open(self._file(quant_name), "wb") as f:
+                np.savez(f, **quant)
+        return {"dtype": dtype, "pca_dim": pca_dim, "quant": quant_name, "search": search_name, "master": master_name}
+
+    def close(self):
+        if self.dirty or not self.descriptor:
+            self.compact()
+        self._close_logs()
+        for name in ("pending.f32", "pending.jsonl"):
+            # Nothing was written since the last compaction, so the logs are empty
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        if self.base_chunks is not None:
+            self.base_chunks.close()
+            self.base_chunks = None
+
+
+def open_vector_store(backend: str, path: str, reset: bool = False, storage: Optional[Dict[str, Any]] = None,
+                      hnsw: Optional[Dict[str, int]] = None):
+    """The write target for the configured retrieval backend (storage only applies to numpy, hnsw to chroma)."""
+    if backend == "numpy":
+        return NumpyVectorStore(path, reset=reset, storage=storage)
+    return open_collection(path, reset=reset, hnsw=hnsw)
+
+
+# ── Time shards (chunks partitioned by publish_date) ────────────────────────
+
+def shard_for_date(publish_date: Any, scheme: str) -> str:
+    """"2024" (year) or "2024-q1" (quarter) for a publish_date; UNDATED_SHARD if it has none."""
+    match = re.match(r"(\d{4})-(\d{2})", str(publish_date or ""))
+    if not match:
+        return UNDATED_SHARD
+    year, month = match.groups()
+    if scheme == "year":
+        return year
+    return f"{year}-q{(int(month) - 1) // 3 + 1}"
+
+
+def shard_bounds(name: str) -> tuple[Optional[str], Optional[str]]:
+    """First and last publish_date a shard can hold (inclusive ISO dates)."""
+    if name == UNDATED_SHARD:
+        return None, None
+    year = name[:4]
+    if "-q" not in name:
+        return f"{year}-01-01", f"{year}-12-31"
+    quarter = int(name[-1])
+    last_month = quarter * 3
+    last_day = 31 if last_month in (3, 12) else 30
+    return f"{year}-{last_month - 2:02d}-01", f"{year}-{last_month:02d}-{last_day}"
+
+
+def index_shard_scheme(index_cfg: Dict[str, Any]) -> str:
+    scheme = str(index_cfg.get("shards", "none") or "none").lower()
+    if scheme not in SHARD_SCHEMES:
+        raise ValueError(f"Unknown index.shards '{scheme}' (expected one of: {', '.join(SHARD_SCHEMES)})")
+    return scheme
+
+
+class ShardedVectorStore:
+    """
+    One vector store per time shard under a build's store directory
+    (<store>/<shard>/), routed by the chunk's episode publish_date.
+
+    Presents the same upsert/delete/get/count/query surface as a single
+    store, so the pipeline, dedup and validation code don't know about
+    shards. Only shards that received writes are rewritten on close, which
+    is what keeps incremental numpy builds cheap. close() writes shards.json,
+    which tells explore.py the date range each shard covers.
+    """
+
+    def __init__(self, backend: str, path: str, scheme: str, shard_of, reset: bool = False,
+                 storage: Optional[Dict[str, Any]] = None, hnsw: Optional[Dict[str, int]] = None):
+        self.backend = backend
+        self.storage = storage
+        self.hnsw = hnsw
+        self.path = path
+        self.scheme = scheme
+        self.shard_of = shard_of
+        if reset:
+            shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+        self.stores: Dict[str, Any] = {}
+        self.location: Dict[str, str] = {}
+        for name in sorted(os.listdir(path)):
+            if os.path.isdir(os.path.join(path, name)):
+                store = self._store(name)
+                ids = list(store.rows) if isinstance(store, NumpyVectorStore) else store.get(include=[])["ids"]
+                self.location.update((chunk_id, name) for chunk_id in ids)
+
+    def _store(self, name: str):
+        if name not in self.stores:
+            self.stores[name] = open_vector_store(
+                self.backend, os.path.join(self.path, name), storage=self.storage, hnsw=self.hnsw,
+            )
+        return self.stores[name]
+
+    def _by_shard(self, ids) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for chunk_id in ids:
+            if chunk_id in self.location:
+                groups.setdefault(self.location[chunk_id], []).append(chunk_id)
+        return groups
+
+    def count(self) -> int:
+        return len(self.location)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        groups: Dict[str, List[int]] = {}
+        moved = []
+        for i, metadata in enumerate(metadatas):
+            name = self.shard_of((metadata or {}).get("episode", ""))
+            groups.setdefault(name, []).append(i)
+            if self.location.get(ids[i], name) != name:
+                moved.append(ids[i])
+        # An episode whose publish_date changed moves shards; drop its old copies
+        if moved:
+            self.delete(moved)
+        for name, rows in groups.items():
+            self._store(name).upsert(
+                ids=[ids[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows],
+                documents=[documents[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows],
+            )
+            self.location.update((ids[i], name) for i in rows)
+
+    def delete(self, ids):
+        for name, part in self._by_shard(ids).items():
+            self.stores[name].delete(ids=part)
+            for chunk_id in part:
+                self.location.pop(chunk_id, None)
+
+    def get(self, ids, include=("metadatas", "documents")):
+        result: Dict[str, Any] = {"ids": []}
+        for key in include:
+            result[key] = []
+        for name, part in self._by_shard(ids).items():
+            found = self.stores[name].get(ids=part, include=list(include))
+            result["ids"].extend(found["ids"])
+            for key in include:
+                result[key].extend(found[key])
+        return result
+
+    def query(self, query_embeddings, n_results: int = 10):
+        """Top-n across every shard (used to validate builds)."""
+        results: Dict[str, Any] = {"ids": [], "distances": []}
+        for query_vector in query_embeddings:
+            hits = []
+            for store in self.stores.values():
+                if store.count() == 0:
+                    continue
+                found = store.query(query_embeddings=[query_vector], n_results=n_results)
+                hits.extend(zip(found["distances"][0], found["ids"][0]))
+            hits.sort()
+            results["ids"].append([chunk_id for _, chunk_id in hits[:n_results]])
+            results["distances"].append([distance for distance, _ in hits[:n_results]])
+        return results
+
+    def close(self):
+        counts: Dict[str, int] = {}
+        for name in self.location.values():
+            counts[name] = counts.get(name, 0) + 1
+        for store in self.stores.values():
+            close_vector_store(store)
+        shards = {}
+        for name in sorted(self.stores):
+            start, end = shard_bounds(name)
+            shards[name] = {"start": start, "end": end, "chunks": counts.get(name, 0)}
+        tmp_path = os.path.join(self.path, f"{SHARDS_FILENAME}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"scheme": self.scheme, "shards": shards}, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, SHARDS_FILENAME))
+
+
+# ── Corpora (one index per entry in paths.corpora) ─────────────────────────
+
+def select_corpora(corpora: List[Dict[str, Any]], selector: str) -> List[Dict[str, Any]]:
+    """'all' or a comma-separated list of corpus names."""
+    if selector == "all":
+        return corpora
+    names = [name.strip() for name in selector.split(",") if name.strip()]
+    unknown = [name for name in names if name not in {corpus["name"] for corpus in corpora}]
+    if unknown or not names:
+        known = ", ".join(corpus["name"] for corpus in corpora)
+        raise ValueError(f"Unknown corpus '{', '.join(unknown) or selector}' (configured: {known}, or 'all')")
+    return [corpus for corpus in corpora if corpus["name"] in names]
+
+
+def corpus_indexes_dir(indexes_root: str, corpus: Dict[str, Any]) -> str:
+    return os.path.join(indexes_root, corpus["name"])
+
+
+# ── Blue/green index builds ─────────────────────────────────────────────────
+
+def build_layout(build_dir: str, backend: str) -> Dict[str, str]:
+    """Where one build keeps its vector store and the artifacts that describe it."""
+    return {
+        "dir": build_dir,
+        "store": os.path.join(build_dir, STORE_DIRNAMES[backend]),
+        "manifest": os.path.join(build_dir, MANIFEST_FILENAME),
+        "catalog": os.path.join(build_dir, CATALOG_FILENAME),
+        "dedup": os.path.join(build_dir, DEDUP_FILENAME),
+        "bm25": os.path.join(build_dir, BM25_FILENAME),
+        "centroids": os.path.join(build_dir, CENTROIDS_FILENAME),
+        "boilerplate": os.path.join(build_dir, BOILERPLATE_FILENAME),
+        "boilerplate_report": os.path.join(build_dir, BOILERPLATE_REPORT_FILENAME),
+        "info": os.path.join(build_dir, INDEX_INFO_FILENAME),
+    }
+
+
+def legacy_layout(paths: Dict[str, Any], backend: str) -> Dict[str, str]:
+    """The pre-versioned layout: one store written in place under data/."""
+    vector_db_path = paths.get("vector_db", "data/chroma_db")
+    store = paths.get("numpy_index", "data/numpy_index") if backend == "numpy" else vector_db_path
+    return {
+        "dir": None,
+        "store": store,
+        "manifest": manifest_path_for(vector_db_path),
+        "catalog": index_artifact_path(vector_db_path, CATALOG_FILENAME),
+        "dedup": index_artifact_path(vector_db_path, DEDUP_FILENAME),
+        "bm25": None,
+        "centroids": None,
+        "boilerplate": None,
+        "boilerplate_report": None,
+        "info": None,
+    }
+
+
+def write_build_pointer(indexes_dir: str, pointer: str, build_id: str):
+    """Rewrite a pointer file (CURRENT or BUILDING); os.replace makes the switch atomic."""
+    path = os.path.join(indexes_dir, pointer)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(build_id + "\n")
+    os.replace(tmp_path, path)
+
+
+def clear_build_pointer(indexes_dir: str, pointer: str):
+    try:
+        os.remove(os.path.join(indexes_dir, pointer))
+    except FileNotFoundError:
+        pass
+
+
+def read_current_build(indexes_dir: str) -> Optional[str]:
+    return read_build_pointer(indexes_dir, CURRENT_POINTER)
+
+
+def write_current_build(indexes_dir: str, build_id: str):
+    """Point readers at a build."""
+    write_build_pointer(indexes_dir, CURRENT_POINTER, build_id)
+
+
+def load_index_info(build_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(build_dir, INDEX_INFO_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index_info(build_dir: str, info: Dict[str, Any]):
+    path = os.path.join(build_dir, INDEX_INFO_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def current_layout(indexes_dir: str, paths: Dict[str, Any], backend: str,
+                   inherit_from: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Layout of the build readers currently see, if any.
+
+    With inherit_from (the primary corpus), a corpus that has no build of its
+    own yet falls back to the single-corpus build directly under
+    inherit_from, then to the legacy index.
+    """
+    for directory in filter(None, (indexes_dir, inherit_from)):
+        build_id = read_current_build(directory)
+        if build_id:
+            build_dir = os.path.join(directory, build_id)
+            info = load_index_info(build_dir)
+            return build_layout(build_dir, info.get("backend", backend))
+    if inherit_from is None:
+        return None
+    legacy = legacy_layout(paths, backend)
+    if os.path.exists(legacy["manifest"]) and os.path.exists(legacy["store"]):
+        return legacy
+    return None
+
+
+def list_builds(indexes_dir: str) -> List[tuple[str, Dict[str, Any]]]:
+    """(build_id, index_info) for every build directory, oldest first."""
+    if not os.path.isdir(indexes_dir):
+        return []
+    return [
+        (name, load_index_info(os.path.join(indexes_dir, name)))
+        for name in sorted(os.listdir(indexes_dir))
+        # Per-corpus directories sit next to pre-multi-corpus builds; builds have index_info.json
+        if os.path.exists(os.path.join(indexes_dir, name, INDEX_INFO_FILENAME))
+    ]
+
+
+def new_build_id(indexes_dir: str) -> str:
+    build_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    candidate, suffix = build_id, 2
+    while os.path.exists(os.path.join(indexes_dir, candidate)):
+        candidate, suffix = f"{build_id}-{suffix}", suffix + 1
+    return candidate
+
+
+def seed_build(source: Dict[str, str], target: Dict[str, str]):
+    """Copy the current store and its artifacts so an incremental build starts from them."""
+    if os.path.isdir(source["store"]):
+        shutil.copytree(source["store"], target["store"])
+    for key in ("manifest", "catalog", "dedup", "bm25", "centroids", "boilerplate", "boilerplate_report"):
+        if source.get(key) and os.path.exists(source[key]):
+            shutil.copy2(source[key], target[key])
+
+
+def stored_chunk_count(manifest: Dict[str, Any]) -> Optional[int]:
+    """Rows the store should hold according to the manifest (None for old manifests)."""
+    total = 0
+    for entry in manifest["episodes"].values():
+        if "stored_chunks" not in entry:
+            return None
+        total += entry["stored_chunks"]
+    return total
+
+
+def validate_build(collection, manifest: Dict[str, Any], embeddings) -> tuple[bool, str]:
+    """Row count matches the manifest and a smoke query returns a chunk."""
+    count = collection.count()
+    expected = stored_chunk_count(manifest)
+    if count == 0:
+        return False, "index is empty"
+    if expected is not None and count != expected:
+        return False, f"index holds {count} chunks, manifest expects {expected}"
+    hits = collection.query(query_embeddings=[embeddings.embed_query(SMOKE_QUERY)], n_results=3)
+    if not hits["ids"] or not hits["ids"][0]:
+        return False, "smoke query returned no chunks"
+    if isinstance(collection, LexicalMirror) and collection.lexical.count() != count:
+        return False, f"BM25 index holds {collection.lexical.count()} chunks, vector store {count}"
+    return True, f"{count} chunks, smoke query top hit {hits['ids'][0][0]}"
+
+
+def prune_builds(indexes_dir: str, keep: int) -> List[str]:
+    """Delete all but the newest `keep` builds; the current and any in-progress build are always kept."""
+    build_ids = [build_id for build_id, _ in list_builds(indexes_dir)]
+    keep_ids = set(build_ids[-max(1, keep):]) | {
+        read_current_build(indexes_dir),
+        read_build_pointer(indexes_dir, BUILDING_POINTER),
+    }
+    removed = []
+    for build_id in build_ids:
+        if build_id not in keep_ids:
+            shutil.rmtree(os.path.join(indexes_dir, build_id), ignore_errors=True)
+            removed.append(build_id)
+    return removed
+
+
+def rollback_build(indexes_dir: str, target: Optional[str] = None) -> str:
+    """Switch CURRENT to `target`, or to the newest validated build before the current one."""
+    builds = list_builds(indexes_dir)
+    current = read_current_build(indexes_dir)
+    if target is None:
+        older = [
+            build_id for build_id, info in builds
+            if info.get("status") == "validated" and (current is None or build_id < current)
+        ]
+        if not older:
+            raise ValueError("no earlier validated build to roll back to")
+        target = older[-1]
+    elif target not in dict(builds):
+        raise ValueError(f"unknown build '{target}'")
+    write_current_build(indexes_dir, target)
+    return target
+
+
+# ── Checkpoints (resumable builds) ──────────────────────────────────────────
+
+def chunk_fingerprint(chunk: Document) -> str:
+    """Identifies exactly what was written for a chunk ID (text and metadata)."""
+    payload = json.dumps([chunk.page_content, chroma_metadata(chunk.metadata)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BuildCheckpoint:
+    """
+    Durable record of the chunks a build has already written to its store.
+
+    One row per chunk ID with a fingerprint of what was written, committed
+    right after each batch lands. A resumed build skips chunks whose
+    fingerprint still matches, so nothing that made it to disk is embedded
+    twice (even with the embedding cache disabled).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS written ("
+            "chunk_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.skipped = 0
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM written").fetchone()[0]
+
+    def mark(self, batch: List[tuple[str, Document]]):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO written (chunk_id, fingerprint) VALUES (?, ?)",
+            [(chunk_id, chunk_fingerprint(chunk)) for chunk_id, chunk in batch],
+        )
+        self.conn.commit()
+
+    def unwritten(self, chunks: List[tuple[str, Document]]) -> List[tuple[str, Document]]:
+        """The chunks that still have to be embedded and written."""
+        if not chunks:
+            return []
+        placeholders = ",".join("?" for _ in chunks)
+        done = dict(self.conn.execute(
+            f"SELECT chunk_id, fingerprint FROM written WHERE chunk_id IN ({placeholders})",
+            [chunk_id for chunk_id, _ in chunks],
+        ).fetchall())
+        todo = [(chunk_id, chunk) for chunk_id, chunk in chunks if done.get(chunk_id) != chunk_fingerprint(chunk)]
+        self.skipped += len(chunks) - len(todo)
+        return todo
+
+    def chunk_ids(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT chunk_id FROM written")]
+
+    def episode_ids(self, source: str) -> List[str]:
+        """Written chunk IDs of an episode, including a tail left by a crashed, longer version."""
+        prefix = f"{episode_slug(source)}::"
+        return [
+            row[0] for row in self.conn.execute(
+                "SELECT chunk_id FROM written WHERE substr(chunk_id, 1, ?) = ?", (len(prefix), prefix)
+            )
+        ]
+
+    def forget(self, chunk_ids: List[str]):
+        self.conn.executemany("DELETE FROM written WHERE chunk_id = ?", [(chunk_id,) for chunk_id in chunk_ids])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# ── BM25 lexical index (hybrid retrieval) ───────────────────────────────────
+
+class Bm25Index:
+    """
+    On-disk inverted index over the same chunk IDs as the vector store.
+
+    postings holds (term, chunk, term frequency) keyed by an integer chunk
+    rowid, so the table stays compact; chunks holds each chunk's length plus
+    its text and metadata, so explore.py can return lexical hits without a
+    round trip through the vector store. Scoring happens at query time.
+    """
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        if reset and os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL, length INTEGER NOT NULL, "
+            "text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, chunk INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, chunk)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('tokenizer', ?)", (str(BM25_TOKENIZER_VERSION),)
+        )
+        self.conn.commit()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _remove(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), 500):
+            part = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" for _ in part)
+            rowids = [row[0] for row in self.conn.execute(
+                f"SELECT id FROM chunks WHERE chunk_id IN ({placeholders})", part
+            )]
+            if rowids:
+                marks = ",".join("?" for _ in rowids)
+                self.conn.execute(f"DELETE FROM postings WHERE chunk IN ({marks})", rowids)
+                self.conn.execute(f"DELETE FROM chunks WHERE id IN ({marks})", rowids)
+
+    def upsert(self, ids, documents, metadatas):
+        self._remove(list(ids))
+        for chunk_id, text, metadata in zip(ids, documents, metadatas):
+            tokens = bm25_tokens(text)
+            cursor = self.conn.execute(
+                "INSERT INTO chunks (chunk_id, length, text, metadata) VALUES (?, ?, ?, ?)",
+                (chunk_id, len(tokens), text, json.dumps(metadata or {}, ensure_ascii=False)),
+            )
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            self.conn.executemany(
+                "INSERT INTO postings (term, chunk, tf) VALUES (?, ?, ?)",
+                [(term, cursor.lastrowid, tf) for term, tf in counts.items()],
+            )
+        self.conn.commit()
+
+    def delete(self, ids):
+        self._remove(list(ids))
+        self.conn.commit()
+
+    def close(self):
+        stats = self.conn.execute("SELECT COUNT(*), COALESCE(AVG(length), 0) FROM chunks").fetchone()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("chunks", str(stats[0])), ("avg_length", str(stats[1]))],
+        )
+        self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+
+
+class LexicalMirror:
+    """
+    A vector store wrapper that mirrors every upsert and delete into a Bm25Index,
+    so both indexes always cover the same chunk IDs.
+    """
+
+    def __init__(self, collection, lexical: Bm25Index):
+        self.collection = collection
+        self.lexical = lexical
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        self.lexical.upsert(ids, documents, metadatas)
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+        self.lexical.delete(ids)
+
+    def __getattr__(self, name):
+        # get / count / query go straight to the vector store
+        return getattr(self.collection, name)
+
+    def close(self):
+        close_vector_store(self.collection)
+        self.lexical.close()
+
+
+def close_vector_store(collection):
+    """Flush stores that buffer writes (numpy, BM25); Chroma persists on every call."""
+    if hasattr(collection, "close"):
+        collection.close()
+
+
+# ── Episode centroids (episode-then-chunk retrieval) ────────────────────────
+
+def load_episode_centroids(path: Optional[str]) -> Dict[str, tuple[str, np.ndarray]]:
+    """{slug: (manifest key, unit centroid)}; empty if the build has none yet."""
+    if not path or not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {
+            str(slug): (str(key), vector)
+            for slug, key, vector in zip(data["episodes"], data["keys"], data["vectors"].astype(np.float32))
+        }
+
+
+def save_episode_centroids(path: str, centroids: Dict[str, tuple[str, np.ndarray]]):
+    slugs = sorted(centroids)
+    vectors = np.stack([centroids[slug][1] for slug in slugs]) if slugs else np.zeros((0, 0), dtype=np.float32)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            episodes=np.array(slugs, dtype=str),
+            keys=np.array([centroids[slug][0] for slug in slugs], dtype=str),
+            vectors=vectors.astype(np.float32),
+        )
+    os.replace(tmp_path, path)
+
+
+def episode_centroid(collection, chunk_ids: List[str]) -> Optional[np.ndarray]:
+    """Mean of an episode's stored chunk vectors (each normalized first), as a unit vector."""
+    if not chunk_ids:
+        return None
+    stored = collection.get(ids=chunk_ids, include=["embeddings"])
+    if stored.get("embeddings") is None or len(stored["embeddings"]) == 0:
+        return None
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    centroid = (vectors / np.where(norms > 0, norms, 1.0)).mean(axis=0)
+    norm = float(np.linalg.norm(centroid))
+    return centroid / norm if norm > 0 else centroid
+
+
+def refresh_episode_centroids(path: str, collection, manifest: Dict[str, Any]) -> int:
+    """
+    Bring the build's episode centroids in line with its manifest.
+
+    A centroid is keyed by the episode's content hash and indexed_at, so only
+    episodes written (or re-aliased) by this run are recomputed; seeded,
+    resumed and full builds all go through the same path. Episodes whose
+    chunks are all stored as aliases of another episode get no centroid.
+    Returns the number of centroids recomputed.
+    """
+    previous = load_episode_centroids(path)
+    centroids = {}
+    recomputed = 0
+    for source, entry in manifest["episodes"].items():
+        slug = episode_slug(source)
+        key = f"{entry.get('hash', '')}@{entry.get('indexed_at', '')}"
+        if slug in previous and previous[slug][0] == key:
+            centroids[slug] = previous[slug]
+            continue
+        centroid = episode_centroid(collection, entry.get("chunk_ids", []))
+        if centroid is not None:
+            centroids[slug] = (key, centroid)
+            recomputed += 1
+    save_episode_centroids(path, centroids)
+    return recomputed
+
+
+def write_batch(collection, batch: List[tuple[str, Document]], vectors, stats: Dict[str, StageStats]):
+    """Upsert one embedded batch of chunks (upsert stage)."""
+    ids = [chunk_id for chunk_id, _ in batch]
+    texts = [chunk.page_content for _, chunk in batch]
+    metadatas = [chroma_metadata(chunk.metadata) for _, chunk in batch]
+
+    started = time.perf_counter()
+    collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+    stats["upsert"].add(len(batch), time.perf_counter() - started)
+
+
+def run_index_pipeline(
+    episode_chunks: Iterable[tuple[str, List[tuple[str, Document]]]],
+    collection,
+    embeddings,
+    batch_size: int,
+    stats: Dict[str, StageStats],
+    on_commit: Optional[Callable[[List[tuple[str, List[str], List[str]]]], None]] = None,
+    verbose: bool = True,
+    max_in_flight: int = 1,
+    checkpoint: Optional[BuildCheckpoint] = None,
+) -> int:
+    """
+    Drain the load → split stream into fixed-size embed + upsert batches.
+
+    Only a bounded number of batches (max_in_flight, plus the tail of the
+    current episode) is held in memory at a time. With worker processes,
+    several batches embed concurrently while this single writer upserts the
+    results in submission order. Chunks flagged with alias_of metadata by the
+    dedup stage are not embedded or written. After every write, on_commit
+    receives (source, chunk_ids, stored_ids) for the episodes whose chunks are
+    now all in the collection, so progress survives a later failure. With a
+    checkpoint, every written batch is recorded and chunks it already holds
+    are skipped, so a resumed build picks up mid-episode.
+
+    Returns:
+        Number of chunks written
+    """
+    buffer: List[tuple[str, Document]] = []
+    pending: List[tuple[int, str, List[str], List[str]]] = []  # (end offset, source, chunk ids, stored ids)
+    in_flight = deque()  # (batch, pending vectors, seconds spent submitting)
+    enqueued = 0
+    written = 0
+    progress = tqdm(desc="🧠 Embedding + writing", unit="chunk", disable=not verbose)
+
+    def commit_finished():
+        finished = []
+        while pending and pending[0][0] <= written:
+            _, source, ids, stored_ids = pending.pop(0)
+            finished.append((source, ids, stored_ids))
+        if finished and on_commit is not None:
+            on_commit(finished)
+
+    def drain(limit: int):
+        nonlocal written
+        while len(in_flight) > limit:
+            batch, result, submit_seconds = in_flight.popleft()
+            started = time.perf_counter()
+            vectors = result.result()
+            stats["embed"].add(len(batch), submit_seconds + time.perf_counter() - started)
+            write_batch(collection, batch, vectors, stats)
+            if checkpoint is not None:
+                checkpoint.mark(batch)
+            written += len(batch)
+            progress.update(len(batch))
+            commit_finished()
+
+    def flush(count: int):
+        nonlocal buffer
+        batch, buffer = buffer[:count], buffer[count:]
+        started = time.perf_counter()
+        result = submit_documents(embeddings, [chunk.page_content for _, chunk in batch])
+        in_flight.append((batch, result, time.perf_counter() - started))
+        drain(max_in_flight - 1)
+
+    for source, chunks in episode_chunks:
+        kept = [(chunk_id, chunk) for chunk_id, chunk in chunks if "alias_of" not in chunk.metadata]
+        todo = checkpoint.unwritten(kept) if checkpoint is not None else kept
+        buffer.extend(todo)
+        enqueued += len(todo)
+        pending.append((enqueued, source, [chunk_id for chunk_id, _ in chunks], [chunk_id for chunk_id, _ in kept]))
+        while len(buffer) >= batch_size:
+            flush(batch_size)
+        commit_finished()
+
+    if buffer:
+        flush(len(buffer))
+    drain(0)
+    progress.close()
+    return written
+
+
+# ── Distributed builds (a work queue several machines can drain) ───────────
+
+QUEUE_FILENAME = "queue.sqlite"
+SEGMENTS_DIRNAME = "segments"
+MERGED_SEGMENTS_FILENAME = "merged_segments.sqlite"
+
+
+def needs_full_rebuild(manifest: Dict[str, Any], settings: Dict[str, Any], full: bool = False) -> bool:
+    return full or not manifest["episodes"] or manifest.get("settings") != settings
+
+
+def queue_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Shared queue of embedding work units in <queue dir>/queue.sqlite.
+
+    `--queue plan` splits the episodes a build would embed into units of a
+    few episodes each. Any number of `--queue work` processes, on this
+    machine or others mounting the same directory, claim units one at a time
+    and write each unit's vectors to segments/<unit>.npz. A claim that is
+    not finished within the lease (a dead worker) can be claimed again.
+    `--queue merge` then runs an ordinary build that takes its vectors from
+    the segments instead of the model.
+    """
+
+    def __init__(self, queue_dir: str):
+        self.dir = queue_dir
+        self.path = os.path.join(queue_dir, QUEUE_FILENAME)
+        self.segments_dir = os.path.join(queue_dir, SEGMENTS_DIRNAME)
+        if not os.path.exists(self.path):
+            raise ValueError(f"no work queue in {queue_dir} (create one with --queue plan)")
+        # Workers on other hosts hold the write lock briefly while claiming
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    @classmethod
+    def create(cls, queue_dir: str, meta: Dict[str, Any], units: List[tuple[str, List[str]]]) -> "WorkQueue":
+        """Replace any previous queue in queue_dir with `units` of (corpus name, sources)."""
+        shutil.rmtree(os.path.join(queue_dir, SEGMENTS_DIRNAME), ignore_errors=True)
+        for filename in (QUEUE_FILENAME, MERGED_SEGMENTS_FILENAME):
+            if os.path.exists(os.path.join(queue_dir, filename)):
+                os.remove(os.path.join(queue_dir, filename))
+        os.makedirs(os.path.join(queue_dir, SEGMENTS_DIRNAME), exist_ok=True)
+        conn = sqlite3.connect(os.path.join(queue_dir, QUEUE_FILENAME))
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE units ("
+            " unit_id INTEGER PRIMARY KEY,"
+            " corpus TEXT NOT NULL,"
+            " sources TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " claimed_at REAL,"
+            " finished_at REAL,"
+            " chunks INTEGER)"
+        )
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                         [(key, json.dumps(value)) for key, value in meta.items()])
+        conn.executemany("INSERT INTO units (corpus, sources) VALUES (?, ?)",
+                         [(corpus, json.dumps(sources)) for corpus, sources in units])
+        conn.commit()
+        conn.close()
+        return cls(queue_dir)
+
+    def meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+
+    def set_meta(self, key: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[tuple[int, str, List[str]]]:
+        """Next pending (or abandoned) unit as (unit_id, corpus, sources), or None when none are left."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT unit_id, corpus, sources FROM units "
+                "WHERE status = 'pending' OR (status = 'claimed' AND claimed_at < ?) "
+                "ORDER BY unit_id LIMIT 1",
+                (now - lease_seconds,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE units SET status = 'claimed', worker = ?, claimed_at = ? WHERE unit_id = ?",
+                    (worker, now, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def release(self, unit_id: int, worker: str):
+        """Hand a unit this worker could not finish back to the queue."""
+        self.conn.execute(
+            "UPDATE units SET status = 'pending', worker = NULL, claimed_at = NULL "
+            "WHERE unit_id = ? AND status = 'claimed' AND worker = ?",
+            (unit_id, worker),
+        )
+
+    def boilerplate_path(self, corpus: str) -> str:
+        return os.path.join(self.dir, f"boilerplate-{corpus}.npz")
+
+    def segment_path(self, unit_id: int) -> str:
+        return os.path.join(self.segments_dir, f"{unit_id:06d}.npz")
+
+    def finish(self, unit_id: int, worker: str, text_hashes: List[str], vectors: List[List[float]]):
+        """Write the unit's segment, then mark it done (a re-claimed unit writes identical vectors)."""
+        path = self.segment_path(unit_id)
+        tmp_path = f"{path}.{worker.replace(':', '-')}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, hashes=np.array(text_hashes, dtype=str), vectors=np.asarray(vectors, dtype=np.float32))
+        os.replace(tmp_path, path)
+        self.conn.execute(
+            "UPDATE units SET status = 'done', worker = ?, finished_at = ?, chunks = ? "
+            "WHERE unit_id = ? AND status != 'done'",
+            (worker, time.time(), len(text_hashes), unit_id),
+        )
+
+    def progress(self) -> Dict[str, int]:
+        counts = {"pending": 0, "claimed": 0, "done": 0}
+        counts.update(dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status")))
+        return counts
+
+    def merged_segments(self) -> EmbeddingCache:
+        """Every finished segment loaded into one lookup by chunk text hash (the build's embedding source)."""
+        done = [row[0] for row in self.conn.execute("SELECT unit_id FROM units WHERE status = 'done'")]
+        total = sum(row[0] or 0 for row in self.conn.execute("SELECT chunks FROM units WHERE status = 'done'"))
+        cache = EmbeddingCache(
+            os.path.join(self.dir, MERGED_SEGMENTS_FILENAME),
+            model_name=self.meta()["settings"]["embedding_model"],
+            dtype="float32",
+            max_entries=total,
+        )
+        for unit_id in done:
+            with np.load(self.segment_path(unit_id)) as segment:
+                cache.put_many(dict(zip(segment["hashes"].tolist(), segment["vectors"])))
+        return cache
+
+    def close(self):
+        self.conn.close()
+
+
+class LazyEmbeddings:
+    """Loads the real embedding model only if something actually has to be embedded."""
+
+    def __init__(self, load: Callable[[], Any]):
+        self.load = load
+        self.base = None
+
+    def model(self):
+        if self.base is None:
+            self.base = self.load()
+        return self.base
+
+    def submit_documents(self, texts: List[str]):
+        return submit_documents(self.model(), texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.submit_documents(texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model().embed_query(text)
+
+
+def plan_work_queue(
+    queue_dir: str,
+    corpora: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    settings: Dict[str, Any],
+    unit_episodes: int,
+    full: bool = False,
+) -> WorkQueue:
+    """
+    Queue the episodes each corpus's next build would embed, unit_episodes per unit.
+
+    Which episodes that is comes from the corpus's current build exactly as in
+    an ordinary run; episodes that become new work later (dedup dependents, a
+    transcript fetched after planning) are simply embedded by the merge.
+    """
+    paths = config.get("paths", {})
+    indexes_root = paths.get("indexes", "data/indexes")
+    units = []
+    strippers = {}
+    for corpus in corpora:
+        source_layout = current_layout(
+            corpus_indexes_dir(indexes_root, corpus), paths, settings["backend"],
+            inherit_from=indexes_root if corpus["primary"] else None,
+        )
+        manifest = load_manifest(source_layout["manifest"]) if source_layout else empty_manifest()
+        full_rebuild = needs_full_rebuild(manifest, settings, full)
+        transcript_files = find_transcript_files(corpus["path"])
+        plan = plan_incremental_update(transcript_files, manifest, full_rebuild=full_rebuild)
+        to_index = sorted(plan["new"] + plan["changed"])
+        # Workers must strip exactly what the merge build will strip
+        if settings["boilerplate"] is not None and to_index:
+            if not full_rebuild and source_layout.get("boilerplate") and os.path.exists(source_layout["boilerplate"]):
+                strippers[corpus["name"]] = BoilerplateStripper.load(source_layout["boilerplate"], settings["boilerplate"])
+            else:
+                strippers[corpus["name"]] = BoilerplateStripper.learn(transcript_files, settings["boilerplate"])
+        units.extend(
+            (corpus["name"], to_index[start:start + unit_episodes])
+            for start in range(0, len(to_index), unit_episodes)
+        )
+    meta = {
+        "settings": settings,
+        "corpora": [corpus["name"] for corpus in corpora],
+        "full": full,
+        "planned_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    queue = WorkQueue.create(queue_dir, meta, units)
+    for name, stripper in strippers.items():
+        stripper.save(queue.boilerplate_path(name))
+    return queue
+
+
+def drain_work_queue(
+    queue: WorkQueue,
+    embeddings,
+    batch_size: int,
+    lease_seconds: float,
+    load_workers: int = 1,
+    max_in_flight: int = 1,
+    verbose: bool = True,
+) -> tuple[int, int]:
+    """
+    Claim and embed units until none are left; returns (units, chunks) done here.
+
+    Units are split with the chunking settings (and boilerplate shingles)
+    recorded when the queue was planned, not this machine's CONFIGS.yaml, so
+    every worker produces the chunk texts the merge will look up.
+    """
+    settings = queue.meta()["settings"]
+    chunking = {key: settings[key] for key in ("chunker", "chunk_size", "chunk_overlap")}
+    strippers: Dict[str, Optional[BoilerplateStripper]] = {}
+    worker = queue_worker_id()
+    units = 0
+    chunks = 0
+    while True:
+        claimed = queue.claim(worker, lease_seconds)
+        if claimed is None:
+            return units, chunks
+        unit_id, corpus, sources = claimed
+        logger.info(f"Worker {worker} claimed unit {unit_id} ({corpus}, {len(sources)} episodes)")
+        try:
+            if corpus not in strippers:
+                strippers[corpus] = (
+                    BoilerplateStripper.load(queue.boilerplate_path(corpus), settings["boilerplate"])
+                    if settings["boilerplate"] is not None else None
+                )
+            texts = {}
+            for _, episode in iter_split_episodes([Path(source) for source in sources], chunking,
+                                                  workers=load_workers, verbose=False,
+                                                  stripper=strippers[corpus]):
+                for _, chunk in episode:
+                    texts.setdefault(chunk_text_hash(chunk.page_content), chunk.page_content)
+            text_hashes = list(texts)
+            in_flight = deque()
+            vectors = []
+            for start in range(0, len(text_hashes), batch_size):
+                batch = [texts[text_hash] for text_hash in text_hashes[start:start + batch_size]]
+                in_flight.append(submit_documents(embeddings, batch))
+                while len(in_flight) >= max_in_flight:
+                    vectors.extend(in_flight.popleft().result())
+            while in_flight:
+                vectors.extend(in_flight.popleft().result())
+            queue.finish(unit_id, worker, text_hashes, vectors)
+        except BaseException:
+            queue.release(unit_id, worker)
+            raise
+        units += 1
+        chunks += len(text_hashes)
+        progress = queue.progress()
+        if verbose:
+            print(f"   📦 Unit {unit_id} ({corpus}): {len(text_hashes)} chunks "
+                  f"[{progress['done']} done, {progress['claimed']} in progress, {progress['pending']} pending]")
+
+
+def sample_chunk_texts(transcript_files: List[Path], text_splitter, limit: int) -> List[str]:
+    """First `limit` chunk texts of the corpus, for benchmarking."""
+    texts = []
+    documents = iter_transcripts(transcript_files, verbose=False)
+    for _, chunks in iter_episode_chunks(documents, text_splitter):
+        texts.extend(chunk.page_content for _, chunk in chunks)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def main():
+    config = load_config()
+    defaults = config.get("defaults", {})
+    default_verbose = defaults.get("verbose", True)
+    index_cfg = config.get("index", {}) or {}
+
+    parser = argparse.ArgumentParser(
+        description="Index Lenny's podcast transcripts into ChromaDB",
+    )
+    parser.add_argument(
+        "--verbose",
+        choices=["on", "off"],
+        default="on" if default_verbose else "off",
+        help="Verbose output (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-index every episode, ignoring the manifest of already-indexed episodes",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=int(index_cfg.get("batch_size", 256)),
+        help="Chunks embedded and written per batch (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(index_cfg.get("embedding_workers", 1)),
+        help="Embedding worker processes; 1 embeds in-process (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=int(index_cfg.get("load_workers", 1)),
+        help="Processes for loading + splitting transcripts; 0 = one per CPU (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=int(index_cfg.get("threads_per_worker", 0)),
+        help="Torch threads per embedding worker; 0 = library default (default from CONFIGS.yaml)",
+    )
+    interrupted = parser.add_mutually_exclusive_group()
+    interrupted.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted build where it stopped (the default when one exists)",
+    )
+    interrupted.add_argument(
+        "--restart",
+        action="store_true",
+        help="Throw away an interrupted build and start a new one",
+    )
+    parser.add_argument(
+        "--rollback",
+        nargs="?",
+        const="previous",
+        metavar="BUILD_ID",
+        help="Point readers back at the previous validated build (or BUILD_ID) and exit",
+    )
+    parser.add_argument(
+        "--list-builds",
+        action="store_true",
+        help="List index builds and which one is current, then exit",
+    )
+    parser.add_argument(
+        "--corpus",
+        default="all",
+        metavar="NAME",
+        help="Corpus from paths.corpora to index, or 'all' (default: all)",
+    )
+    parser.add_argument(
+        "--queue",
+        choices=["plan", "work", "merge"],
+        help="Distributed build: plan work units, work on them (any number of processes/hosts), "
+             "or merge the results into a build",
+    )
+    parser.add_argument(
+        "--queue-dir",
+        default=(index_cfg.get("queue", {}) or {}).get("dir", "data/index_queue"),
+        metavar="DIR",
+        help="Shared directory holding the work queue (default from CONFIGS.yaml)",
+    )
+    parser.add_argument(
+        "--benchmark-workers",
+        action="store_true",
+        help="Log embedding chunks/sec for 1..--workers processes on a corpus sample, then exit",
+    )
+    parser.add_argument(
+        "--benchmark-chunks",
+        type=int,
+        default=2048,
+        help="Sample size for --benchmark-workers (default: 2048 chunks)",
+    )
+    args = parser.parse_args()
+    verbose = args.verbose == "on"
+    batch_size = max(1, args.batch_size)
+    workers = max(1, args.workers)
+    threads_per_worker = max(0, args.threads_per_worker)
+
+    def vprint(*print_args, **print_kwargs):
+        if verbose:
+            print(*print_args, **print_kwargs)
+
+    paths = config.get("paths", {})
+    logs_dir = paths.get("logs", "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file = f"{logs_dir}/index_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=(
+            [logging.FileHandler(log_file), logging.StreamHandler(sys.stdout)]
+            if verbose
+            else [logging.FileHandler(log_file)]
+        ),
+    )
+
+    try:
+        corpora = select_corpora(corpus_configs(paths), args.corpus)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    indexes_root = paths.get("indexes", "data/indexes")
+
+    vprint("=" * 60)
+    vprint("LennySan RAG-o-Matic v0.6 - Indexing")
+    vprint("=" * 60)
+    vprint()
+    vprint(f"📋 Logging to: {log_file}")
+    vprint()
+    
+    logger.info("Starting indexing process")
+    logger.info(f"Log file: {log_file}")
+
+    if args.list_builds:
+        for corpus in corpora:
+            indexes_dir = corpus_indexes_dir(indexes_root, corpus)
+            current = read_current_build(indexes_dir)
+            builds = list_builds(indexes_dir)
+            print(f"📚 {corpus['name']} ({indexes_dir})")
+            if not builds:
+                inherited = read_current_build(indexes_root) if corpus["primary"] else None
+                if inherited:
+                    print(f"   No builds yet; serving {inherited} from {indexes_root} until the next index run")
+                else:
+                    print(f"   No builds in {indexes_dir}")
+            for build_id, info in builds:
+                marker = "→" if build_id == current else " "
+                print(f"{marker} {build_id}  {info.get('status', 'incomplete'):<10} "
+                      f"{info.get('backend', '?'):<7} {info.get('chunks', '?')} chunks")
+        return 0
+
+    if args.rollback:
+        if args.rollback != "previous" and len(corpora) > 1:
+            print("❌ Error: rolling back to a specific BUILD_ID needs --corpus NAME")
+            return 1
+        for corpus in corpora:
+            indexes_dir = corpus_indexes_dir(indexes_root, corpus)
+            previous = read_current_build(indexes_dir)
+            try:
+                build_id = rollback_build(indexes_dir, None if args.rollback == "previous" else args.rollback)
+            except ValueError as e:
+                print(f"❌ Error: {corpus['name']}: rollback failed: {e}")
+                return 1
+            print(f"⏪ {corpus['name']}: current index {previous or 'none'} → {build_id}")
+            logger.info(f"Rolled back {corpus['name']} current index from {previous} to {build_id}")
+        return 0
+
+    # Chunking, dedup, boilerplate, backend, shards, vectors and HNSW, validated together
+    try:
+        resolved = resolve_index_config(config)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    if resolved["backend"] != "numpy" and resolved["vectors"] != vector_storage_settings({}):
+        logger.warning("index.vectors only applies to the numpy backend; Chroma stores float32")
+    settings = resolved["settings"]
+    text_splitter = make_text_splitter(resolved["chunking"])
+
+    if args.benchmark_workers:
+        sample = sample_chunk_texts(find_transcript_files(corpora[0]["path"]), text_splitter, args.benchmark_chunks)
+        vprint(f"⏱️  Benchmarking embedding on {len(sample)} chunks with 1..{workers} workers "
+               f"({threads_per_worker or 'default'} threads each)")
+        vprint()
+        results = benchmark_embedding_workers(sample, workers, threads_per_worker, batch_size)
+        best_workers, best_rate = max(results, key=lambda item: item[1])
+        vprint()
+        vprint(f"🏁 Fastest: {best_workers} workers ({best_rate:,.1f} chunks/sec)")
+        vprint("   Set index.embedding_workers in CONFIGS.yaml to use it")
+        return 0
+
+    queue_cfg = index_cfg.get("queue", {}) or {}
+    lease_seconds = float(queue_cfg.get("lease_seconds", 1800))
+    if args.queue == "plan":
+        queue = plan_work_queue(
+            args.queue_dir, corpora, config, settings,
+            unit_episodes=max(1, int(queue_cfg.get("unit_episodes", 25))),
+            full=args.full,
+        )
+        pending = queue.progress()["pending"]
+        queue.close()
+        logger.info(f"Planned {pending} work units in {args.queue_dir}")
+        if not pending:
+            vprint(f"✅ Nothing to embed - {args.queue_dir} holds an empty queue")
+            return 0
+        vprint(f"📬 Queued {pending} work units in {args.queue_dir}")
+        vprint("   Start any number of workers (here or on machines sharing that directory):")
+        vprint(f"   python index_corpus.py --queue work --queue-dir {args.queue_dir}")
+        vprint("   then build the index from their results:")
+        vprint(f"   python index_corpus.py --queue merge --queue-dir {args.queue_dir}")
+        return 0
+
+    queue = None
+    if args.queue:
+        try:
+            queue = WorkQueue(args.queue_dir)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            return 1
+        planned = queue.meta()
+        if args.queue == "work" and planned["settings"]["embedding_model"] != EMBEDDING_MODEL:
+            print(f"❌ Error: the queue was planned for {planned['settings']['embedding_model']}, "
+                  f"this worker embeds with {EMBEDDING_MODEL}")
+            queue.close()
+            return 1
+        if args.queue == "merge":
+            progress = queue.progress()
+            if planned["settings"] != settings:
+                print("❌ Error: index settings changed since the queue was planned; re-plan with --queue plan")
+                queue.close()
+                return 1
+            if progress["pending"] or progress["claimed"]:
+                print(f"❌ Error: {progress['pending'] + progress['claimed']} of "
+                      f"{sum(progress.values())} work units are not finished yet")
+                print(f"   Run more --queue work processes (claims older than {lease_seconds:.0f}s are taken over)")
+                queue.close()
+                return 1
+            # Build the corpora the queue was planned for, the way it was planned
+            corpora = [corpus for corpus in corpus_configs(paths) if corpus["name"] in planned["corpora"]]
+            args.full = args.full or planned["full"]
+
+    # The embedding model (and worker pool) is loaded once, on the first
+    # corpus that has something to embed, and shared by the rest
+    shared: Dict[str, Any] = {}
+
+    def load_embedding_setup() -> Dict[str, Any]:
+        if shared:
+            return shared
+        parallel_embeddings = None
+        if workers > 1:
+            vprint(f"🔧 Starting {workers} embedding workers "
+                   f"({threads_per_worker or 'default'} threads each, model loads once per worker)...")
+            parallel_embeddings = ParallelEmbeddings(EMBEDDING_MODEL, workers, threads_per_worker)
+            embeddings = parallel_embeddings
+            vprint("✅ Embedding workers ready to start on first uncached batch")
+        else:
+            vprint("🔧 Loading embedding model (sentence-transformers)...")
+            embeddings = build_embeddings(EMBEDDING_MODEL, threads_per_worker)
+            vprint("✅ Embedding model loaded")
+        logger.info(f"Embedding workers: {workers}, threads per worker: {threads_per_worker or 'default'}")
+
+        cache_cfg = index_cfg.get("embedding_cache", {}) or {}
+        embedding_cache = None
+        if cache_cfg.get("enabled", True):
+            embedding_cache = EmbeddingCache(
+                cache_cfg.get("path", "data/embedding_cache.sqlite"),
+                model_name=EMBEDDING_MODEL,
+                dtype=cache_cfg.get("dtype", "float16"),
+                max_entries=cache_cfg.get("max_entries", 200000),
+            )
+            embeddings = CachedEmbeddings(embeddings, embedding_cache)
+            vprint(f"🗃️  Embedding cache: {embedding_cache.path}")
+        vprint()
+        shared.update(embeddings=embeddings, parallel=parallel_embeddings, cache=embedding_cache)
+        return shared
+
+    status = 0
+    segments = None
+    try:
+        if args.queue == "work":
+            setup = load_embedding_setup()
+            vprint(f"👷 Worker {queue_worker_id()} draining {args.queue_dir}")
+            units, chunks = drain_work_queue(
+                queue,
+                setup["embeddings"],
+                batch_size=batch_size,
+                lease_seconds=lease_seconds,
+                load_workers=args.load_workers if args.load_workers > 0 else (os.cpu_count() or 1),
+                max_in_flight=2 * workers,
+                verbose=verbose,
+            )
+            progress = queue.progress()
+            logger.info(f"Worker {queue_worker_id()} embedded {chunks} chunks in {units} units")
+            vprint(f"✅ Embedded {chunks} chunks in {units} units; no unclaimed units left")
+            if progress["claimed"]:
+                vprint(f"   {progress['claimed']} units are still being embedded by other workers")
+            else:
+                vprint(f"   All units done - merge with: python index_corpus.py --queue merge --queue-dir {args.queue_dir}")
+            return 0
+
+        merge_setup = None
+        if args.queue == "merge":
+            vprint(f"🧩 Loading worker segments from {args.queue_dir}")
+            segments = queue.merged_segments()
+            # Chunks no worker embedded (e.g. dedup dependents) still go to the model
+            merge_setup = {
+                "embeddings": CachedEmbeddings(LazyEmbeddings(lambda: load_embedding_setup()["embeddings"]), segments),
+                "parallel": None,
+                "cache": None,
+            }
+
+        def build_setup() -> Dict[str, Any]:
+            return merge_setup if merge_setup is not None else load_embedding_setup()
+
+        for corpus in corpora:
+            if len(corpora) > 1:
+                vprint(f"📚 Corpus: {corpus['name']} ({corpus['path']})")
+                vprint()
+            status = max(status, build_corpus_index(corpus, args, config, resolved, build_setup))
+
+        if segments is not None:
+            logger.info(f"Merge: {segments.hits} chunk vectors from worker segments, {segments.misses} embedded here")
+            vprint(f"🧩 {segments.hits:,} chunk vectors came from worker segments, {segments.misses:,} were embedded here")
+            if status == 0:
+                queue.set_meta("merged_at", datetime.now().isoformat(timespec="seconds"))
+    finally:
+        if segments is not None:
+            segments.close()
+        if queue is not None:
+            queue.close()
+        if shared.get("parallel") is not None:
+            shared["parallel"].close()
+        if shared.get("cache") is not None:
+            shared["cache"].close()
+            logger.info(shared["cache"].summary())
+    return status
+
+
+def build_corpus_index(corpus: Dict[str, Any], args, config: Dict[str, Any], resolved: Dict[str, Any],
+                       load_embedding_setup) -> int:
+    """
+    One blue/green build of one corpus into <paths.indexes>/<corpus name>/.
+
+    resolved is main()'s resolve_index_config(), parsed once for the whole
+    run. load_embedding_setup() returns the embedding model (plus worker
+    pool and cache) shared by every corpus in this run, and main() closes
+    them once all corpora are done.
+    """
+    verbose = args.verbose == "on"
+    batch_size = max(1, args.batch_size)
+    workers = max(1, args.workers)
+    load_workers = args.load_workers if args.load_workers > 0 else (os.cpu_count() or 1)
+    index_cfg = config.get("index", {}) or {}
+    paths = config.get("paths", {})
+    settings = resolved["settings"]
+    chunking = resolved["chunking"]
+    dedup = resolved["dedup"]
+    boilerplate = resolved["boilerplate"]
+    backend = resolved["backend"]
+    bm25_enabled = resolved["bm25"]
+    shard_scheme = resolved["shards"]
+    vector_storage = resolved["vectors"]
+    hnsw = resolved["hnsw"]
+    keep_builds = int(index_cfg.get("keep_builds", 3))
+    indexes_root = paths.get("indexes", "data/indexes")
+    indexes_dir = corpus_indexes_dir(indexes_root, corpus)
+    episodes_dir = corpus["path"]
+
+    def vprint(*print_args, **print_kwargs):
+        if verbose:
+            print(*print_args, **print_kwargs)
+
+    # Check if episodes directory exists
+    if not os.path.exists(episodes_dir):
+        print(f"❌ Error: episodes directory not found: {episodes_dir}")
+        print("Make sure you're running this from the repo root")
+        logger.error(f"Episodes directory not found: {episodes_dir}")
+        return 1
+
+    # A build that was interrupted (crash, sleep, preempted CI runner) is
+    # resumed from its checkpoint unless --restart is given or settings changed
+    resuming = False
+    interrupted_id = read_build_pointer(indexes_dir, BUILDING_POINTER)
+    if interrupted_id:
+        interrupted_layout = build_layout(os.path.join(indexes_dir, interrupted_id), backend)
+        interrupted_info = load_index_info(interrupted_layout["dir"])
+        if args.restart:
+            decision = "restart (--restart)"
+        elif (
+            interrupted_info.get("backend") != backend
+            or load_manifest(interrupted_layout["manifest"]).get("settings") != settings
+        ):
+            decision = "restart (index settings changed since it was interrupted)"
+        else:
+            decision = "resume (--resume)" if args.resume else "resume (default; pass --restart to start over)"
+            resuming = True
+        vprint(f"🔁 Interrupted build {interrupted_id}: {decision}")
+        logger.info(f"Interrupted build {interrupted_id}: {decision}")
+        if not resuming:
+            shutil.rmtree(interrupted_layout["dir"], ignore_errors=True)
+            clear_build_pointer(indexes_dir, BUILDING_POINTER)
+    elif args.resume:
+        logger.info("--resume: no interrupted build to resume, starting a new one")
+
+    # Work out which episodes actually need (re-)embedding, relative to the
+    # build readers are using right now (or to what the interrupted build got through)
+    # The primary corpus inherits the single-corpus index from before per-corpus directories
+    source_layout = current_layout(indexes_dir, paths, backend, inherit_from=indexes_root if corpus["primary"] else None)
+    if resuming:
+        manifest = load_manifest(interrupted_layout["manifest"])
+        full_rebuild = False
+    else:
+        manifest = load_manifest(source_layout["manifest"]) if source_layout else empty_manifest()
+        full_rebuild = needs_full_rebuild(manifest, settings, args.full)
+    transcript_files = find_transcript_files(episodes_dir)
+    plan = plan_incremental_update(transcript_files, manifest, full_rebuild=full_rebuild)
+
+    if not resuming and not full_rebuild and not plan["new"] and not plan["changed"] and not plan["deleted"]:
+        vprint(f"🗂️  Current index: {source_layout['dir'] or source_layout['store']}")
+        vprint("✅ Index is up to date - nothing to embed")
+        logger.info("Index is up to date")
+        return 0
+
+    # Build into a fresh directory; readers keep using the current build until
+    # this one is validated and CURRENT is switched over
+    if resuming:
+        build_id, layout = interrupted_id, interrupted_layout
+    else:
+        build_id = new_build_id(indexes_dir)
+        layout = build_layout(os.path.join(indexes_dir, build_id), backend)
+        os.makedirs(layout["dir"], exist_ok=True)
+        if not full_rebuild:
+            seed_build(source_layout, layout)
+        save_index_info(layout["dir"], {
+            "build_id": build_id,
+            "status": "building",
+            "backend": backend,
+            "embedding_model": EMBEDDING_MODEL,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "based_on": None if full_rebuild else (source_layout["dir"] and os.path.basename(source_layout["dir"])),
+        })
+        write_build_pointer(indexes_dir, BUILDING_POINTER, build_id)
+    manifest_path = layout["manifest"]
+    catalog_path = layout["catalog"]
+    checkpoint = BuildCheckpoint(os.path.join(layout["dir"], CHECKPOINT_FILENAME))
+    logger.info(
+        f"{'Resuming' if resuming else 'Building'} {build_id} in {layout['dir']} "
+        f"({'full' if full_rebuild else 'incremental'}, {checkpoint.count()} chunks checkpointed)"
+    )
+
+    dedup_index = None
+    if dedup is not None:
+        dedup_index = NearDuplicateIndex(layout["dedup"], dedup, reset=full_rebuild)
+        if resuming:
+            dedup_index.touch_all()
+        # Episodes whose chunks point at chunks that are about to be replaced
+        # or removed lose their representative, so they are re-indexed too
+        dependents = dedup_index.dependents(plan["changed"] + plan["deleted"])
+        dependents = sorted(source for source in dependents if source in plan["unchanged"])
+        if dependents:
+            logger.info(f"Re-indexing {len(dependents)} episodes aliased to changed/deleted episodes")
+            plan["unchanged"] = [source for source in plan["unchanged"] if source not in dependents]
+            plan["changed"] = sorted(plan["changed"] + dependents)
+
+    # Sorted so chunk order (and the order batches land in) is the same every run
+    to_index = sorted(plan["new"] + plan["changed"])
+
+    vprint(f"🏗️  Building: {layout['dir']}")
+    vprint(f"🗂️  Manifest: {manifest_path}")
+    if full_rebuild:
+        vprint("   Full rebuild (no manifest, --full, or index settings changed)")
+    vprint(f"   New: {len(plan['new'])}  Changed: {len(plan['changed'])}  "
+           f"Unchanged: {len(plan['unchanged'])}  Deleted: {len(plan['deleted'])}")
+    vprint()
+    logger.info(
+        f"Plan: full_rebuild={full_rebuild} new={len(plan['new'])} changed={len(plan['changed'])} "
+        f"unchanged={len(plan['unchanged'])} deleted={len(plan['deleted'])}"
+    )
+
+    # Recurring sponsor reads, intros and outros are cut before splitting;
+    # what was cut is kept in an audit report next to the build
+    stripper = None
+    boilerplate_report = None
+    if boilerplate is not None:
+        if not full_rebuild and os.path.exists(layout["boilerplate"]):
+            stripper = BoilerplateStripper.load(layout["boilerplate"], boilerplate)
+            boilerplate_report = load_boilerplate_report(layout["boilerplate_report"], stripper)
+        else:
+            vprint("✂️  Learning boilerplate (ad reads, intros, outros) from the whole corpus...")
+            stripper = BoilerplateStripper.learn(transcript_files, boilerplate)
+            stripper.save(layout["boilerplate"])
+            boilerplate_report = empty_boilerplate_report(stripper)
+        audit_boilerplate(boilerplate_report, stripper, to_index, plan["deleted"])
+        save_boilerplate_report(layout["boilerplate_report"], boilerplate_report)
+        logger.info(
+            f"Boilerplate: {len(stripper.shingles)} shingles learned from {stripper.learned_from} episodes; "
+            f"{boilerplate_report['words_removed']} words cut from {boilerplate_report['episodes_stripped']} episodes"
+        )
+        vprint(f"✂️  Boilerplate: {boilerplate_report['words_removed']:,} words cut from "
+               f"{boilerplate_report['episodes_stripped']} episodes (audit: {layout['boilerplate_report']})")
+        vprint()
+
+    if full_rebuild:
+        vprint("☕ Grab a coffee - this takes 5-10 minutes")
+        vprint("💡 Your screen might dim but we'll keep working...")
+        vprint("💤 Your Mac might sleep, but the process continues")
+        vprint("🔁 If it gets interrupted, just re-run: finished batches are checkpointed")
+        vprint()
+
+    setup = load_embedding_setup()
+    embeddings, parallel_embeddings, embedding_cache = setup["embeddings"], setup["parallel"], setup["cache"]
+
+    stats = new_pipeline_stats()
+    pipeline_started = time.perf_counter()
+    try:
+        catalog = empty_episode_catalog() if full_rebuild else load_episode_catalog(catalog_path)
+        if shard_scheme == "none":
+            collection = open_vector_store(backend, layout["store"], reset=full_rebuild, storage=vector_storage, hnsw=hnsw)
+        else:
+            collection = ShardedVectorStore(
+                backend,
+                layout["store"],
+                shard_scheme,
+                # iter_normalized fills the catalog before an episode's chunks are written
+                lambda slug: shard_for_date(catalog["episodes"].get(slug, {}).get("publish_date"), shard_scheme),
+                reset=full_rebuild,
+                storage=vector_storage,
+                hnsw=hnsw,
+            )
+        if bm25_enabled:
+            collection = LexicalMirror(collection, Bm25Index(layout["bm25"], reset=full_rebuild))
+        if full_rebuild:
+            # Start from an empty collection so chunks without IDs (pre-manifest
+            # indexes) or from old settings don't linger, and record that the
+            # manifest now describes the empty collection
+            manifest = empty_manifest(settings)
+            save_manifest(manifest_path, manifest)
+
+        known = manifest["episodes"]
+        if resuming:
+            # Chunks written for episodes that vanished while the build was down
+            expected = {episode_slug(source) for source in list(known) + to_index}
+            orphans = [
+                chunk_id for chunk_id in checkpoint.chunk_ids()
+                if chunk_id.split("::", 1)[0] not in expected
+            ]
+            if orphans:
+                logger.info(f"Removing {len(orphans)} chunks of episodes deleted since the interruption")
+                collection.delete(ids=orphans)
+                checkpoint.forget(orphans)
+        if plan["deleted"]:
+            deleted_ids = [
+                chunk_id
+                for source in plan["deleted"]
+                for chunk_id in known.get(source, {}).get("chunk_ids", [])
+            ]
+            logger.info(f"Removing {len(deleted_ids)} chunks from {len(plan['deleted'])} deleted episodes")
+            if deleted_ids:
+                collection.delete(ids=deleted_ids)
+            for source in plan["deleted"]:
+                known.pop(source, None)
+                catalog["episodes"].pop(episode_slug(source), None)
+            save_manifest(manifest_path, manifest)
+            save_episode_catalog(catalog_path, catalog)
+
+        indexed_episodes = 0
+
+        def on_commit(finished: List[tuple[str, List[str], List[str]]]):
+            # Upserts replaced chunks with the same IDs; remove any leftovers
+            # from a longer previous version of the episode (or chunks that
+            # are now near-duplicate aliases)
+            nonlocal indexed_episodes
+            indexed_at = datetime.now().isoformat(timespec="seconds")
+            surplus = []
+            for source, ids, stored_ids in finished:
+                old_ids = set(known.get(source, {}).get("chunk_ids", []))
+                old_ids.update(checkpoint.episode_ids(source))
+                surplus.extend(old_ids - set(stored_ids))
+                known[source] = {
+                    "hash": plan["hashes"][source],
+                    "chunk_ids": ids,
+                    "stored_chunks": len(stored_ids),
+                    "indexed_at": indexed_at,
+                }
+            if surplus:
+                collection.delete(ids=sorted(surplus))
+                checkpoint.forget(surplus)
+            indexed_episodes += len(finished)
+            save_episode_catalog(catalog_path, catalog)
+            save_manifest(manifest_path, manifest)
+
+        vprint("🧠 Streaming load → split → embed → write")
+        vprint(f"   Batch size: {batch_size} chunks (one batch in memory at a time)")
+        vprint()
+        logger.info(f"Indexing {len(to_index)} episodes in batches of {batch_size}")
+
+        if load_workers > 1:
+            vprint(f"   Loading + splitting on {load_workers} worker processes")
+        episode_chunks = iter_split_episodes(
+            [Path(source) for source in to_index],
+            chunking,
+            workers=load_workers,
+            stats=stats,
+            verbose=verbose,
+            stripper=stripper,
+        )
+        episode_chunks = iter_normalized(episode_chunks, catalog)
+        if dedup_index is not None:
+            dedup_index.forget(to_index + plan["deleted"])
+            dedup_index.load()
+            episode_chunks = iter_deduplicated(episode_chunks, dedup_index, stats=stats["dedup"])
+        written = run_index_pipeline(
+            episode_chunks,
+            collection,
+            embeddings,
+            batch_size=batch_size,
+            stats=stats,
+            on_commit=on_commit,
+            verbose=verbose,
+            max_in_flight=2 * workers,
+            checkpoint=checkpoint,
+        )
+        if dedup_index is not None:
+            synced = sync_alias_metadata(collection, dedup_index)
+            logger.info(
+                f"Dedup: {dedup_index.aliased} near-duplicate chunks aliased instead of embedded, "
+                f"{synced} representatives' alias metadata updated"
+            )
+            dedup_index.close()
+        elapsed = time.perf_counter() - pipeline_started
+
+        manifest["settings"] = settings
+        save_episode_catalog(catalog_path, catalog)
+        save_manifest(manifest_path, manifest)
+        logger.info(f"Manifest saved: {manifest_path}")
+        logger.info(f"Episode catalog saved: {catalog_path} ({len(catalog['episodes'])} episodes)")
+        recomputed = refresh_episode_centroids(layout["centroids"], collection, manifest)
+        logger.info(f"Episode centroids: {recomputed} recomputed")
+
+        # Validate before anyone reads from the new build
+        valid, validation = validate_build(collection, manifest, embeddings)
+        close_vector_store(collection)
+        info = load_index_info(layout["dir"])
+        info.update({
+            "status": "validated" if valid else "failed",
+            "validation": validation,
+            "chunks": collection.count(),
+            "episodes": len(manifest["episodes"]),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        save_index_info(layout["dir"], info)
+        # The build is finished either way; nothing left to resume
+        clear_build_pointer(indexes_dir, BUILDING_POINTER)
+        if checkpoint.skipped:
+            logger.info(f"Resume skipped {checkpoint.skipped} chunks already written before the interruption")
+        checkpoint.close()
+        os.remove(checkpoint.path)
+        if not valid:
+            print(f"❌ Error: build {build_id} failed validation: {validation}")
+            serving = (source_layout["dir"] or source_layout["store"]) if source_layout else "no index yet"
+            print(f"   Readers are still on: {serving}")
+            logger.error(f"Build {build_id} failed validation: {validation}")
+            return 1
+        previous_build = read_current_build(indexes_dir)
+        write_current_build(indexes_dir, build_id)
+        logger.info(f"Build {build_id} validated ({validation}); CURRENT {previous_build} → {build_id}")
+        pruned = prune_builds(indexes_dir, keep_builds)
+        if pruned:
+            logger.info(f"Pruned old builds: {', '.join(pruned)}")
+
+        logger.info(f"Pipeline throughput ({elapsed:.1f}s wall):")
+        for stage in stats.values():
+            logger.info(f"  {stage.summary()}")
+        logger.info(f"  overall {written:>8,} chunks in {elapsed:8.2f}s "
+                    f"({written / elapsed if elapsed > 0 else 0.0:,.1f} chunks/sec, {workers} workers)")
+        
+        vprint()
+        vprint("=" * 60)
+        vprint("✅ Indexing complete!")
+        vprint("=" * 60)
+        vprint(f"   📊 Indexed {written} chunks from {indexed_episodes} episodes in {elapsed:.1f}s")
+        if not full_rebuild:
+            vprint(f"   ♻️  Skipped {len(plan['unchanged'])} unchanged episodes, "
+                   f"removed {len(plan['deleted'])} deleted episodes")
+        if dedup_index is not None:
+            vprint(f"   🧬 Skipped {dedup_index.aliased} near-duplicate chunks (stored as aliases)")
+        if boilerplate_report is not None:
+            vprint(f"   ✂️  Cut {boilerplate_report['words_removed']:,} words of recurring ad reads/intros/outros "
+                   f"(see {layout['boilerplate_report']})")
+        if embedding_cache is not None:
+            vprint(f"   🗃️  {embedding_cache.summary()}")
+        vprint(f"   📋 Episode metadata (guest, title, date, keywords, etc.) in: {catalog_path}")
+        vprint(f"   💾 Database stored in: {layout['store']} ({backend} backend)")
+        vprint(f"   🔀 Now serving build {build_id} (roll back with: python index_corpus.py --rollback)")
+        vprint()
+        vprint("🎉 You're ready to explore!")
+        vprint()
+        vprint("Try these queries:")
+        vprint("   python explore.py 'What does Lenny say about pricing?'")
+        vprint("   python explore.py 'How do you find product-market fit?'")
+        vprint("   python explore.py 'What interview questions does Lenny ask?'")
+        vprint()
+        vprint("💡 Tip: Metadata enables rich queries like:")
+        vprint("   - Filter by guest, topic, or date range (future versions)")
+        vprint("   - See which episode an answer came from")
+        vprint("   - Track when advice was given (context matters!)")
+        vprint()
+        
+        logger.info("Indexing completed successfully")
+        return 0
+        
+    except Exception as e:
+        if parallel_embeddings is not None:
+            parallel_embeddings.executor.shutdown(wait=False, cancel_futures=True)
+            # A later corpus in this run starts a fresh pool
+            if embedding_cache is not None:
+                embedding_cache.close()
+            setup.clear()
+        print()
+        print(f"❌ Error creating vector store: {e}")
+        print()
+        print("The index readers use was not touched. Written batches are checkpointed:")
+        print("re-run index_corpus.py to resume this build, or add --restart to start over.")
         print()
         print("Common fixes:")
         print("  - Ensure you have enough disk space (~500MB needed)")
-        print("  - Check that data/chroma_db/ is writable")
-        print("  - Try deleting data/chroma_db/ and running again")
+        print(f"  - Check that {indexes_dir}/ is writable")
+        print("  - Try `python index_corpus.py --full` to rebuild from scratch")
         logger.error(f"Failed to create vector store: {e}", exc_info=True)
         return 1
 
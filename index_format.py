@@ -0,0 +1,65 @@
+"""
+Index format details shared by index_corpus.py, which writes the indexes,
+and explore.py / app.py, which read them back. Keeping one copy means the
+two sides can't drift apart. Standard library only: explore.py imports this
+at startup.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Vector store directory of each retrieval.backend inside a build
+STORE_DIRNAMES = {"chroma": "chroma_db", "numpy": "numpy_index"}
+# The build readers use, in each corpus's indexes directory
+CURRENT_POINTER = "CURRENT"
+
+
+# ── BM25 tokenization ───────────────────────────────────────────────────────
+
+BM25_TOKEN_RE = re.compile(r"\w+")
+BM25_STOPWORDS = frozenset(
+    "a an and are as at be but by do for from had has have he i if in is it its me my of on or our "
+    "so that the their them they this to was we were what when which who will with you your".split()
+)
+
+
+def bm25_tokens(text: str) -> List[str]:
+    """Lowercased word tokens minus stopwords; indexed chunks and queries both go through this."""
+    return [token for token in BM25_TOKEN_RE.findall(text.lower()) if token not in BM25_STOPWORDS]
+
+
+# ── Corpora and builds ──────────────────────────────────────────────────────
+
+def corpus_configs(paths: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    paths.corpora as [{name, path, label, primary}]. The first corpus is the
+    primary one: it is what explore.py searches by default and it inherits
+    indexes built before corpora had their own directories.
+    """
+    entries = paths.get("corpora") or []
+    corpora = []
+    for position, entry in enumerate(entries if isinstance(entries, list) else []):
+        entry = entry or {}
+        name = str(entry.get("name") or f"corpus{position + 1}")
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+            raise ValueError(f"Corpus name '{name}' must only use letters, digits, '-' and '_'")
+        if any(corpus["name"] == name for corpus in corpora):
+            raise ValueError(f"Corpus name '{name}' is used twice in paths.corpora")
+        corpora.append({
+            "name": name,
+            "path": entry.get("path", "episodes"),
+            "label": entry.get("label", name),
+            "primary": position == 0,
+        })
+    return corpora or [{"name": "lenny", "path": "episodes", "label": "lenny", "primary": True}]
+
+
+def read_build_pointer(indexes_dir: str, pointer: str = CURRENT_POINTER) -> Optional[str]:
+    """The build ID a pointer file (CURRENT or BUILDING) names, if that build directory exists."""
+    try:
+        with open(os.path.join(indexes_dir, pointer), "r", encoding="utf-8") as f:
+            build_id = f.read().strip()
+    except OSError:
+        return None
+    return build_id if build_id and os.path.isdir(os.path.join(indexes_dir, build_id)) else None
@@ -116,7 +116,7 @@ echo ""
 
 echo "📁 Creating directory structure..."
 
-mkdir -p data/chroma_db
+mkdir -p data/indexes
 
 echo -e "${GREEN}✅ Directories created${NC}"
 echo ""
@@ -0,0 +1,336 @@
+import json
+import os
+import socket
+import threading
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import explore
+
+
+# ── Current build ───────────────────────────────────────────────────────────
+
+def test_current_index_follows_the_current_pointer(tmp_path):
+    config = {"paths": {"indexes": str(tmp_path)}, "retrieval": {"backend": "numpy"}}
+    (tmp_path / "20250101-000000").mkdir()
+    (tmp_path / "20250201-000000").mkdir()
+    (tmp_path / "CURRENT").write_text("20250101-000000\n", encoding="utf-8")
+    assert explore.current_index(config)["store"] == str(tmp_path / "20250101-000000" / "numpy_index")
+    # Re-read per question, so a switch is picked up without a restart
+    (tmp_path / "CURRENT").write_text("20250201-000000\n", encoding="utf-8")
+    assert explore.current_index(config)["build_id"] == "20250201-000000"
+
+
+def doc(chunk_id, text="text", **metadata):
+    return Document(page_content=text, metadata=metadata, id=chunk_id)
+
+
+# ── Hybrid retrieval ────────────────────────────────────────────────────────
+
+def test_reciprocal_rank_fusion_weights_and_deduplicates():
+    a, b, c = doc("a::0000"), doc("b::0000"), doc("c::0000")
+    fused = explore.reciprocal_rank_fusion([([a, b], 1.0), ([b, c], 1.0)], k=3)
+    assert [found.id for found in fused] == ["b::0000", "a::0000", "c::0000"]
+    lexical_heavy = explore.reciprocal_rank_fusion([([a, b], 1.0), ([c], 3.0)], k=2)
+    assert [found.id for found in lexical_heavy] == ["c::0000", "a::0000"]
+
+
+# ── Date ranges ─────────────────────────────────────────────────────────────
+
+def test_date_bound_rounds_partial_dates_to_inclusive_bounds():
+    assert explore.date_bound("2024") == "2024-01-01"
+    assert explore.date_bound("2024", end=True) == "2024-12-31"
+    assert explore.date_bound("2024-06", end=True) == "2024-06-31"
+    assert explore.date_bound("2024-06-15", end=True) == "2024-06-15"
+    assert explore.date_bound(None) is None
+    with pytest.raises(ValueError):
+        explore.date_bound("June 2024")
+
+
+def test_shard_overlaps_prunes_shards_outside_the_range():
+    shard = {"name": "2023", "start": "2023-01-01", "end": "2023-12-31"}
+    assert explore.shard_overlaps(shard, None, None)
+    assert explore.shard_overlaps(shard, "2023-06-01", None)
+    assert not explore.shard_overlaps(shard, "2024-01-01", None)
+    assert not explore.shard_overlaps(shard, None, "2022-12-31")
+    undated = {"name": "undated", "start": None, "end": None}
+    assert not explore.shard_overlaps(undated, "2023-01-01", None)
+    assert explore.shard_overlaps({"name": "all", "start": None, "end": None}, "2023-01-01", None)
+
+
+def test_date_range_needs_publish_dates():
+    dated = explore.VectorRetriever(shards=[], embeddings=None, publish_dates={"ep1": "2023-05-01", "ep2": ""})
+    assert explore.with_date_range(dated, "2023").allowed_episodes() == ["ep1"]
+    assert explore.with_date_range(dated, None, "2022").allowed_episodes() == []
+    # An index built before the episode catalog would silently answer from nothing
+    with pytest.raises(ValueError, match="rebuild the index"):
+        explore.with_date_range(explore.VectorRetriever(shards=[], embeddings=None), "2023")
+
+
+# ── Multiple corpora ────────────────────────────────────────────────────────
+
+class StubRetriever:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = 0
+
+    def invoke(self, question):
+        self.calls += 1
+        return self.docs
+
+
+def test_corpus_quotas_split_k_unless_configured():
+    assert explore.corpus_quotas({"retrieval": {"k": 8}}, ["lenny", "demo", "other"]) == {
+        "lenny": 3, "demo": 3, "other": 3,
+    }
+    configured = {"retrieval": {"k": 8, "corpus_quotas": {"lenny": 6}}}
+    assert explore.corpus_quotas(configured, ["lenny", "demo"]) == {"lenny": 6, "demo": 4}
+
+
+def test_multi_corpus_retriever_interleaves_and_tags_each_corpus():
+    retriever = explore.MultiCorpusRetriever(retrievers={
+        "lenny": StubRetriever([doc("a::0000"), doc("a::0001"), doc("a::0002")]),
+        "demo": StubRetriever([doc("d::0000")]),
+    })
+    found = retriever.invoke("pricing")
+    assert [(found_doc.id, found_doc.metadata["corpus"]) for found_doc in found] == [
+        ("a::0000", "lenny"), ("d::0000", "demo"), ("a::0001", "lenny"), ("a::0002", "lenny"),
+    ]
+
+
+def test_select_corpora_defaults_to_the_primary_corpus():
+    config = {"paths": {"corpora": [{"name": "lenny"}, {"name": "demo", "path": "episodes2"}]}}
+    assert [corpus["name"] for corpus in explore.select_corpora(config)] == ["lenny"]
+    assert [corpus["name"] for corpus in explore.select_corpora(config, "all")] == ["lenny", "demo"]
+
+
+# ── explore.py --serve ──────────────────────────────────────────────────────
+
+DAEMON_CONFIG = {
+    "providers": {"anthropic": {"api_key_env": "ANTHROPIC_API_KEY"}},
+    "models": {"haiku": {"provider": "anthropic", "id": "claude-haiku"}},
+    "web_search": {"provider": "api", "api_key_env": "SERPER_API_KEY"},
+}
+
+
+def daemon_exchange(request):
+    """Send one request through handle_daemon_request; (exit code, output the client saw)."""
+    client, server = socket.socketpair()
+    with client, server:
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        question, code = explore.handle_daemon_request(server, DAEMON_CONFIG, explore.WarmResources(served=True))
+        server.shutdown(socket.SHUT_WR)
+        messages = [json.loads(line) for line in client.makefile("r", encoding="utf-8")]
+    assert messages[-1] == {"exit": code}
+    return code, "".join(message.get("out", "") for message in messages)
+
+
+def test_daemon_streams_output_and_the_exit_code():
+    code, output = daemon_exchange({"argv": ["--list-models"]})
+    assert code == 0
+    assert "haiku" in output
+
+
+def test_daemon_reports_argument_errors_and_help_without_exiting():
+    code, output = daemon_exchange({"argv": ["--since", "June 2024", "question"]})
+    assert code == 2
+    assert "Expected a date" in output
+    code, output = daemon_exchange({"argv": ["--help"]})
+    assert code == 0
+    assert "usage:" in output
+
+
+def test_daemon_answers_with_the_callers_environment(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "daemon-key")
+    monkeypatch.delenv("SERPER_API_KEY", raising=False)
+
+    def fake_run_question(parser, args, config, model_catalog, resources):
+        print(os.environ.get("ANTHROPIC_API_KEY"), os.environ.get("SERPER_API_KEY"))
+        return 0
+
+    monkeypatch.setattr(explore, "run_question", fake_run_question)
+    code, output = daemon_exchange({"argv": ["question"],
+                                    "env": {"ANTHROPIC_API_KEY": None, "SERPER_API_KEY": "caller-key"}})
+    assert output.split() == ["None", "caller-key"]
+    assert os.environ["ANTHROPIC_API_KEY"] == "daemon-key"
+    assert "SERPER_API_KEY" not in os.environ
+
+
+@pytest.mark.parametrize("stop", [KeyboardInterrupt, SystemExit])
+def test_daemon_lets_a_kill_during_a_question_stop_it(monkeypatch, stop):
+    def interrupted(*args):
+        raise stop()
+
+    monkeypatch.setattr(explore, "run_question", interrupted)
+    client, server = socket.socketpair()
+    with client, server:
+        client.sendall(b'{"argv": ["question"]}\n')
+        with pytest.raises(stop):
+            explore.handle_daemon_request(server, DAEMON_CONFIG, explore.WarmResources(served=True))
+
+
+def test_ask_daemon_forwards_argv_and_environment(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "caller-key")
+    monkeypatch.delenv("SEARXNG_PORT", raising=False)
+    env = explore.forwarded_environment(DAEMON_CONFIG)
+    assert env["ANTHROPIC_API_KEY"] == "caller-key"
+    assert env["SEARXNG_PORT"] is None
+    assert set(env) == {"ANTHROPIC_API_KEY", "SERPER_API_KEY", "SEARXNG_ENDPOINT", "SEARXNG_PORT"}
+
+    socket_path = str(tmp_path / "d.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    received = {}
+
+    def answer():
+        conn, _ = listener.accept()
+        with conn:
+            received.update(json.loads(conn.makefile("r", encoding="utf-8").readline()))
+            conn.sendall(b'{"out": "answered\\n"}\n{"exit": 3}\n')
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    assert explore.ask_daemon(socket_path, ["question"], env) == 3
+    thread.join()
+    listener.close()
+    assert received == {"argv": ["question"], "env": env}
+    assert capsys.readouterr().out == "answered\n"
+    assert explore.ask_daemon(str(tmp_path / "missing.sock"), ["question"]) is None
+
+
+# ── Query embedding cache ───────────────────────────────────────────────────
+
+def test_query_embedding_cache_serves_repeats_and_drops_other_models(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = explore.QueryEmbeddingCache(path, model_name="model-a", memory_entries=1)
+    cache.put(explore.query_hash("pricing?"), [0.25, 0.5], embed_ms=40.0)
+    cache.put(explore.query_hash("hiring?"), [1.0, 0.0], embed_ms=40.0)
+    assert cache.get(explore.query_hash("hiring?"))[1] == "memory"
+    assert cache.get(explore.query_hash("  pricing? "))[:2] == ([0.25, 0.5], "disk")
+    cache.close()
+
+    reopened = explore.QueryEmbeddingCache(path, model_name="model-a")
+    assert reopened.dropped == 0
+    assert reopened.get(explore.query_hash("pricing?")) is not None
+    reopened.close()
+    other_model = explore.QueryEmbeddingCache(path, model_name="model-b")
+    assert other_model.dropped == 2
+    assert other_model.get(explore.query_hash("pricing?")) is None
+    other_model.close()
+
+
+# ── Answer cache ────────────────────────────────────────────────────────────
+
+MODEL = {"provider": "anthropic", "model": "claude-haiku"}
+BUILDS = [{"corpus": "lenny", "build_id": "20250101-000000"}]
+
+
+def test_answer_cache_key_ignores_whitespace_only():
+    fingerprint = explore.context_fingerprint([doc("a::0000"), doc("b::0000")])
+    key = explore.answer_cache_key("How do I  price\nmy product?", MODEL, "template", fingerprint, BUILDS)
+    assert key == explore.answer_cache_key(" How do I price my product? ", MODEL, "template", fingerprint, BUILDS)
+    assert key != explore.answer_cache_key("How do I price my products?", MODEL, "template", fingerprint, BUILDS)
+
+
+@pytest.mark.parametrize("change", ["model", "template", "context", "context order", "web", "build", "corpus"])
+def test_answer_cache_key_changes_with_everything_the_answer_depends_on(change):
+    docs = [doc("a::0000"), doc("b::0000")]
+    base = dict(model_meta=MODEL, template="template", fingerprint=explore.context_fingerprint(docs), indexes=BUILDS)
+    changed = dict(base)
+    if change == "model":
+        changed["model_meta"] = {**MODEL, "model": "claude-sonnet"}
+    elif change == "template":
+        changed["template"] = "template, in bullets"
+    elif change == "context":
+        changed["fingerprint"] = explore.context_fingerprint(docs + [doc("c::0000")])
+    elif change == "context order":
+        changed["fingerprint"] = explore.context_fingerprint(docs[::-1])
+    elif change == "web":
+        changed["fingerprint"] = explore.context_fingerprint(docs, [{"link": "https://example.com"}])
+    elif change == "build":
+        changed["indexes"] = [{"corpus": "lenny", "build_id": "20250201-000000"}]
+    else:
+        changed["indexes"] = BUILDS + [{"corpus": "demo", "build_id": "20250101-000000"}]
+    assert explore.answer_cache_key("question", **base) != explore.answer_cache_key("question", **changed)
+
+
+def test_answer_cache_expires_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    cache = explore.AnswerCache(str(tmp_path / "cache.sqlite"), ttl_hours=1, max_entries=2)
+    now = 1_700_000_000.0
+    monkeypatch.setattr(explore.time, "time", lambda: now)
+    for key in ("a", "b", "c"):
+        cache.put(key, f"question {key}", "claude-haiku", f"answer {key}", llm_seconds=2.0)
+        now += 1
+    assert cache.get("a")["answer"] == "answer a"
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("c")["llm_seconds"] == 2.0
+    now += 3601
+    assert cache.get("a") is None
+    cache.close()
+
+
+# ── Semantic query cache ────────────────────────────────────────────────────
+
+class StubEmbeddings:
+    """Every question about pricing embeds to the same direction."""
+
+    def embed_query(self, text):
+        return [1.0, 0.0] if "pricing" in text.lower() else [0.0, 1.0]
+
+
+def test_retrieval_scope_changes_with_builds_dates_and_settings():
+    scope = explore.retrieval_scope({"retrieval": {"k": 8}}, BUILDS)
+    assert scope == explore.retrieval_scope({"retrieval": {"k": 8}}, BUILDS)
+    assert scope != explore.retrieval_scope({"retrieval": {"k": 4}}, BUILDS)
+    assert scope != explore.retrieval_scope({"retrieval": {"k": 8}}, BUILDS, since="2024-01-01")
+    assert scope != explore.retrieval_scope({"retrieval": {"k": 8}}, [{"corpus": "lenny", "build_id": "next"}])
+
+
+def test_semantic_cache_matches_within_scope_and_threshold(tmp_path):
+    cache = explore.SemanticQueryCache(str(tmp_path / "cache.sqlite"), model_name="model-a", threshold=0.9)
+    cache.add("scope-1", "pricing advice", [1.0, 0.0], [doc("a::0000", "per-seat pricing")])
+    match = cache.match("scope-1", [0.99, 0.1])
+    assert match["question"] == "pricing advice"
+    assert [found.id for found in match["docs"]] == ["a::0000"]
+    assert cache.match("scope-1", [0.7, 0.7]) is None
+    assert cache.match("scope-2", [1.0, 0.0]) is None
+    cache.close()
+
+
+def test_semantic_cache_reuses_chunks_for_a_paraphrase(tmp_path):
+    cache = explore.SemanticQueryCache(str(tmp_path / "cache.sqlite"), model_name="model-a")
+    retriever = StubRetriever([doc("a::0000", "Stripe prices per seat", guest="Patrick")])
+    explore.retrieve_with_semantic_cache(cache, "scope", StubEmbeddings(), retriever, "Pricing advice from Stripe")
+    docs, match = explore.retrieve_with_semantic_cache(cache, "scope", StubEmbeddings(), retriever,
+                                                       "What pricing advice did Patrick give?")
+    assert match is not None
+    assert [found.id for found in docs] == ["a::0000"]
+    assert retriever.calls == 1
+    cache.close()
+
+
+def test_semantic_cache_searches_again_when_the_question_names_something_new(tmp_path):
+    cache = explore.SemanticQueryCache(str(tmp_path / "cache.sqlite"), model_name="model-a")
+    stripe = StubRetriever([doc("a::0000", "Stripe prices per seat")])
+    explore.retrieve_with_semantic_cache(cache, "scope", StubEmbeddings(), stripe, "Pricing advice from Stripe")
+    figma = StubRetriever([doc("b::0000", "Figma prices per editor")])
+    docs, match = explore.retrieve_with_semantic_cache(cache, "scope", StubEmbeddings(), figma,
+                                                       "Pricing advice from Figma")
+    assert match is None
+    assert [found.id for found in docs] == ["b::0000"]
+    assert figma.calls == 1
+    cache.close()
+
+
+def test_semantic_cache_is_off_by_default():
+    assert explore.load_semantic_cache({}) is None
+    assert explore.DEFAULT_CONFIG["cache"]["semantic"]["enabled"] is False
+
+
+def test_unit_vector_leaves_zero_vectors_alone():
+    np.testing.assert_allclose(explore.unit_vector([3.0, 4.0]), [0.6, 0.8])
+    assert explore.unit_vector([0.0, 0.0]).tolist() == [0.0, 0.0]
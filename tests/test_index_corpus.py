@@ -0,0 +1,396 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import explore
+import index_corpus
+
+
+# ── Incremental manifest ────────────────────────────────────────────────────
+
+def write_transcript(root, slug, text):
+    path = root / "episodes" / slug / "transcript.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_plan_embeds_only_new_and_changed_episodes(tmp_path):
+    same = write_transcript(tmp_path, "same", "unchanged transcript")
+    edited = write_transcript(tmp_path, "edited", "first version")
+    manifest = index_corpus.empty_manifest()
+    manifest["episodes"] = {
+        str(same): {"hash": index_corpus.file_sha256(str(same))},
+        str(edited): {"hash": index_corpus.file_sha256(str(edited))},
+        "episodes/removed/transcript.md": {"hash": "0" * 64},
+    }
+    edited.write_text("second version", encoding="utf-8")
+    added = write_transcript(tmp_path, "added", "brand new episode")
+
+    plan = index_corpus.plan_incremental_update([same, edited, added], manifest)
+    assert plan["new"] == [str(added)]
+    assert plan["changed"] == [str(edited)]
+    assert plan["unchanged"] == [str(same)]
+    assert plan["deleted"] == ["episodes/removed/transcript.md"]
+
+    full = index_corpus.plan_incremental_update([same, edited, added], manifest, full_rebuild=True)
+    assert sorted(full["changed"]) == sorted([str(same), str(edited)])
+    assert full["unchanged"] == []
+
+
+def test_manifest_round_trips_and_ignores_other_versions(tmp_path):
+    path = str(tmp_path / "data" / "index_manifest.json")
+    manifest = index_corpus.empty_manifest()
+    manifest["episodes"]["episodes/ep/transcript.md"] = {"hash": "abc", "chunk_ids": ["ep::0000"]}
+    index_corpus.save_manifest(path, manifest)
+    assert index_corpus.load_manifest(path)["episodes"] == manifest["episodes"]
+    assert not os.path.exists(path + ".tmp")
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": index_corpus.MANIFEST_VERSION + 1, "episodes": {"x": {}}}, f)
+    assert index_corpus.load_manifest(path)["episodes"] == {}
+    assert index_corpus.load_manifest(str(tmp_path / "missing.json"))["episodes"] == {}
+
+
+def test_chunk_ids_are_stable_per_episode():
+    assert index_corpus.chunk_ids_for("episodes/ep/transcript.md", 2) == ["ep::0000", "ep::0001"]
+    assert index_corpus.chunk_ids_for("episodes/ep/transcript.md", 0) == []
+
+
+# ── Speaker-turn chunking ───────────────────────────────────────────────────
+
+TRANSCRIPT = """# Episode title
+
+## Transcript
+
+Lenny (00:00:05):
+Welcome to the show.
+
+Guest (00:00:12):
+Thanks for having me.
+
+Lenny (00:01:30):
+Let's talk about pricing.
+"""
+
+
+def test_speaker_turn_splitter_packs_whole_turns():
+    chunks = index_corpus.SpeakerTurnSplitter(chunk_size=85).split_document(
+        Document(page_content=TRANSCRIPT, metadata={"episode": "ep"})
+    )
+    assert [chunk.metadata["start_ts"] for chunk in chunks] == ["00:00:05", "00:01:30"]
+    assert chunks[0].metadata["end_ts"] == "00:00:12"
+    assert chunks[0].metadata["speaker"] == "Lenny, Guest"
+    assert chunks[0].page_content.startswith("Lenny (00:00:05):\nWelcome to the show.")
+    assert chunks[1].metadata["episode"] == "ep"
+
+
+def test_speaker_turn_splitter_splits_long_turns_under_their_header():
+    text = "Guest (00:02:00):\n" + " ".join(["word"] * 200)
+    chunks = index_corpus.SpeakerTurnSplitter(chunk_size=300).split_document(Document(page_content=text))
+    assert len(chunks) > 1
+    assert all(chunk.page_content.startswith("Guest (00:02:00):\n") for chunk in chunks)
+    assert all(len(chunk.page_content) <= 300 for chunk in chunks)
+
+
+# ── Near-duplicate aliasing ─────────────────────────────────────────────────
+
+DEDUP_SETTINGS = {"threshold": 0.85, "num_perm": 64, "bands": 8, "shingle_words": 5, "min_words": 10}
+AD_READ = ("This episode is brought to you by Acme, the platform product teams use to ship "
+           "faster, learn from customers and grow revenue without adding headcount this year")
+
+
+def test_near_duplicate_chunks_from_another_episode_become_aliases(tmp_path):
+    index = index_corpus.NearDuplicateIndex(str(tmp_path / "dedup.sqlite"), DEDUP_SETTINGS)
+    first = [("ep1::0000", Document(page_content=AD_READ))]
+    again = [("ep1::0001", Document(page_content=AD_READ))]
+    second = [("ep2::0000", Document(page_content=AD_READ)),
+              ("ep2::0001", Document(page_content="A different conversation about hiring your first "
+                                                  "product manager and what to look for in them"))]
+    assert index.process_episode("episodes/ep1/transcript.md", first) == 0
+    # Repeats inside one episode are not aliased
+    assert index.process_episode("episodes/ep1/transcript.md", again) == 0
+    assert index.process_episode("episodes/ep2/transcript.md", second) == 1
+    rep_id = second[0][1].metadata["alias_of"]
+    assert rep_id.startswith("ep1::")
+    assert "alias_of" not in second[1][1].metadata
+    assert index.alias_episodes([rep_id]) == {rep_id: ["ep2"]}
+    assert index.dependents(["episodes/ep1/transcript.md"]) == {"episodes/ep2/transcript.md"}
+    index.close()
+
+
+# ── NumpyVectorStore on-disk format ─────────────────────────────────────────
+
+def random_rows(count, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def upsert_rows(store, ids, vectors):
+    store.upsert(ids, vectors.tolist(), [f"text of {chunk_id}" for chunk_id in ids],
+                 [{"episode": chunk_id.split("::")[0]} for chunk_id in ids])
+
+
+def unit_rows(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_numpy_store_writes_a_generation_readers_can_open(tmp_path):
+    vectors = random_rows(6)
+    ids = [f"ep-a::{i:04d}" for i in range(3)] + [f"ep-b::{i:04d}" for i in range(3)]
+    store = index_corpus.NumpyVectorStore(str(tmp_path))
+    upsert_rows(store, ids, vectors)
+    store.close()
+
+    with open(tmp_path / "index.json", encoding="utf-8") as f:
+        descriptor = json.load(f)
+    assert descriptor["format"] == index_corpus.NUMPY_INDEX_FORMAT
+    assert descriptor["generation"] == 1
+    assert descriptor["rows"] == 6
+    assert descriptor["episodes"] == {"ep-a": [0, 3], "ep-b": [3, 6]}
+    assert not os.path.exists(tmp_path / "pending.jsonl")
+
+    index = explore.NumpyVectorIndex(str(tmp_path))
+    np.testing.assert_allclose(index.full_vectors(np.arange(6)), unit_rows(vectors), atol=1e-6)
+    assert index.document(4).page_content == "text of ep-b::0001"
+    assert index.document(4).id == "ep-b::0001"
+    index.close()
+
+
+def test_numpy_store_replays_pending_writes_after_a_crash(tmp_path):
+    vectors = random_rows(4)
+    store = index_corpus.NumpyVectorStore(str(tmp_path))
+    upsert_rows(store, [f"ep::{i:04d}" for i in range(4)], vectors)
+    store.delete(["ep::0002"])
+    # Simulate a crash: the logs are on disk but close() never compacted them
+    store._close_logs()
+    with open(tmp_path / "pending.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "id": "ep::00')  # torn final line
+
+    reopened = index_corpus.NumpyVectorStore(str(tmp_path))
+    assert reopened.count() == 3
+    assert reopened.descriptor["generation"] == 1
+    found = reopened.get(["ep::0000", "ep::0002", "ep::0003"], include=("embeddings", "documents"))
+    assert found["ids"] == ["ep::0000", "ep::0003"]
+    np.testing.assert_allclose(found["embeddings"][1], unit_rows(vectors)[3], atol=1e-6)
+    reopened.close()
+    assert not os.path.exists(tmp_path / "pending.f32")
+
+
+def test_numpy_store_compaction_replaces_the_previous_generation(tmp_path):
+    store = index_corpus.NumpyVectorStore(str(tmp_path))
+    upsert_rows(store, ["ep::0000", "ep::0001"], random_rows(2))
+    store.close()
+    store = index_corpus.NumpyVectorStore(str(tmp_path))
+    upsert_rows(store, ["ep::0001"], random_rows(1, seed=1))
+    store.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["chunks-2.jsonl", "index.json", "offsets-2.npy", "vectors-2.npy"]
+    index = explore.NumpyVectorIndex(str(tmp_path))
+    np.testing.assert_allclose(index.full_vectors([1])[0], unit_rows(random_rows(1, seed=1))[0], atol=1e-6)
+    index.close()
+
+
+# ── Blue/green builds ───────────────────────────────────────────────────────
+
+def make_build(indexes_dir, build_id, status="validated"):
+    build_dir = indexes_dir / build_id
+    build_dir.mkdir(parents=True)
+    index_corpus.save_index_info(str(build_dir), {"backend": "chroma", "status": status})
+
+
+def test_current_pointer_switches_builds_and_rolls_back(tmp_path):
+    for build_id in ("20250101-000000", "20250201-000000", "20250301-000000"):
+        make_build(tmp_path, build_id)
+    make_build(tmp_path, "20250215-000000", status="failed")
+    indexes_dir = str(tmp_path)
+    assert index_corpus.read_current_build(indexes_dir) is None
+
+    index_corpus.write_current_build(indexes_dir, "20250301-000000")
+    assert index_corpus.read_current_build(indexes_dir) == "20250301-000000"
+    layout = index_corpus.current_layout(indexes_dir, {}, "chroma")
+    assert layout["store"] == str(tmp_path / "20250301-000000" / "chroma_db")
+
+    # Builds that never validated are skipped
+    assert index_corpus.rollback_build(indexes_dir) == "20250201-000000"
+    assert index_corpus.read_current_build(indexes_dir) == "20250201-000000"
+    assert index_corpus.rollback_build(indexes_dir, "20250301-000000") == "20250301-000000"
+    with pytest.raises(ValueError):
+        index_corpus.rollback_build(indexes_dir, "20240101-000000")
+    index_corpus.write_current_build(indexes_dir, "20250101-000000")
+    with pytest.raises(ValueError):
+        index_corpus.rollback_build(indexes_dir)
+
+
+def test_current_pointer_to_a_missing_build_is_ignored(tmp_path):
+    index_corpus.write_current_build(str(tmp_path), "20250101-000000")
+    assert index_corpus.read_current_build(str(tmp_path)) is None
+    assert not os.path.exists(tmp_path / "CURRENT.tmp")
+
+
+def test_prune_keeps_the_current_and_in_progress_builds(tmp_path):
+    build_ids = [f"2025010{day}-000000" for day in range(1, 6)]
+    for build_id in build_ids:
+        make_build(tmp_path, build_id)
+    index_corpus.write_current_build(str(tmp_path), build_ids[0])
+    index_corpus.write_build_pointer(str(tmp_path), index_corpus.BUILDING_POINTER, build_ids[1])
+
+    assert index_corpus.prune_builds(str(tmp_path), keep=2) == [build_ids[2]]
+    assert [build_id for build_id, _ in index_corpus.list_builds(str(tmp_path))] == [
+        build_ids[0], build_ids[1], build_ids[3], build_ids[4],
+    ]
+
+
+# ── Build checkpoints ───────────────────────────────────────────────────────
+
+def chunk(text, **metadata):
+    return Document(page_content=text, metadata={"episode": "ep", **metadata})
+
+
+def test_checkpoint_resumes_without_re_embedding_written_chunks(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = index_corpus.BuildCheckpoint(path)
+    checkpoint.mark([("ep::0000", chunk("first", speaker="Lenny")), ("ep::0001", chunk("second"))])
+    checkpoint.close()
+
+    # The build crashed and the episode was edited before the resume
+    resumed = index_corpus.BuildCheckpoint(path)
+    chunks = [("ep::0000", chunk("first", speaker="Lenny")),
+              ("ep::0001", chunk("second, edited")),
+              ("ep::0002", chunk("third"))]
+    assert [chunk_id for chunk_id, _ in resumed.unwritten(chunks)] == ["ep::0001", "ep::0002"]
+    assert resumed.skipped == 1
+    assert resumed.count() == 2
+    resumed.close()
+
+
+def test_checkpoint_finds_the_tail_of_a_longer_crashed_version(tmp_path):
+    checkpoint = index_corpus.BuildCheckpoint(str(tmp_path / "checkpoint.sqlite"))
+    checkpoint.mark([(f"ep::{i:04d}", chunk(str(i))) for i in range(3)] + [("other::0000", chunk("x"))])
+    assert sorted(checkpoint.episode_ids("episodes/ep/transcript.md")) == ["ep::0000", "ep::0001", "ep::0002"]
+    checkpoint.forget(["ep::0002"])
+    assert sorted(checkpoint.chunk_ids()) == ["ep::0000", "ep::0001", "other::0000"]
+    checkpoint.close()
+
+
+# ── BM25 ────────────────────────────────────────────────────────────────────
+
+def test_bm25_ranks_rarer_terms_higher_and_filters_by_episode(tmp_path):
+    path = str(tmp_path / "bm25.sqlite")
+    writer = index_corpus.Bm25Index(path)
+    writer.upsert(
+        ["a::0000", "b::0000", "c::0000"],
+        ["pricing pricing strategy", "growth strategy", "hiring strategy and growth"],
+        [{"episode": "a"}, {"episode": "b"}, {"episode": "c"}],
+    )
+    writer.close()
+
+    reader = explore.Bm25Index(path)
+    assert [doc.id for doc in reader.search("pricing strategy", k=3)][0] == "a::0000"
+    assert [doc.id for doc in reader.search("growth", k=3)] == ["b::0000", "c::0000"]
+    assert [doc.id for doc in reader.search("growth", k=3, episodes=["c"])] == ["c::0000"]
+    assert reader.search("the and", k=3) == []
+
+
+def test_queries_and_indexed_chunks_share_one_tokenizer():
+    assert explore.bm25_tokens is index_corpus.bm25_tokens
+    text = "What's Stripe's take on B2B pricing -- per-seat, or usage_based? (2024)"
+    assert explore.bm25_tokens(text) == index_corpus.bm25_tokens(text)
+    assert explore.bm25_tokens(text) == ["s", "stripe", "s", "take", "b2b", "pricing", "per", "seat",
+                                         "usage_based", "2024"]
+
+
+# ── Corpora ─────────────────────────────────────────────────────────────────
+
+def test_corpus_configs_default_to_lenny_and_mark_the_primary():
+    assert index_corpus.corpus_configs({}) == [
+        {"name": "lenny", "path": "episodes", "label": "lenny", "primary": True},
+    ]
+    corpora = index_corpus.corpus_configs({"corpora": [
+        {"name": "lenny", "path": "episodes"},
+        {"name": "demo", "path": "episodes2", "label": "Demo pod"},
+    ]})
+    assert [(corpus["name"], corpus["label"], corpus["primary"]) for corpus in corpora] == [
+        ("lenny", "lenny", True), ("demo", "Demo pod", False),
+    ]
+    assert index_corpus.select_corpora(corpora, "demo") == corpora[1:]
+    assert index_corpus.select_corpora(corpora, "all") == corpora
+    with pytest.raises(ValueError):
+        index_corpus.select_corpora(corpora, "nope")
+
+
+@pytest.mark.parametrize("entries", [
+    [{"name": "lenny"}, {"name": "lenny", "path": "episodes2"}],
+    [{"name": "../lenny"}],
+])
+def test_corpus_names_must_be_unique_directory_names(entries):
+    with pytest.raises(ValueError):
+        index_corpus.corpus_configs({"corpora": entries})
+
+
+# ── WorkQueue leases ────────────────────────────────────────────────────────
+
+def make_queue(tmp_path, units=2):
+    return index_corpus.WorkQueue.create(str(tmp_path), {"settings": {"embedding_model": "test"}},
+                                         [("lenny", [f"episodes/ep{i}/transcript.md"]) for i in range(units)])
+
+
+def test_work_queue_claims_each_unit_once_until_its_lease_expires(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.claim("host-a", lease_seconds=600)
+    second = queue.claim("host-b", lease_seconds=600)
+    assert (first[0], second[0]) == (1, 2)
+    assert first[2] == ["episodes/ep0/transcript.md"]
+    assert queue.claim("host-c", lease_seconds=600) is None
+    # A dead worker's unit can be claimed again once its lease is over
+    assert queue.claim("host-c", lease_seconds=-1)[0] == 1
+    queue.close()
+
+
+def test_work_queue_finished_units_are_never_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, units=1)
+    unit_id, _, _ = queue.claim("host-a", lease_seconds=600)
+    queue.finish(unit_id, "host-a", ["hash"], [[0.5, 0.5]])
+    assert queue.claim("host-b", lease_seconds=-1) is None
+    assert queue.progress() == {"pending": 0, "claimed": 0, "done": 1}
+    assert queue.merged_segments().get_many(["hash"]) == {"hash": [0.5, 0.5]}
+    queue.close()
+
+
+def test_work_queue_release_only_returns_the_workers_own_claim(tmp_path):
+    queue = make_queue(tmp_path, units=1)
+    unit_id, _, _ = queue.claim("host-a", lease_seconds=600)
+    queue.release(unit_id, "host-b")
+    assert queue.progress()["claimed"] == 1
+    queue.release(unit_id, "host-a")
+    assert queue.claim("host-b", lease_seconds=600)[0] == unit_id
+    queue.close()
+
+
+# ── Quantized storage ───────────────────────────────────────────────────────
+
+def test_int8_store_reencodes_from_its_master_without_drift(tmp_path):
+    storage = {"dtype": "int8", "pca_dim": 4}
+    store = index_corpus.NumpyVectorStore(str(tmp_path), storage=storage)
+    upsert_rows(store, [f"base::{i:04d}" for i in range(50)], random_rows(50))
+    store.close()
+    first_master = np.load(tmp_path / "master-1.npy").copy()
+
+    for generation in range(2, 5):
+        store = index_corpus.NumpyVectorStore(str(tmp_path), storage=storage)
+        upsert_rows(store, [f"new{generation}::0000"], random_rows(1, seed=generation))
+        store.close()
+
+    descriptor = json.load(open(tmp_path / "index.json", encoding="utf-8"))
+    assert descriptor["storage"]["master"] == "master-4.npy"
+    master = np.load(tmp_path / "master-4.npy")
+    codes = np.load(tmp_path / "vectors-4.npy")
+    with np.load(tmp_path / descriptor["storage"]["quant"]) as quant:
+        scale = quant["scale"]
+    # The original rows are carried over bit for bit and encoded once from them
+    np.testing.assert_array_equal(master[:50], first_master)
+    expected = index_corpus.encode_vectors(master[:50].astype(np.float32), "int8", scale)
+    np.testing.assert_array_equal(codes[:50], expected)